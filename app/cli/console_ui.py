@@ -4,6 +4,10 @@ from app.controllers.cart_controller import CartController
 from app.controllers.order_controller import OrderController
 from app.controllers.admin_controller import AdminController
 from app.utils.session_manager import SessionManager
+from app.models.payment import PaymentDetails
+from app.utils.payment_gateway import RuleBasedGateway
+from app.utils.payment_processor import PaymentProcessor
+from app.utils.notifier import Notifier, CustomerNotifier, AdminNotifier
 import getpass
 
 class ConsoleUI:
@@ -15,9 +19,16 @@ class ConsoleUI:
     def __init__(self):
         self.user_ctrl = UserController()
         self.cart_ctrl = CartController()
-        self.order_ctrl = OrderController()
+        self.cart_ctrl.start_hold_sweeper()
+        # payments settle on background workers; checkout returns as soon as the order is written
+        self.order_ctrl = OrderController(processor=PaymentProcessor(RuleBasedGateway(), workers=2))
+        # settle payments a previous run left Pending, then keep checking in the background
+        self.order_ctrl.reconcile_pending()
+        self.order_ctrl.start_reconciler()
         self.admin_ctrl = AdminController()
-        self.session = SessionManager()
+        Notifier.register(CustomerNotifier())
+        Notifier.register(AdminNotifier())
+        self.session = SessionManager(self.user_ctrl.sessions)
 
     # ---------- Safe input helpers ----------
     def _prompt_choice(self, prompt: str, choices: list[str]):
@@ -75,7 +86,90 @@ class ConsoleUI:
                 print("\nInput interrupted.")
                 return None
 
+    def _browse_books(self, page_size: int = 20):
+        """Shows the catalog one page at a time so memory stays bounded on huge inventories."""
+        text, cursor = self.admin_ctrl.view_books_page(page_size=page_size)
+        print(text)
+        while cursor:
+            try:
+                more = input("Press Enter for more, or 'q' to stop: ").strip().lower()
+            except (EOFError, KeyboardInterrupt):
+                print("\nInput interrupted.")
+                return
+            if more == "q":
+                return
+            text, cursor = self.admin_ctrl.view_books_page(**cursor)
+            print(text)
+
+    def _browse_users(self, page_size: int = 20):
+        """Shows registered users one page at a time."""
+        text, cursor = self.admin_ctrl.view_users_page(page_size=page_size)
+        print(text)
+        while cursor:
+            try:
+                more = input("Press Enter for more, or 'q' to stop: ").strip().lower()
+            except (EOFError, KeyboardInterrupt):
+                print("\nInput interrupted.")
+                return
+            if more == "q":
+                return
+            text, cursor = self.admin_ctrl.view_users_page(**cursor)
+            print(text)
+
+    def _browse_orders(self, user_id: int, page_size: int = 10):
+        """Shows order history newest first, one page at a time, optionally filtered by status."""
+        status = input("Filter by status (Pending/Confirmed/Cancelled, blank for all): ").strip().capitalize()
+        text, cursor = self.order_ctrl.view_orders_page(user_id, page_size, status or None)
+        print(text)
+        while cursor:
+            try:
+                more = input("Press Enter for more, or 'q' to stop: ").strip().lower()
+            except (EOFError, KeyboardInterrupt):
+                print("\nInput interrupted.")
+                return
+            if more == "q":
+                return
+            text, cursor = self.order_ctrl.view_orders_page(**cursor)
+            print(text)
+
+    def _search_books(self, page_size: int = 20):
+        try:
+            query = input("Search title/author: ").strip()
+        except (EOFError, KeyboardInterrupt):
+            print("\nInput interrupted.")
+            return
+        page = 1
+        text, has_more = self.admin_ctrl.search_books(query, page, page_size)
+        print(text)
+        while has_more:
+            try:
+                more = input("Press Enter for more, or 'q' to stop: ").strip().lower()
+            except (EOFError, KeyboardInterrupt):
+                print("\nInput interrupted.")
+                return
+            if more == "q":
+                return
+            page += 1
+            text, has_more = self.admin_ctrl.search_books(query, page, page_size)
+            print(text)
+
     # ---------- Menus ----------
+    def _prompt_payment_details(self) -> PaymentDetails:
+        """Collects payment details for the headless checkout API."""
+        print("\n--- Payment Section ---")
+        print("Available methods: Card / UPI / COD")
+        method = input("Enter payment method: ").strip().upper()
+        if method == "UPI":
+            return PaymentDetails.upi(input("Enter UPI ID (example@upi): "))
+        if method == "COD":
+            print("Cash on Delivery selected.")
+            return PaymentDetails.cod()
+        if method != "CARD":
+            print("Invalid payment method. Defaulting to CARD.")
+        card_number = input("Enter card number (16 digits): ")
+        cvv = input("Enter CVV (3 digits): ")
+        return PaymentDetails.card(card_number, cvv)
+
     def main_menu(self):
         while True:
             print("\n====== Nest of Books ======")
@@ -89,6 +183,9 @@ class ConsoleUI:
             elif choice == "2":
                 self.handle_login()
             elif choice == "3":
+                self.order_ctrl.close()
+                self.cart_ctrl.close()
+                Notifier.shutdown()
                 print("Exiting system. Goodbye!")
                 break
             else:
@@ -139,8 +236,14 @@ class ConsoleUI:
             print("2. Update Book Stock")
             print("3. View All Books")
             print("4. View Users")
-            print("5. Logout")
-            choice = self._prompt_choice("Enter choice: ", ["1", "2", "3", "4", "5"])
+            print("5. Search Books")
+            print("6. Import Books (CSV/JSONL)")
+            print("7. Sales Report")
+            print("8. Dashboard")
+            print("9. Low Stock Report")
+            print("10. Set Reorder Threshold")
+            print("11. Logout")
+            choice = self._prompt_choice("Enter choice: ", [str(n) for n in range(1, 12)])
             if choice == "1":
                 try:
                     title = input("Title: ").strip()
@@ -165,15 +268,51 @@ class ConsoleUI:
                     print(f"Could not update stock: {e}")
             elif choice == "3":
                 try:
-                    print(self.admin_ctrl.view_all_books())
+                    self._browse_books()
                 except Exception as e:
                     print(f"Could not load books: {e}")
             elif choice == "4":
                 try:
-                    print(self.admin_ctrl.view_all_users())
+                    self._browse_users()
                 except Exception as e:
                     print(f"Could not load users: {e}")
             elif choice == "5":
+                try:
+                    self._search_books()
+                except Exception as e:
+                    print(f"Could not search books: {e}")
+            elif choice == "6":
+                try:
+                    path = input("Feed file path: ").strip()
+                    print(self.admin_ctrl.import_books(path))
+                except Exception as e:
+                    print(f"Could not import books: {e}")
+            elif choice == "7":
+                try:
+                    print(self.admin_ctrl.sales_report())
+                except Exception as e:
+                    print(f"Could not build sales report: {e}")
+            elif choice == "8":
+                try:
+                    print(self.admin_ctrl.dashboard())
+                except Exception as e:
+                    print(f"Could not load dashboard: {e}")
+            elif choice == "9":
+                try:
+                    print(self.admin_ctrl.low_stock_report())
+                except Exception as e:
+                    print(f"Could not build low-stock report: {e}")
+            elif choice == "10":
+                try:
+                    book_id = self._prompt_int("Book ID: ", min_val=1)
+                    threshold = self._prompt_int("Reorder when stock falls below: ", min_val=0)
+                    if book_id is None or threshold is None:
+                        print("Operation cancelled.")
+                        continue
+                    print(self.admin_ctrl.set_reorder_threshold(book_id, threshold))
+                except Exception as e:
+                    print(f"Could not set threshold: {e}")
+            elif choice == "11":
                 print("Logging out admin...")
                 break
             else:
@@ -191,12 +330,13 @@ class ConsoleUI:
             print("5. Remove from Cart")
             print("6. Checkout")
             print("7. View Orders")
-            print("8. Logout")
-            choice = self._prompt_choice("Enter choice: ", ["1","2","3","4","5","6","7","8"])
+            print("8. Search Books")
+            print("9. Logout")
+            choice = self._prompt_choice("Enter choice: ", ["1","2","3","4","5","6","7","8","9"])
 
             if choice == "1":
                 try:
-                    print(self.admin_ctrl.view_all_books())
+                    self._browse_books()
                 except Exception as e:
                     print(f"Could not fetch books: {e}")
             elif choice == "2":
@@ -236,15 +376,29 @@ class ConsoleUI:
             elif choice == "6":
                 try:
                     cart = self.cart_ctrl._get_cart(user.user_id)
-                    print(self.order_ctrl.checkout(user.user_id, cart))
+                    if cart.is_empty():
+                        print("Cannot checkout an empty cart.")
+                        continue
+                    details = self._prompt_payment_details()
+                    result = self.cart_ctrl.checkout(user.user_id, self.order_ctrl, details)
+                    for warning in result.warnings:
+                        print(warning)
+                    print(result.message)
+                    if result.payment_status is not None:
+                        print(f"Payment Status: {result.payment_status}")
                 except Exception as e:
                     print(f"Checkout failed: {e}")
             elif choice == "7":
                 try:
-                    print(self.order_ctrl.view_orders(user.user_id))
+                    self._browse_orders(user.user_id)
                 except Exception as e:
                     print(f"Could not fetch orders: {e}")
             elif choice == "8":
+                try:
+                    self._search_books()
+                except Exception as e:
+                    print(f"Could not search books: {e}")
+            elif choice == "9":
                 print("Logging out...")
                 break
             else:
@@ -1,32 +1,59 @@
 # app/controllers/admin_controller.py
 from app.repositories.book_repository import BookRepository
 from app.repositories.user_repository import UserRepository
+from app.repositories.analytics_repository import AnalyticsRepository
+from app.models.book import Book
 
 class AdminController:
     """
     Handles Admin operations.
-    Maps to: ManageBooks, ModifyInventory, ViewUsers.
+    Maps to: ManageBooks, ModifyInventory, ViewUsers, SalesReport, Dashboard.
     """
 
     def __init__(self):
         self.book_repo = BookRepository()
         self.user_repo = UserRepository()
+        self.analytics_repo = AnalyticsRepository()
 
     def add_book(self, title: str, author: str, price: float, stock: int) -> str:
         try:
             title = (title or "").strip()
             author = (author or "").strip()
-            if not title or not author:
-                return "Title and Author are required."
-            if price is None or price < 0:
-                return "Price must be ≥ 0."
-            if stock is None or stock < 0:
-                return "Stock must be ≥ 0."
+            error = Book.validate_fields(title, author, price, stock)
+            if error:
+                return error
             book_id = self.book_repo.add_book(title, author, float(price), int(stock))
             return f"Added '{title}' (ID: {book_id}) successfully."
         except Exception as e:
             return f"Failed to add book: {e}"
 
+    def import_books(self, path: str, resume: bool = True, chunk_size: int = 5000) -> str:
+        """
+        Bulk-loads a CSV/JSONL feed. Re-running the same file resumes after the
+        last committed chunk; pass resume=False to start over.
+        """
+        from app.utils.book_import import BookImporter, FeedError
+        try:
+            path = (path or "").strip()
+            if not path:
+                return "Feed path is required."
+            report = BookImporter(self.book_repo, chunk_size).run(path, resume=resume)
+            lines = [f"Imported {report.imported} books in {report.elapsed:.2f}s "
+                     f"({report.rows_per_second:.0f} rows/s)."]
+            if report.resumed_from:
+                lines.append(f"Resumed after line {report.resumed_from} ({report.skipped} rows skipped).")
+            if report.rejected_count:
+                lines.append(f"Rejected {report.rejected_count} rows:")
+                for line_no, reason in report.rejected[:20]:
+                    lines.append(f"  line {line_no}: {reason}")
+                if report.rejected_count > 20:
+                    lines.append(f"  ... and {report.rejected_count - 20} more.")
+            return "\n".join(lines)
+        except (OSError, FeedError) as e:
+            return f"Could not read feed: {e}"
+        except Exception as e:
+            return f"Import stopped (resume to continue): {e}"
+
     def update_book_stock(self, book_id: int, new_stock: int) -> str:
         try:
             if not isinstance(book_id, int) or book_id <= 0:
@@ -53,26 +80,179 @@ class AdminController:
         except Exception as e:
             return f"Failed to remove book: {e}"
 
-    def view_all_books(self) -> str:
+    def set_reorder_threshold(self, book_id: int, threshold: int) -> str:
+        try:
+            if not isinstance(book_id, int) or book_id <= 0:
+                return "Invalid Book ID."
+            if threshold is None or threshold < 0:
+                return "Threshold must be ≥ 0."
+            if not self.book_repo.set_reorder_threshold(book_id, int(threshold)):
+                return f"Book ID {book_id} not found."
+            return f"Reorder threshold for book ID {book_id} set to {threshold}."
+        except Exception as e:
+            return f"Failed to set reorder threshold: {e}"
+
+    def low_stock_report(self, limit: int = 50) -> str:
+        """Books below their reorder threshold, emptiest first."""
         try:
-            books = self.book_repo.get_all_books()
+            books = self.book_repo.get_low_stock_books(limit)
             if not books:
-                return "No books in inventory."
-            lines = ["\nBook Inventory:"]
+                return "No books are below their reorder threshold."
+            total = self.book_repo.count_low_stock()
+            lines = [f"\nLow Stock ({total} titles below threshold"
+                     + (f", showing {len(books)}" if total > len(books) else "") + "):"]
             for b in books:
+                lines.append(f"[{b['book_id']}] {b['title']} by {b['author']} — "
+                             f"Stock: {b['stock']} (reorder at {b['reorder_threshold']})")
+            return "\n".join(lines)
+        except Exception as e:
+            return f"Failed to build low-stock report: {e}"
+
+    def view_all_books(self) -> str:
+        try:
+            lines = ["\nBook Inventory:"]
+            for b in self.book_repo.iter_books():
                 lines.append(f"[{b.book_id}] {b.title} — ₹{b.price} — Stock: {b.stock}")
+            if len(lines) == 1:
+                return "No books in inventory."
             return "\n".join(lines)
         except Exception as e:
             return f"Failed to fetch books: {e}"
 
+    def view_books_page(self, after_id: int | None = None, page_size: int = 20,
+                        sort_key: str = "book_id", after_value=None) -> tuple[str, dict | None]:
+        """
+        Renders one catalog page.
+        Returns (text, cursor); pass **cursor back in to get the next page. cursor is None at the end.
+        """
+        try:
+            books = self.book_repo.get_books_page(page_size, sort_key, after_id, after_value)
+            if not books:
+                return ("No books in inventory." if after_id is None else "End of catalog."), None
+            lines = ["\nBook Inventory:"]
+            for b in books:
+                lines.append(f"[{b.book_id}] {b.title} — ₹{b.price} — Stock: {b.stock}")
+            cursor = None
+            if len(books) == page_size:
+                last = books[-1]
+                cursor = {"after_id": last.book_id, "after_value": getattr(last, sort_key),
+                          "page_size": page_size, "sort_key": sort_key}
+            return "\n".join(lines), cursor
+        except Exception as e:
+            return f"Failed to fetch books: {e}", None
+
+    def search_books(self, query: str, page: int = 1, page_size: int = 20) -> tuple[str, bool]:
+        """
+        Ranked title/author search with prefix matching.
+        Returns (text, has_more).
+        """
+        try:
+            query = (query or "").strip()
+            if not query:
+                return "Enter a title or author to search for.", False
+            if page < 1:
+                return "Page must be ≥ 1.", False
+            books = self.book_repo.search_books(query, page_size + 1, (page - 1) * page_size)
+            if not books:
+                return (f"No books match '{query}'." if page == 1 else "No more results."), False
+            lines = [f"\nSearch results for '{query}' (page {page}):"]
+            for b in books[:page_size]:
+                lines.append(f"[{b.book_id}] {b.title} by {b.author} — ₹{b.price} — Stock: {b.stock}")
+            return "\n".join(lines), len(books) > page_size
+        except Exception as e:
+            return f"Search failed: {e}", False
+
     def view_all_users(self) -> str:
         try:
-            users = self.user_repo.get_all_users()
+            lines = ["\nRegistered Users:"]
+            for u in self.user_repo.iter_users():
+                lines.append(f"{u['user_id']} — {u['name']} ({u['role']}) — {u['email']}")
+            return "\n".join(lines) if len(lines) > 1 else "No users found."
+        except Exception as e:
+            return f"Failed to fetch users: {e}"
+
+    def view_users_page(self, after_id: int | None = None, page_size: int = 20,
+                        role: str | None = None) -> tuple[str, dict | None]:
+        """
+        Renders one page of users.
+        Returns (text, cursor); pass **cursor back in to get the next page. cursor is None at the end.
+        """
+        try:
+            users = self.user_repo.get_users_page(page_size, after_id, role)
             if not users:
-                return "No users found."
+                return ("No users found." if after_id is None else "End of user list."), None
             lines = ["\nRegistered Users:"]
             for u in users:
                 lines.append(f"{u['user_id']} — {u['name']} ({u['role']}) — {u['email']}")
+            cursor = None
+            if len(users) == page_size:
+                cursor = {"after_id": users[-1]["user_id"], "page_size": page_size, "role": role}
+            return "\n".join(lines), cursor
+        except Exception as e:
+            return f"Failed to fetch users: {e}", None
+
+    def sales_report(self, date_from=None, date_to=None, top: int = 5, days: int = 7) -> str:
+        """
+        Confirmed-order sales between date_from (inclusive) and date_to (exclusive), UTC:
+        totals and average order value, top books by revenue and by units, top authors,
+        and the last `days` days of daily revenue.
+        """
+        try:
+            summary = self.analytics_repo.order_summary(date_from, date_to)
+            if not summary["orders"]:
+                return "No confirmed orders in this period."
+            lines = ["\nSales Report:",
+                     f"Orders: {summary['orders']} — Revenue: ₹{summary['revenue']:.2f} — "
+                     f"Average order: ₹{summary['average_order_value']:.2f}",
+                     "\nTop books by revenue:"]
+            for r in self.analytics_repo.revenue_by_book(date_from, date_to, top):
+                lines.append(f"[{r['book_id']}] {r['title']} by {r['author']} — "
+                             f"{r['units']} sold — ₹{r['revenue']:.2f}")
+            lines.append("\nTop sellers by units:")
+            for r in self.analytics_repo.top_sellers(date_from, date_to, top):
+                lines.append(f"[{r['book_id']}] {r['title']} — {r['units']} sold")
+            lines.append("\nTop authors:")
+            for r in self.analytics_repo.revenue_by_author(date_from, date_to, top):
+                lines.append(f"{r['author']} — {r['titles']} titles — {r['units']} sold — ₹{r['revenue']:.2f}")
+            lines.append("\nRevenue by day:")
+            for r in self.analytics_repo.revenue_by_day(date_from, date_to)[-days:]:
+                lines.append(f"{r['day']} — {r['orders']} orders — ₹{r['revenue']:.2f}")
             return "\n".join(lines)
         except Exception as e:
-            return f"Failed to fetch users: {e}"
+            return f"Failed to build sales report: {e}"
+
+    def dashboard(self, days: int = 7, top: int = 5) -> str:
+        """
+        Store-wide totals read from the summary tables only, so the cost is
+        independent of how many orders and payments exist.
+        """
+        try:
+            statuses = self.analytics_repo.status_totals()
+            confirmed = statuses.get("Confirmed", {"orders": 0, "amount": 0.0})
+            average = confirmed["amount"] / confirmed["orders"] if confirmed["orders"] else 0.0
+            lines = ["\nAdmin Dashboard:",
+                     f"Revenue: ₹{confirmed['amount']:.2f} from {confirmed['orders']} confirmed orders "
+                     f"(average ₹{average:.2f})",
+                     "Orders by status: " + (", ".join(f"{s} {t['orders']}" for s, t in sorted(statuses.items()))
+                                             or "none")]
+            payments = self.analytics_repo.payment_totals()
+            if payments:
+                lines.append("Payments: " + ", ".join(f"{p['method']}/{p['status']} {p['payments']}" for p in payments))
+            lines.append(f"\nLast {days} sales days:")
+            for r in self.analytics_repo.recent_daily_revenue(days):
+                lines.append(f"{r['day']} — {r['orders']} orders — ₹{r['revenue']:.2f}")
+            lines.append(f"\nTop {top} books (units):")
+            for r in self.analytics_repo.top_books_sold(top):
+                lines.append(f"[{r['book_id']}] {r['title']} — {r['units']} sold — ₹{r['revenue']:.2f}")
+            lines.append(f"\nTop {top} customers (lifetime spend):")
+            for r in self.analytics_repo.top_customers(top):
+                lines.append(f"{r['user_id']} — {r['name']} — {r['orders']} orders — ₹{r['spend']:.2f}")
+            return "\n".join(lines)
+        except Exception as e:
+            return f"Failed to load dashboard: {e}"
+
+    def rebuild_dashboard(self) -> str:
+        """Recomputes the dashboard summary tables from orders, order items and payments."""
+        if self.analytics_repo.rebuild_summaries():
+            return "Dashboard summaries rebuilt."
+        return "Failed to rebuild dashboard summaries."
@@ -1,32 +1,57 @@
 # app/controllers/cart_controller.py
 from app.repositories.book_repository import BookRepository
+from app.repositories.reservation_repository import ReservationRepository, ReservationError
 from app.models.cart import Cart
+from app.utils.cart_cache import CartCache
+from app.utils.hold_sweeper import HoldSweeper
+
+RETRY_LATER = "Could not reserve stock right now, please try again."
 
 class CartController:
     """
     Handles Cart operations for logged-in users.
     Maps to: AddToCart, RemoveFromCart, UpdateQuantity, ViewCart.
+    Live carts sit in a bounded CartCache; edits are saved write-behind, and
+    checkout() / close() force pending edits to disk.
+    Every cart line holds its quantity of stock for `hold_ttl` seconds (renewed when
+    the line changes), so two customers can never both hold the last copy.
     """
 
-    def __init__(self):
+    def __init__(self, cache: CartCache | None = None, hold_ttl: float | None = None):
         self.book_repo = BookRepository()
-        self.cart_sessions: dict[int, Cart] = {}  # user_id → Cart
+        self.reservations = ReservationRepository()
+        self.hold_ttl = hold_ttl
+        self.carts = cache if cache is not None else CartCache(self.book_repo.load_cart, self.book_repo.save_cart)
+        self.hold_sweeper = HoldSweeper(self.reservations)
 
     def _get_cart(self, user_id: int) -> Cart:
         """
-        Get an existing cart for a user or load one from the DB if present.
+        Get the user's cached cart, loading it from the DB on first use.
         """
-        if user_id not in self.cart_sessions:
-            try:
-                saved_cart = self.book_repo.load_cart(user_id)
-                if saved_cart and not saved_cart.is_empty():
-                    self.cart_sessions[user_id] = saved_cart
-                else:
-                    self.cart_sessions[user_id] = Cart(user_id)
-            except Exception:
-                # fallback to empty cart if DB read fails
-                self.cart_sessions[user_id] = Cart(user_id)
-        return self.cart_sessions[user_id]
+        return self.carts.get(user_id)
+
+    def checkout(self, user_id: int, order_ctrl, details):
+        """
+        Places the order for the user's cart (OrderController.place_order) with the
+        cart's pending edits flushed first and the emptied cart saved after.
+        """
+        cart = self._get_cart(user_id)
+        self.carts.flush(user_id)
+        result = order_ctrl.place_order(user_id, cart, details)
+        if cart.is_empty():
+            self.carts.mark_dirty(cart)
+            self.carts.flush(user_id)
+        return result
+
+    def start_hold_sweeper(self, interval: float = 30.0) -> None:
+        """Releases expired stock holds every `interval` seconds in the background."""
+        self.hold_sweeper.interval = interval
+        self.hold_sweeper.start()
+
+    def close(self) -> None:
+        """Writes every pending cart edit and stops the background flusher and hold sweeper."""
+        self.hold_sweeper.stop()
+        self.carts.close()
 
     def add_to_cart(self, user_id: int, book_id: int, qty: int) -> str:
         try:
@@ -35,12 +60,17 @@ class CartController:
             book = self.book_repo.get_book_by_id(book_id)
             if not book:
                 return "Book not found."
-            if book.stock < qty:
-                return "Not enough stock available."
             cart = self._get_cart(user_id)
+            line = cart.get_item(book_id)
+            held = line.quantity if line is not None else 0
+            short = self.reservations.reserve(user_id, {book_id: held + qty}, self.hold_ttl)
+            if short:
+                return f"Not enough stock available ({max(short[book_id] - held, 0)} more available)."
             cart.add_item(book, qty)
-            self.book_repo.save_cart(user_id, cart)
+            self.carts.mark_dirty(cart)
             return f"Added {qty} × '{book.title}' to cart."
+        except ReservationError:
+            return RETRY_LATER
         except Exception as e:
             return f"Failed to add to cart: {e}"
 
@@ -48,7 +78,8 @@ class CartController:
         try:
             cart = self._get_cart(user_id)
             cart.remove_item(book_id)
-            self.book_repo.save_cart(user_id, cart)
+            self.reservations.release(user_id, [book_id])
+            self.carts.mark_dirty(cart)
             return f"Removed book ID {book_id} from cart."
         except Exception as e:
             return f"Failed to remove item: {e}"
@@ -58,12 +89,111 @@ class CartController:
             if new_qty is None or new_qty <= 0:
                 return "Quantity must be a positive integer."
             cart = self._get_cart(user_id)
+            if book_id in cart:
+                short = self.reservations.reserve(user_id, {book_id: new_qty}, self.hold_ttl)
+                if short:
+                    return f"Not enough stock available (at most {short[book_id]})."
             cart.update_quantity(book_id, new_qty)
-            self.book_repo.save_cart(user_id, cart)
+            self.carts.mark_dirty(cart)
             return f"Updated book ID {book_id} to quantity {new_qty}."
+        except ReservationError:
+            return RETRY_LATER
         except Exception as e:
             return f"Failed to update cart: {e}"
 
+    # --- Batch operations: one stock query, one hold transaction and one save per batch ---
+    @staticmethod
+    def _merge_lines(lines) -> tuple[dict[int, int], dict[int, str]]:
+        """Sums repeated book_ids; returns ({book_id: qty}, {book_id: failure reason})."""
+        merged, failures = {}, {}
+        for book_id, qty in lines:
+            if not isinstance(qty, int) or qty <= 0:
+                failures[book_id] = "Quantity must be a positive integer."
+            elif book_id not in failures:
+                merged[book_id] = merged.get(book_id, 0) + qty
+        for book_id in failures:
+            merged.pop(book_id, None)
+        return merged, failures
+
+    def add_many_to_cart(self, user_id: int, lines) -> tuple[str, dict[int, str]]:
+        """
+        Adds many (book_id, qty) pairs at once: books are fetched with a single query,
+        stock for every line is held in one transaction, the lines are applied together
+        and the cart is saved once.
+        Returns (summary, {book_id: reason}) for the lines that were not added.
+        """
+        try:
+            wanted, failures = self._merge_lines(lines)
+            books = self.book_repo.get_books_by_ids(wanted)
+            cart = self._get_cart(user_id)
+            for book_id in wanted:
+                if book_id not in books:
+                    failures[book_id] = "Book not found."
+            held = {b: (cart.get_item(b).quantity if b in cart else 0) for b in wanted if b in books}
+            try:
+                short = self.reservations.reserve(
+                    user_id, {b: held[b] + wanted[b] for b in held}, self.hold_ttl
+                )
+            except ReservationError:
+                failures.update(dict.fromkeys(held, RETRY_LATER))
+                return f"Added 0 of {len(failures)} line(s) to cart.", failures
+            added = 0
+            for book_id in held:
+                if book_id in short:
+                    failures[book_id] = "Not enough stock available."
+                else:
+                    cart.add_item(books[book_id], wanted[book_id])
+                    added += 1
+            if added:
+                self.carts.mark_dirty(cart)
+            return f"Added {added} of {added + len(failures)} line(s) to cart.", failures
+        except Exception as e:
+            return f"Failed to add to cart: {e}", {}
+
+    def update_many_in_cart(self, user_id: int, updates) -> tuple[str, dict[int, str]]:
+        """Sets quantities for many (book_id, new_qty) pairs; the cart is saved once."""
+        try:
+            cart = self._get_cart(user_id)
+            failures, wanted = {}, {}
+            for book_id, new_qty in updates:
+                if not isinstance(new_qty, int) or new_qty <= 0:
+                    failures[book_id] = "Quantity must be a positive integer."
+                elif book_id not in cart:
+                    failures[book_id] = "Book not in cart."
+                else:
+                    wanted[book_id] = new_qty
+            try:
+                short = self.reservations.reserve(user_id, wanted, self.hold_ttl)
+            except ReservationError:
+                failures.update(dict.fromkeys(wanted, RETRY_LATER))
+                return "Updated 0 line(s).", failures
+            updated = 0
+            for book_id, new_qty in wanted.items():
+                if book_id in short:
+                    failures[book_id] = "Not enough stock available."
+                else:
+                    cart.update_quantity(book_id, new_qty)
+                    updated += 1
+            if updated:
+                self.carts.mark_dirty(cart)
+            return f"Updated {updated} line(s).", failures
+        except Exception as e:
+            return f"Failed to update cart: {e}", {}
+
+    def remove_many_from_cart(self, user_id: int, book_ids) -> str:
+        """Removes many books at once; ids not in the cart are ignored. The cart is saved once."""
+        try:
+            cart = self._get_cart(user_id)
+            removed = [book_id for book_id in book_ids if book_id in cart]
+            for book_id in removed:
+                cart.remove_item(book_id)
+            if removed:
+                self.reservations.release(user_id, removed)
+                self.carts.mark_dirty(cart)
+            return f"Removed {len(removed)} line(s) from cart."
+        except Exception as e:
+            return f"Failed to remove items: {e}"
+
     def view_cart(self, user_id: int) -> str:
         try:
             cart = self._get_cart(user_id)
@@ -83,7 +213,8 @@ class CartController:
         try:
             cart = self._get_cart(user_id)
             cart.clear_cart()
-            self.book_repo.save_cart(user_id, cart)
+            self.reservations.release(user_id)
+            self.carts.mark_dirty(cart)
             return "Cart cleared."
         except Exception as e:
             return f"Failed to clear cart: {e}"
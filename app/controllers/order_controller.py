@@ -108,117 +108,253 @@
 
 # app/controllers/order_controller.py
 from app.repositories.order_repository import OrderRepository
-from app.repositories.book_repository import BookRepository
-from app.models.order import OrderStatus
-from app.models.payment import Payment, PaymentStatus
+from app.repositories.book_repository import BookRepository, InsufficientStockError
+from app.repositories.reservation_repository import ReservationRepository, ReservationError
+from app.models.order import OrderStatus, CheckoutResult
+from app.models.payment import Payment, PaymentStatus, PaymentDetails
+from app.utils.payment_gateway import PaymentGateway, RuleBasedGateway, GatewayError, GatewayTimeout
+from app.utils.payment_processor import PaymentProcessor
+from datetime import datetime, timedelta, timezone
+import threading
+import time
 
 class OrderController:
     """
     Handles checkout and order management logic.
     Maps to: Checkout, ValidatePaymentDetails, ProcessPayment, ViewOrders.
+
+    Checkout first secures the stock and writes a Pending order and payment; only then
+    is the gateway charged, so a customer is never charged for an order that stock
+    rejects. Without a PaymentProcessor the charge runs inline; with one it is handed to
+    the processor's workers and checkout returns at once. Either way the order is
+    confirmed, or cancelled with its stock returned, when the payment settles.
+    Payments whose outcome is unknown (process exit mid-charge, a final gateway
+    timeout, a settlement that kept failing) stay Pending until reconcile_pending()
+    resubmits them under their original idempotency key.
     """
 
-    def __init__(self):
+    def __init__(self, gateway: PaymentGateway | None = None, processor: PaymentProcessor | None = None):
         self.order_repo = OrderRepository()
         self.book_repo = BookRepository()
-
-    def checkout(self, user_id: int, cart) -> str:
+        self.reservations = ReservationRepository()
+        self.processor = processor
+        self.gateway = processor.gateway if processor is not None else (gateway or RuleBasedGateway())
+        self._reconciler: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def close(self) -> None:
+        """Stops the reconciler, lets in-flight payments settle, then stops the payment workers."""
+        self._stop.set()
+        if self._reconciler is not None:
+            self._reconciler.join()
+            self._reconciler = None
+        if self.processor is not None:
+            self.processor.shutdown(wait=True)
+
+    # --- Payment settlement (on a payment worker, or inline in synchronous mode) ---
+    def _settle_payment(self, payment: Payment, lines: dict[int, int]) -> None:
+        if payment.status == PaymentStatus.PENDING:
+            return   # outcome unknown (gateway timed out): never cancel a charge that may have gone through
+        approved = payment.status == PaymentStatus.SUCCESS
+        with self.order_repo.transaction():
+            settled = self.order_repo.settle_order(
+                payment.order_id, payment.payment_id, payment.status,
+                OrderStatus.CONFIRMED if approved else OrderStatus.CANCELLED,
+            )
+            if settled and not approved:   # an order settled twice is restocked once
+                self.book_repo.restock(lines)
+
+    # --- Reconciliation of payments left Pending ---
+    def reconcile_pending(self, older_than: float = 0.0, limit: int = 1000) -> int:
+        """
+        Resubmits Pending payments of orders placed more than `older_than` seconds ago
+        under their original key (order-{id}-payment-{id}): the gateway answers a key it
+        has seen from its record instead of charging again. Run once at startup (nothing
+        is in flight then) and periodically with an age margin. Returns how many were resubmitted.
+        """
+        placed_before = datetime.now(timezone.utc) - timedelta(seconds=older_than)
+        pending = self.order_repo.get_pending_payments(placed_before, limit)
+        for payment, total in pending:
+            lines = {b: q for b, q, _ in self.order_repo.get_order_items(payment.order_id)}
+            details = PaymentDetails(payment.method)   # card/UPI details are never stored
+            if self.processor is not None:
+                self.processor.submit(payment, total, details,
+                                      lambda p, error, lines=lines: self._settle_payment(p, lines))
+                continue
+            try:
+                payment.process_payment(total, self.gateway, details)
+            except GatewayTimeout:
+                continue
+            except GatewayError:
+                payment.status = PaymentStatus.FAILED
+            try:
+                self._settle_payment(payment, lines)
+            except Exception as e:
+                print(f"Failed to settle order {payment.order_id}: {e}")
+        return len(pending)
+
+    def start_reconciler(self, interval: float = 60.0, older_than: float = 120.0) -> None:
+        """Runs reconcile_pending(older_than) every `interval` seconds in the background."""
+        if self._reconciler is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.reconcile_pending(older_than)
+                except Exception as e:
+                    print(f"Payment reconciliation failed: {e}")
+
+        self._reconciler = threading.Thread(target=run, name="payment-reconciler", daemon=True)
+        self._reconciler.start()
+
+    def place_order(self, user_id: int, cart, details: PaymentDetails) -> CheckoutResult:
+        """
+        Headless checkout: no input()/print(), safe to drive from scripts and load tests.
+        Writes the stock deduction and the Pending order and payment in one transaction,
+        then charges, and returns a CheckoutResult with per-phase timings (ms). With a
+        PaymentProcessor the result is "PaymentPending" and the charge completes in the
+        background.
+        """
+        started = time.perf_counter()
+        result = CheckoutResult(CheckoutResult.ERROR, "Checkout failed.")
         try:
             # --- Validate cart ---
             if cart.is_empty():
-                return "Cannot checkout an empty cart."
-
+                result.status, result.message = CheckoutResult.REJECTED, "Cannot checkout an empty cart."
+                return result
             total = cart.calculate_total()
+            result.total = total
             if total <= 0:
-                return "Invalid cart total."
-
-            # --- Create new order ---
-            order_id = self.order_repo.create_order(user_id, total, OrderStatus.PENDING)
-
-            print("\n--- Payment Section ---")
-            print("Available methods: Card / UPI / COD")
-            method = input("Enter payment method: ").strip().upper()  # normalize user input
-
-            # --- Collect payment details ---
-            details = {}
-            if method == "CARD":
-                details["card_number"] = input("Enter card number (16 digits): ").strip()
-                details["cvv"] = input("Enter CVV (3 digits): ").strip()
-
-                # Minimal format validation
-                if len(details["card_number"]) != 16 or not details["card_number"].isdigit():
-                    print("Invalid card number format.")
-                if len(details["cvv"]) != 3 or not details["cvv"].isdigit():
-                    print("Invalid CVV format.")
-
-            elif method == "UPI":
-                details["upi_id"] = input("Enter UPI ID (example@upi): ").strip()
-
-            elif method == "COD":
-                print("Cash on Delivery selected.")
-
-            else:
-                print("Invalid payment method. Defaulting to CARD.")
-                method = "CARD"
-                details["card_number"] = input("Enter card number (16 digits): ").strip()
-                details["cvv"] = input("Enter CVV (3 digits): ").strip()
-
-            # --- Create Payment object ---
-            payment = Payment(None, order_id, method)
-
-            # --- Simulate payment validation ---
-            success = False
+                result.status, result.message = CheckoutResult.REJECTED, "Invalid cart total."
+                return result
+            if not isinstance(details, PaymentDetails):
+                raise TypeError("details must be a PaymentDetails instance")
+            result.method = details.db_method
+            result.warnings = details.format_warnings()
+            lines: dict[int, int] = {}
+            prices: dict[int, float] = {}
+            for item in cart.items:
+                lines[item.book.book_id] = lines.get(item.book.book_id, 0) + int(item.quantity)
+                prices[item.book.book_id] = item.book.price  # the price the total was computed from
+
+            # --- Secure stock, then persist a Pending order and payment as one unit of work ---
+            deferred = self.processor is not None
+            payment = Payment(None, None, details.method)
+            phase = time.perf_counter()
             try:
-                if method == "CARD" and details.get("card_number", "").startswith("4"):
-                    success = True
-                elif method == "UPI" and "@UPI" in details.get("upi_id", "").upper():
-                    success = True
-                elif method == "COD":
-                    success = True
-            except Exception:
-                success = False
-
-            # --- Normalize for DB constraint (critical fix) ---
-            # Database CHECK constraint expects: 'Card', 'UPI', 'COD'
-            db_method_map = {"CARD": "Card", "UPI": "UPI", "COD": "COD"}
-            db_method = db_method_map.get(method.strip().upper(), "Card")  # Default to 'Card'
-
-            # --- Persist payment and update order ---
-            if success:
-                payment.status = PaymentStatus.SUCCESS
-                self.order_repo.add_payment(order_id, db_method, payment.status)
-                self.order_repo.update_order_status(order_id, OrderStatus.CONFIRMED)
-
-                # Deduct stock safely
-                for item in cart.items:
+                with self.order_repo.transaction():
+                    # The buyer's own holds become the sale; other customers' holds stay protected.
+                    self.reservations.release(user_id, lines)
+                    # Conditional set-based deduction against live stock (not the cart's
+                    # snapshot); any short line rejects the whole order before it is written.
+                    self.book_repo.deduct_stock(lines)
+
+                    order_id = self.order_repo.create_order(user_id, total, OrderStatus.PENDING)
+                    self.order_repo.add_order_items(order_id, [(b, q, prices[b]) for b, q in lines.items()])
+                    payment.order_id = order_id
+                    payment.payment_id = self.order_repo.add_payment(order_id, details.db_method, payment.status)
+            except InsufficientStockError as e:
+                short = ", ".join(f"book ID {b} (requested {r}, available {a})"
+                                  for b, (r, a) in e.shortfalls.items())
+                result.status = CheckoutResult.REJECTED
+                result.shortfalls = e.shortfalls
+                result.message = f"Order rejected: not enough stock for {short}."
+                return result
+            finally:
+                result.timings["persist_ms"] = (time.perf_counter() - phase) * 1000
+
+            result.order_id = order_id
+            if not deferred:
+                # --- Charge inline (synchronous mode); the order's key makes a retry safe ---
+                phase = time.perf_counter()
+                try:
+                    payment.process_payment(total, self.gateway, details)
+                except GatewayTimeout:
+                    pass   # the gateway may have charged: stays Pending, never cancelled blind
+                except GatewayError:
+                    payment.status = PaymentStatus.FAILED
+                result.timings["payment_ms"] = (time.perf_counter() - phase) * 1000
+                try:
+                    self._settle_payment(payment, lines)
+                except Exception as e:
+                    result.warnings.append(f"Could not settle order #{order_id} ({e}); "
+                                           "it stays Pending until reconciliation.")
+                    payment.status = PaymentStatus.PENDING
+                if payment.status == PaymentStatus.FAILED:
+                    # the cart keeps its lines, so hold their stock again for a retry (best effort)
                     try:
-                        new_stock = max(int(item.book.stock) - int(item.quantity), 0)
-                        self.book_repo.update_book(item.book.book_id, new_stock)
-                    except Exception:
-                        pass
-
+                        self.reservations.reserve(user_id, lines)
+                    except ReservationError as e:
+                        result.warnings.append(f"Could not hold the cart's stock for a retry: {e}")
+            result.payment_status = payment.status
+            if deferred:
+                # only after commit, so the worker always finds the rows it settles
+                phase = time.perf_counter()
+                result.future = self.processor.submit(
+                    payment, total, details, lambda p, error: self._settle_payment(p, lines)
+                )
+                result.timings["submit_ms"] = (time.perf_counter() - phase) * 1000
                 cart.clear_cart()
-                print(f"\nPayment successful using {db_method}. Order #{order_id} confirmed!")
-
+                result.status = CheckoutResult.PENDING
+                result.message = f"Order #{order_id} placed. Payment via {details.db_method} is being processed."
+            elif payment.status == PaymentStatus.SUCCESS:
+                cart.clear_cart()
+                result.status = CheckoutResult.CONFIRMED
+                result.message = f"Payment successful using {details.db_method}. Order #{order_id} confirmed!"
+            elif payment.status == PaymentStatus.PENDING:
+                cart.clear_cart()
+                result.status = CheckoutResult.PENDING
+                result.message = (f"Order #{order_id} placed. The {details.db_method} payment is not "
+                                  f"confirmed yet; the order updates once the gateway answers.")
             else:
-                payment.status = PaymentStatus.FAILED
-                self.order_repo.add_payment(order_id, db_method, payment.status)
-                print(f"\nPayment failed using {db_method}. Order #{order_id} not confirmed.")
-
-            return f"Payment Status: {payment.status}"
+                result.status = CheckoutResult.PAYMENT_FAILED
+                result.message = f"Payment failed using {details.db_method}. Order #{order_id} not confirmed."
+            return result
 
         except Exception as e:
             # Generic safe fallback for any unforeseen issue
-            return f"Checkout failed: {e}"
-
-    def view_orders(self, user_id: int):
+            result.status, result.message = CheckoutResult.ERROR, f"Checkout failed: {e}"
+            return result
+        finally:
+            result.timings["total_ms"] = (time.perf_counter() - started) * 1000
+
+    def checkout(self, user_id: int, cart, details: PaymentDetails) -> str:
+        """String-returning wrapper over place_order, in the style of the other controllers."""
+        result = self.place_order(user_id, cart, details)
+        if result.payment_status is None:
+            return result.message
+        return f"{result.message}\nPayment Status: {result.payment_status}"
+
+    def view_orders_page(self, user_id: int, page_size: int = 20, status: str | None = None,
+                         date_from=None, date_to=None, before_date=None,
+                         before_id: int | None = None) -> tuple[str, dict | None]:
+        """
+        Renders one page of order history, newest first (optionally filtered by status / date range).
+        Returns (text, cursor); pass **cursor back in to get the next page. cursor is None at the end.
+        """
         try:
-            orders = self.order_repo.get_orders_by_user(user_id)
+            if status is not None and status not in OrderStatus.allowed():
+                return f"Unknown order status: {status}", None
+            orders = self.order_repo.get_orders_page(user_id, page_size, status, date_from, date_to,
+                                                     before_date, before_id)
             if not orders:
-                return "No orders found."
-            lines = ["\nOrder History:"]
+                return ("No orders found." if before_id is None else "End of order history."), None
+            lines = ["\nOrder History:"] if before_id is None else []
             for order in orders:
-                lines.append(f"Order #{order.order_id} — ₹{order.total_amount} — {order.status}")
-            return "\n".join(lines)
+                lines.append(f"Order #{order.order_id} — {order.order_date:%Y-%m-%d %H:%M} UTC — "
+                             f"₹{order.total_amount} — {order.status}")
+            cursor = None
+            if len(orders) == page_size:
+                last = orders[-1]
+                cursor = {"user_id": user_id, "page_size": page_size, "status": status,
+                          "date_from": date_from, "date_to": date_to,
+                          "before_date": last.order_date, "before_id": last.order_id}
+            return "\n".join(lines), cursor
         except Exception as e:
-            return f"Failed to fetch orders: {e}"
+            return f"Failed to fetch orders: {e}", None
+
+    def view_orders(self, user_id: int):
+        """Most recent page of the order history (see view_orders_page for the rest)."""
+        return self.view_orders_page(user_id)[0]
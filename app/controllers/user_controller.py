@@ -1,16 +1,20 @@
 # app/controllers/user_controller.py
 from app.repositories.user_repository import UserRepository
 from app.models.user import Customer, Admin, User
+from app.utils.session_manager import SessionStore
 import re
 
 class UserController:
     """
     Handles registration, login, logout.
     Maps to: SignUp, Login, Logout, ClearSession use cases.
+    login()/logout() track a single current_user (console); login_session() and
+    the token methods serve any number of concurrent users through `sessions`.
     """
 
-    def __init__(self):
+    def __init__(self, sessions: SessionStore | None = None):
         self.user_repo = UserRepository()
+        self.sessions = sessions if sessions is not None else SessionStore()
         self.current_user: User | None = None
 
     def _valid_email(self, email: str) -> bool:
@@ -34,13 +38,10 @@ class UserController:
                 role = "customer"
 
             # Restrict admin creation
-            if role == "admin":
-                existing_admins = [u for u in self.user_repo.get_all_users() if u["role"] == "admin"]
-                if len(existing_admins) >= 2:
-                    return "Admin limit reached (only 2 admins allowed)."
+            if role == "admin" and self.user_repo.count_by_role("admin") >= 2:
+                return "Admin limit reached (only 2 admins allowed)."
 
-            existing = self.user_repo.get_user_by_email(email)
-            if existing:
+            if self.user_repo.email_exists(email):
                 return f"Email {email} already registered."
 
             user_id = self.user_repo.add_user(name, email, password, role, address or "")
@@ -48,22 +49,54 @@ class UserController:
         except Exception as e:
             return f"Registration failed: {e}"
 
+    def _authenticate(self, email: str, password: str) -> tuple[User | None, str]:
+        email = (email or "").strip()
+        password = (password or "").strip()
+        if not self._valid_email(email):
+            return None, "Invalid email format."
+        user = self.user_repo.get_user_by_email(email)
+        if user is None:
+            return None, "User not found."
+        if user.login(password):
+            self._upgrade_hash(user, password)
+            return user, f"{user.name} logged in successfully as {user.role}."
+        return None, "Incorrect password."
+
     def login(self, email: str, password: str) -> str:
         try:
-            email = (email or "").strip()
-            password = (password or "").strip()
-            if not self._valid_email(email):
-                return "Invalid email format."
-            user = self.user_repo.get_user_by_email(email)
-            if user is None:
-                return "User not found."
-            if user.login(password):
+            user, msg = self._authenticate(email, password)
+            if user is not None:
                 self.current_user = user
-                return f"{user.name} logged in successfully as {user.role}."
-            return "Incorrect password."
+            return msg
         except Exception as e:
             return f"Login failed: {e}"
 
+    def login_session(self, email: str, password: str) -> tuple[str, str | None]:
+        """Returns (message, session token); the token is None when login fails."""
+        try:
+            user, msg = self._authenticate(email, password)
+            return msg, (self.sessions.create(user) if user is not None else None)
+        except Exception as e:
+            return f"Login failed: {e}", None
+
+    def get_session_user(self, token: str | None) -> User | None:
+        return self.sessions.get(token)
+
+    def logout_session(self, token: str | None) -> str:
+        try:
+            return "Logged out." if self.sessions.revoke(token) else "No active session."
+        except Exception as e:
+            return f"Logout failed: {e}"
+
+    def _upgrade_hash(self, user: User, password: str) -> None:
+        """Re-hashes plain-text or outdated-cost hashes with the current hasher after a good login."""
+        hasher = self.user_repo.password_hasher()
+        if not hasher.needs_rehash(user.password_hash):
+            return
+        new_hash = hasher.hash(password)
+        if self.user_repo.update_password_hash(user.user_id, new_hash, old_hash=user.password_hash):
+            user.set_password_hash(new_hash)
+
     def logout(self) -> str:
         try:
             if not self.current_user:
@@ -0,0 +1,488 @@
+# app/db/migrations.py
+"""
+Versioned schema migrations keyed on PRAGMA user_version.
+
+Each migration runs once, in order, inside its own transaction, and bumps
+user_version when it commits. Startup on an up-to-date database costs a
+single PRAGMA read. app/db/schema.sql mirrors the schema after the latest
+migration.
+"""
+import re
+import sqlite3
+
+# --- Baseline table definitions (v1/v2; later migrations evolve them) ---
+TABLES = {
+    "users": """
+    CREATE TABLE users (
+        user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        role TEXT CHECK(role IN ('admin', 'customer')) NOT NULL,
+        address TEXT
+    )""",
+    "books": """
+    CREATE TABLE books (
+        book_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        author TEXT NOT NULL,
+        price REAL NOT NULL CHECK(price >= 0),
+        stock INTEGER NOT NULL CHECK(stock >= 0)
+    )""",
+    "orders": """
+    CREATE TABLE orders (
+        order_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        total_amount REAL NOT NULL CHECK(total_amount >= 0),
+        status TEXT CHECK(status IN ('Pending', 'Confirmed', 'Cancelled')) NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users(user_id)
+    )""",
+    "payments": """
+    CREATE TABLE payments (
+        payment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_id INTEGER NOT NULL,
+        method TEXT CHECK(method IN ('Card', 'UPI', 'COD')) NOT NULL,
+        status TEXT CHECK(status IN ('Pending', 'Success', 'Failed')) NOT NULL,
+        FOREIGN KEY (order_id) REFERENCES orders(order_id)
+    )""",
+    "cart_items": """
+    CREATE TABLE cart_items (
+        cart_item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        book_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL CHECK(quantity > 0),
+        FOREIGN KEY (user_id) REFERENCES users(user_id),
+        FOREIGN KEY (book_id) REFERENCES books(book_id),
+        UNIQUE (user_id, book_id)
+    )""",
+    "import_checkpoints": """
+    CREATE TABLE import_checkpoints (
+        source TEXT PRIMARY KEY,
+        line_no INTEGER NOT NULL
+    )""",
+}
+
+# orders as of v5: creation time stored as UTC text ('YYYY-MM-DD HH:MM:SS.SSS'), sortable as a string.
+ORDERS_V5 = """
+    CREATE TABLE orders (
+        order_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        total_amount REAL NOT NULL CHECK(total_amount >= 0),
+        status TEXT CHECK(status IN ('Pending', 'Confirmed', 'Cancelled')) NOT NULL,
+        order_date TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+        FOREIGN KEY (user_id) REFERENCES users(user_id)
+    )"""
+
+# Copies legacy rows into the canonical tables, coercing values the new CHECKs would reject.
+RECONCILE_COPY = {
+    "users": """
+        INSERT INTO users (user_id, name, email, password, role, address)
+        SELECT user_id, COALESCE(name, ''), email, COALESCE(password, ''),
+               CASE WHEN role IN ('admin', 'customer') THEN role ELSE 'customer' END, address
+        FROM {old} WHERE email IS NOT NULL""",
+    "books": """
+        INSERT INTO books (book_id, title, author, price, stock)
+        SELECT book_id, COALESCE(title, ''), COALESCE(author, ''),
+               MAX(COALESCE(price, 0), 0), MAX(COALESCE(stock, 0), 0)
+        FROM {old}""",
+    "orders": """
+        INSERT INTO orders (order_id, user_id, total_amount, status)
+        SELECT order_id, user_id, MAX(COALESCE(total_amount, 0), 0),
+               CASE WHEN status IN ('Pending', 'Confirmed', 'Cancelled') THEN status ELSE 'Pending' END
+        FROM {old} WHERE user_id IS NOT NULL""",
+    "payments": """
+        INSERT INTO payments (payment_id, order_id, method, status)
+        SELECT payment_id, order_id,
+               CASE WHEN method IN ('Card', 'UPI', 'COD') THEN method ELSE 'Card' END,
+               CASE WHEN status IN ('Pending', 'Success', 'Failed') THEN status ELSE 'Pending' END
+        FROM {old} WHERE order_id IS NOT NULL""",
+    "cart_items": """
+        INSERT INTO cart_items (cart_item_id, user_id, book_id, quantity)
+        SELECT MIN(cart_item_id), user_id, book_id, SUM(quantity)
+        FROM {old} WHERE user_id IS NOT NULL AND book_id IS NOT NULL
+        GROUP BY user_id, book_id HAVING SUM(quantity) > 0""",
+}
+
+
+def _normalize(sql: str | None) -> str:
+    sql = re.sub(r"\s+", " ", (sql or "")).strip().rstrip(";").lower()
+    return re.sub(r"\s*([(),])\s*", r"\1", sql.replace("if not exists ", ""))
+
+
+def _table_sql(conn: sqlite3.Connection, name: str) -> str | None:
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+# --- Migrations ---
+def _v1_baseline(conn: sqlite3.Connection) -> None:
+    """Creates any missing table with its canonical definition."""
+    for name, ddl in TABLES.items():
+        conn.execute(ddl.replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1))
+
+
+def _v2_reconcile(conn: sqlite3.Connection) -> None:
+    """
+    Rebuilds tables created by older code paths (per-repository create_table,
+    create_tables.py's TEXT3 typo, schema.sql without CHECKs) to the canonical definition.
+    """
+    # don't let RENAME rewrite other tables' REFERENCES to point at the legacy copy
+    conn.execute("PRAGMA legacy_alter_table = ON")
+    try:
+        for name in RECONCILE_COPY:
+            current = _table_sql(conn, name)
+            if _normalize(current) == _normalize(TABLES[name]):
+                continue
+            seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (name,)).fetchone()
+            old = f"{name}__legacy"
+            conn.execute(f"ALTER TABLE {name} RENAME TO {old}")
+            conn.execute(TABLES[name])
+            conn.execute(RECONCILE_COPY[name].format(old=old))
+            conn.execute(f"DROP TABLE {old}")
+            if seq is not None:
+                # keep AUTOINCREMENT from reusing ids of rows deleted before the rebuild
+                conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", (name,))
+                conn.execute(
+                    "INSERT INTO sqlite_sequence (name, seq) "
+                    "VALUES (?, MAX(?, (SELECT COALESCE(MAX(rowid), 0) FROM " + name + ")))",
+                    (name, seq[0]),
+                )
+    finally:
+        conn.execute("PRAGMA legacy_alter_table = OFF")
+
+
+def _v3_indexes(conn: sqlite3.Connection) -> None:
+    """Secondary indexes for the hot lookups (cart_items is covered by its UNIQUE(user_id, book_id))."""
+    conn.execute("DROP INDEX IF EXISTS idx_cart_items_user_book")  # superseded by the table constraint
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_user ON orders (user_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_payments_order ON payments (order_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_books_title ON books (title)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_books_author ON books (author)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_books_price ON books (price)")
+
+
+def _v4_search(conn: sqlite3.Connection) -> None:
+    """FTS5 index over books(title, author), kept in sync by triggers."""
+    conn.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+        title, author,
+        content='books', content_rowid='book_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""")
+    for trigger in ("books_fts_ai", "books_fts_ad", "books_fts_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")  # table rebuilds in v2 may have dropped them
+    conn.execute("""
+    CREATE TRIGGER books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts (rowid, title, author)
+        VALUES (new.book_id, new.title, new.author);
+    END""")
+    conn.execute("""
+    CREATE TRIGGER books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts (books_fts, rowid, title, author)
+        VALUES ('delete', old.book_id, old.title, old.author);
+    END""")
+    conn.execute("""
+    CREATE TRIGGER books_fts_au AFTER UPDATE OF title, author ON books BEGIN
+        INSERT INTO books_fts (books_fts, rowid, title, author)
+        VALUES ('delete', old.book_id, old.title, old.author);
+        INSERT INTO books_fts (rowid, title, author)
+        VALUES (new.book_id, new.title, new.author);
+    END""")
+    conn.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+
+
+def _v5_order_dates(conn: sqlite3.Connection) -> None:
+    """
+    Adds orders.order_date (rebuild: ALTER TABLE cannot add a column with a
+    time-based default) and the (user_id, order_date) index for paged history.
+    Orders placed before this migration never recorded a time; they are
+    backfilled with the migration time, and order_id keeps their relative order.
+    """
+    if "order_date" not in {r[1] for r in conn.execute("PRAGMA table_info(orders)")}:
+        conn.execute("PRAGMA legacy_alter_table = ON")  # keep payments' REFERENCES orders(...) intact
+        try:
+            seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'orders'").fetchone()
+            conn.execute("ALTER TABLE orders RENAME TO orders__v4")
+            conn.execute(ORDERS_V5)
+            conn.execute(
+                "INSERT INTO orders (order_id, user_id, total_amount, status, order_date) "
+                "SELECT order_id, user_id, total_amount, status, strftime('%Y-%m-%d %H:%M:%f', 'now') "
+                "FROM orders__v4"
+            )
+            conn.execute("DROP TABLE orders__v4")
+            if seq is not None:
+                conn.execute("DELETE FROM sqlite_sequence WHERE name = 'orders'")
+                conn.execute(
+                    "INSERT INTO sqlite_sequence (name, seq) "
+                    "VALUES ('orders', MAX(?, (SELECT COALESCE(MAX(rowid), 0) FROM orders)))",
+                    (seq[0],),
+                )
+        finally:
+            conn.execute("PRAGMA legacy_alter_table = OFF")
+    # order_id is the rowid, so this index also serves ORDER BY order_date, order_id
+    conn.execute("DROP INDEX IF EXISTS idx_orders_user")  # prefix of the composite index
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_user_date ON orders (user_id, order_date)")
+
+
+def _v6_order_items(conn: sqlite3.Connection) -> None:
+    """
+    Line items per order, clustered by order (WITHOUT ROWID, so an order's lines
+    sit together with their quantity and price), plus the indexes sales analytics reads:
+    per-book lookups, and confirmed orders by date covering total_amount.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS order_items (
+        order_id INTEGER NOT NULL,
+        book_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL CHECK(quantity > 0),
+        unit_price REAL NOT NULL CHECK(unit_price >= 0),
+        PRIMARY KEY (order_id, book_id),
+        FOREIGN KEY (order_id) REFERENCES orders(order_id),
+        FOREIGN KEY (book_id) REFERENCES books(book_id)
+    ) WITHOUT ROWID""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_order_items_book ON order_items (book_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_status_date ON orders (status, order_date, total_amount)")
+
+
+# --- Dashboard summary tables (v7): maintained by triggers, rebuildable from scratch ---
+SUMMARY_TABLES = {
+    "sales_daily": """
+    CREATE TABLE IF NOT EXISTS sales_daily (
+        day TEXT PRIMARY KEY,
+        orders INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0
+    ) WITHOUT ROWID""",
+    "order_status_totals": """
+    CREATE TABLE IF NOT EXISTS order_status_totals (
+        status TEXT PRIMARY KEY,
+        orders INTEGER NOT NULL DEFAULT 0,
+        amount REAL NOT NULL DEFAULT 0
+    ) WITHOUT ROWID""",
+    "payment_status_totals": """
+    CREATE TABLE IF NOT EXISTS payment_status_totals (
+        method TEXT NOT NULL,
+        status TEXT NOT NULL,
+        payments INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (method, status)
+    ) WITHOUT ROWID""",
+    "book_sales": """
+    CREATE TABLE IF NOT EXISTS book_sales (
+        book_id INTEGER PRIMARY KEY,
+        units INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0
+    )""",
+    "user_spend": """
+    CREATE TABLE IF NOT EXISTS user_spend (
+        user_id INTEGER PRIMARY KEY,
+        orders INTEGER NOT NULL DEFAULT 0,
+        spend REAL NOT NULL DEFAULT 0
+    )""",
+}
+
+# Recomputes every summary table from orders / order_items / payments (only Confirmed orders are sales).
+SUMMARY_REBUILD = [
+    "DELETE FROM sales_daily",
+    "DELETE FROM order_status_totals",
+    "DELETE FROM payment_status_totals",
+    "DELETE FROM book_sales",
+    "DELETE FROM user_spend",
+    """INSERT INTO sales_daily (day, orders, revenue)
+       SELECT substr(order_date, 1, 10), COUNT(*), SUM(total_amount)
+       FROM orders WHERE status = 'Confirmed' GROUP BY 1""",
+    """INSERT INTO order_status_totals (status, orders, amount)
+       SELECT status, COUNT(*), SUM(total_amount) FROM orders GROUP BY status""",
+    """INSERT INTO payment_status_totals (method, status, payments)
+       SELECT method, status, COUNT(*) FROM payments GROUP BY method, status""",
+    """INSERT INTO book_sales (book_id, units, revenue)
+       SELECT oi.book_id, SUM(oi.quantity), SUM(oi.quantity * oi.unit_price)
+       FROM orders o CROSS JOIN order_items oi ON oi.order_id = o.order_id
+       WHERE o.status = 'Confirmed' GROUP BY oi.book_id""",
+    """INSERT INTO user_spend (user_id, orders, spend)
+       SELECT user_id, COUNT(*), SUM(total_amount) FROM orders WHERE status = 'Confirmed' GROUP BY user_id""",
+]
+
+# Trigger bodies use these to add (sign 1) or remove (sign -1) one order's contribution.
+_ORDER_SALES = """
+        INSERT INTO sales_daily (day, orders, revenue) VALUES (substr({r}.order_date, 1, 10), {sign}, {sign} * {r}.total_amount)
+            ON CONFLICT (day) DO UPDATE SET orders = orders + excluded.orders, revenue = revenue + excluded.revenue;
+        INSERT INTO user_spend (user_id, orders, spend) VALUES ({r}.user_id, {sign}, {sign} * {r}.total_amount)
+            ON CONFLICT (user_id) DO UPDATE SET orders = orders + excluded.orders, spend = spend + excluded.spend;
+        INSERT INTO book_sales (book_id, units, revenue)
+            SELECT book_id, {sign} * quantity, {sign} * quantity * unit_price FROM order_items WHERE order_id = {r}.order_id
+            ON CONFLICT (book_id) DO UPDATE SET units = units + excluded.units, revenue = revenue + excluded.revenue;"""
+_ORDER_STATUS = """
+        INSERT INTO order_status_totals (status, orders, amount) VALUES ({r}.status, {sign}, {sign} * {r}.total_amount)
+            ON CONFLICT (status) DO UPDATE SET orders = orders + excluded.orders, amount = amount + excluded.amount;"""
+_LINE_SALES = """
+        INSERT INTO book_sales (book_id, units, revenue) VALUES ({r}.book_id, {sign} * {r}.quantity, {sign} * {r}.quantity * {r}.unit_price)
+            ON CONFLICT (book_id) DO UPDATE SET units = units + excluded.units, revenue = revenue + excluded.revenue;"""
+_PAYMENT_STATUS = """
+        INSERT INTO payment_status_totals (method, status, payments) VALUES ({r}.method, {r}.status, {sign})
+            ON CONFLICT (method, status) DO UPDATE SET payments = payments + excluded.payments;"""
+
+SUMMARY_TRIGGERS = {
+    "orders_summary_ai": "AFTER INSERT ON orders BEGIN" + _ORDER_STATUS.format(r="new", sign=1),
+    "orders_summary_ai_sales": "AFTER INSERT ON orders WHEN new.status = 'Confirmed' BEGIN"
+        + _ORDER_SALES.format(r="new", sign=1),
+    "orders_summary_au": "AFTER UPDATE OF status, total_amount, user_id, order_date ON orders BEGIN"
+        + _ORDER_STATUS.format(r="old", sign=-1) + _ORDER_STATUS.format(r="new", sign=1),
+    "orders_summary_au_old": "AFTER UPDATE OF status, total_amount, user_id, order_date ON orders "
+        "WHEN old.status = 'Confirmed' BEGIN" + _ORDER_SALES.format(r="old", sign=-1),
+    "orders_summary_au_new": "AFTER UPDATE OF status, total_amount, user_id, order_date ON orders "
+        "WHEN new.status = 'Confirmed' BEGIN" + _ORDER_SALES.format(r="new", sign=1),
+    "orders_summary_ad": "AFTER DELETE ON orders BEGIN" + _ORDER_STATUS.format(r="old", sign=-1),
+    "orders_summary_ad_sales": "AFTER DELETE ON orders WHEN old.status = 'Confirmed' BEGIN"
+        + _ORDER_SALES.format(r="old", sign=-1),
+    "order_items_summary_ai": "AFTER INSERT ON order_items "
+        "WHEN (SELECT status FROM orders WHERE order_id = new.order_id) = 'Confirmed' BEGIN"
+        + _LINE_SALES.format(r="new", sign=1),
+    "order_items_summary_ad": "AFTER DELETE ON order_items "
+        "WHEN (SELECT status FROM orders WHERE order_id = old.order_id) = 'Confirmed' BEGIN"
+        + _LINE_SALES.format(r="old", sign=-1),
+    "order_items_summary_au": "AFTER UPDATE ON order_items "
+        "WHEN (SELECT status FROM orders WHERE order_id = new.order_id) = 'Confirmed' BEGIN"
+        + _LINE_SALES.format(r="old", sign=-1) + _LINE_SALES.format(r="new", sign=1),
+    "payments_summary_ai": "AFTER INSERT ON payments BEGIN" + _PAYMENT_STATUS.format(r="new", sign=1),
+    "payments_summary_au": "AFTER UPDATE OF method, status ON payments BEGIN"
+        + _PAYMENT_STATUS.format(r="old", sign=-1) + _PAYMENT_STATUS.format(r="new", sign=1),
+    "payments_summary_ad": "AFTER DELETE ON payments BEGIN" + _PAYMENT_STATUS.format(r="old", sign=-1),
+}
+
+
+def rebuild_summaries(conn: sqlite3.Connection) -> None:
+    """Recomputes the dashboard summary tables (run inside the caller's transaction)."""
+    for sql in SUMMARY_REBUILD:
+        conn.execute(sql)
+
+
+def _v7_summaries(conn: sqlite3.Connection) -> None:
+    """Dashboard summary tables, kept current by triggers on orders, order_items and payments."""
+    for ddl in SUMMARY_TABLES.values():
+        conn.execute(ddl)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_book_sales_units ON book_sales (units)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_user_spend_spend ON user_spend (spend)")
+    for name, body in SUMMARY_TRIGGERS.items():
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        conn.execute(f"CREATE TRIGGER {name} {body}\n    END")
+    rebuild_summaries(conn)
+
+
+def _v8_low_stock(conn: sqlite3.Connection) -> None:
+    """
+    Per-book reorder thresholds. The partial index holds only books whose stock is
+    below their threshold, so the low-stock report reads just those rows and
+    writes to well-stocked books never touch it. A trigger records each
+    downward threshold crossing in the stock_alerts outbox, whatever code path
+    changed the stock; the application drains it after commit.
+    """
+    if "reorder_threshold" not in {r[1] for r in conn.execute("PRAGMA table_info(books)")}:
+        conn.execute("ALTER TABLE books ADD COLUMN reorder_threshold INTEGER NOT NULL DEFAULT 5 "
+                     "CHECK(reorder_threshold >= 0)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_books_low_stock ON books (stock) WHERE stock < reorder_threshold")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS stock_alerts (
+        alert_id INTEGER PRIMARY KEY,
+        book_id INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        stock INTEGER NOT NULL,
+        threshold INTEGER NOT NULL
+    )""")
+    conn.execute("DROP TRIGGER IF EXISTS books_low_stock_au")
+    conn.execute("""
+    CREATE TRIGGER books_low_stock_au AFTER UPDATE OF stock, reorder_threshold ON books
+    WHEN new.stock < new.reorder_threshold AND old.stock >= old.reorder_threshold BEGIN
+        INSERT INTO stock_alerts (book_id, title, stock, threshold)
+        VALUES (new.book_id, new.title, new.stock, new.reorder_threshold);
+    END""")
+
+
+def _v9_user_role_index(conn: sqlite3.Connection) -> None:
+    """Role index so per-role counts and listings read the index, not the users table."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_users_role ON users (role)")
+
+
+def _v10_sessions(conn: sqlite3.Connection) -> None:
+    """
+    Persisted login sessions. Only a SHA-256 of each token is stored, so a copy of
+    the database cannot be replayed as live sessions; the expiry index lets the
+    sweeper delete expired rows without scanning the table.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS sessions (
+        token_hash TEXT PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        expires_at REAL NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users(user_id)
+    ) WITHOUT ROWID""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expiry ON sessions (expires_at)")
+
+
+def _v11_stock_holds(conn: sqlite3.Connection) -> None:
+    """
+    Time-limited stock reservations. books.reserved is the sum of the book's
+    holds, so available stock (stock - reserved) is a single row read; the
+    expiry index lets the sweeper find expired holds without a scan.
+    """
+    if "reserved" not in {r[1] for r in conn.execute("PRAGMA table_info(books)")}:
+        conn.execute("ALTER TABLE books ADD COLUMN reserved INTEGER NOT NULL DEFAULT 0 CHECK(reserved >= 0)")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS stock_holds (
+        user_id INTEGER NOT NULL,
+        book_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL CHECK(quantity > 0),
+        expires_at REAL NOT NULL,
+        PRIMARY KEY (user_id, book_id),
+        FOREIGN KEY (user_id) REFERENCES users(user_id),
+        FOREIGN KEY (book_id) REFERENCES books(book_id)
+    ) WITHOUT ROWID""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_stock_holds_expiry ON stock_holds (expires_at, quantity)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_stock_holds_book ON stock_holds (book_id, expires_at)")
+
+
+# (version, description, function) — append only; never edit a shipped migration.
+MIGRATIONS = [
+    (1, "baseline schema", _v1_baseline),
+    (2, "reconcile legacy table definitions", _v2_reconcile),
+    (3, "secondary indexes on hot lookup columns", _v3_indexes),
+    (4, "full-text search over books", _v4_search),
+    (5, "order timestamps and (user_id, order_date) index", _v5_order_dates),
+    (6, "order line items and sales indexes", _v6_order_items),
+    (7, "dashboard summary tables", _v7_summaries),
+    (8, "reorder thresholds and low-stock alerts", _v8_low_stock),
+    (9, "users role index", _v9_user_role_index),
+    (10, "persisted login sessions", _v10_sessions),
+    (11, "stock reservations", _v11_stock_holds),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, target: int = LATEST_VERSION) -> int:
+    """
+    Applies every pending migration up to `target` and returns the resulting version.
+    Safe to call on every startup and from several processes: each step re-checks
+    user_version under the write lock before running.
+    """
+    if current_version(conn) >= target:
+        return current_version(conn)
+    if conn.in_transaction:
+        conn.commit()
+    for version, description, step in MIGRATIONS:
+        if version > target:
+            break
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if current_version(conn) >= version:
+                conn.rollback()
+                continue
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise sqlite3.DatabaseError(f"Migration {version} ({description}) failed: {e}") from e
+    return current_version(conn)
@@ -1,11 +1,5 @@
-CREATE TABLE IF NOT EXISTS cart_items (
-    cart_item_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id INTEGER,
-    book_id INTEGER,
-    quantity INTEGER,
-    FOREIGN KEY(user_id) REFERENCES users(user_id),
-    FOREIGN KEY(book_id) REFERENCES books(book_id)
-);
+-- Schema after the latest migration in app/db/migrations.py (reference only;
+-- the application creates and upgrades the database through the migrations).
 
 CREATE TABLE IF NOT EXISTS users (
         user_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -21,7 +15,9 @@ CREATE TABLE IF NOT EXISTS books (
         title TEXT NOT NULL,
         author TEXT NOT NULL,
         price REAL NOT NULL CHECK(price >= 0),
-        stock INTEGER NOT NULL CHECK(stock >= 0)
+        stock INTEGER NOT NULL CHECK(stock >= 0),
+        reorder_threshold INTEGER NOT NULL DEFAULT 5 CHECK(reorder_threshold >= 0),
+        reserved INTEGER NOT NULL DEFAULT 0 CHECK(reserved >= 0)
     );
 
 CREATE TABLE IF NOT EXISTS orders (
@@ -29,6 +25,7 @@ CREATE TABLE IF NOT EXISTS orders (
         user_id INTEGER NOT NULL,
         total_amount REAL NOT NULL CHECK(total_amount >= 0),
         status TEXT CHECK(status IN ('Pending', 'Confirmed', 'Cancelled')) NOT NULL,
+        order_date TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
         FOREIGN KEY (user_id) REFERENCES users(user_id)
     );
 
@@ -39,3 +36,112 @@ CREATE TABLE IF NOT EXISTS payments (
         status TEXT CHECK(status IN ('Pending', 'Success', 'Failed')) NOT NULL,
         FOREIGN KEY (order_id) REFERENCES orders(order_id)
     );
+
+CREATE TABLE IF NOT EXISTS cart_items (
+        cart_item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        book_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL CHECK(quantity > 0),
+        FOREIGN KEY (user_id) REFERENCES users(user_id),
+        FOREIGN KEY (book_id) REFERENCES books(book_id),
+        UNIQUE (user_id, book_id)
+    );
+
+CREATE TABLE IF NOT EXISTS order_items (
+        order_id INTEGER NOT NULL,
+        book_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL CHECK(quantity > 0),
+        unit_price REAL NOT NULL CHECK(unit_price >= 0),
+        PRIMARY KEY (order_id, book_id),
+        FOREIGN KEY (order_id) REFERENCES orders(order_id),
+        FOREIGN KEY (book_id) REFERENCES books(book_id)
+    ) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS import_checkpoints (
+        source TEXT PRIMARY KEY,
+        line_no INTEGER NOT NULL
+    );
+
+-- Downward crossings of books.reorder_threshold, written by the books_low_stock_au
+-- trigger (migration 8) and drained by BookRepository after commit.
+CREATE TABLE IF NOT EXISTS stock_alerts (
+        alert_id INTEGER PRIMARY KEY,
+        book_id INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        stock INTEGER NOT NULL,
+        threshold INTEGER NOT NULL
+    );
+
+-- Dashboard summaries (migration 7), maintained by the *_summary_* triggers on
+-- orders, order_items and payments; rebuild with rebuild_summaries.py.
+CREATE TABLE IF NOT EXISTS sales_daily (
+        day TEXT PRIMARY KEY,
+        orders INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0
+    ) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS order_status_totals (
+        status TEXT PRIMARY KEY,
+        orders INTEGER NOT NULL DEFAULT 0,
+        amount REAL NOT NULL DEFAULT 0
+    ) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS payment_status_totals (
+        method TEXT NOT NULL,
+        status TEXT NOT NULL,
+        payments INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (method, status)
+    ) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS book_sales (
+        book_id INTEGER PRIMARY KEY,
+        units INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0
+    );
+
+CREATE TABLE IF NOT EXISTS user_spend (
+        user_id INTEGER PRIMARY KEY,
+        orders INTEGER NOT NULL DEFAULT 0,
+        spend REAL NOT NULL DEFAULT 0
+    );
+
+CREATE TABLE IF NOT EXISTS sessions (
+        token_hash TEXT PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        expires_at REAL NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users(user_id)
+    ) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS stock_holds (
+        user_id INTEGER NOT NULL,
+        book_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL CHECK(quantity > 0),
+        expires_at REAL NOT NULL,
+        PRIMARY KEY (user_id, book_id),
+        FOREIGN KEY (user_id) REFERENCES users(user_id),
+        FOREIGN KEY (book_id) REFERENCES books(book_id)
+    ) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_orders_user_date ON orders (user_id, order_date);
+CREATE INDEX IF NOT EXISTS idx_orders_status_date ON orders (status, order_date, total_amount);
+CREATE INDEX IF NOT EXISTS idx_order_items_book ON order_items (book_id);
+CREATE INDEX IF NOT EXISTS idx_payments_order ON payments (order_id);
+CREATE INDEX IF NOT EXISTS idx_book_sales_units ON book_sales (units);
+CREATE INDEX IF NOT EXISTS idx_user_spend_spend ON user_spend (spend);
+CREATE INDEX IF NOT EXISTS idx_books_title ON books (title);
+CREATE INDEX IF NOT EXISTS idx_books_author ON books (author);
+CREATE INDEX IF NOT EXISTS idx_books_price ON books (price);
+CREATE INDEX IF NOT EXISTS idx_books_low_stock ON books (stock) WHERE stock < reorder_threshold;
+CREATE INDEX IF NOT EXISTS idx_users_role ON users (role);
+CREATE INDEX IF NOT EXISTS idx_sessions_expiry ON sessions (expires_at);
+CREATE INDEX IF NOT EXISTS idx_stock_holds_expiry ON stock_holds (expires_at, quantity);
+CREATE INDEX IF NOT EXISTS idx_stock_holds_book ON stock_holds (book_id, expires_at);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+        title, author,
+        content='books', content_rowid='book_id',
+        tokenize='unicode61 remove_diacritics 2'
+    );
+-- books_fts is kept in sync by the books_fts_ai / _ad / _au triggers (migration 4).
+
+PRAGMA user_version = 11;
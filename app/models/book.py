@@ -13,6 +13,8 @@ class Book:
     +displayDetails()
     +updateStock()
     """
+    __slots__ = ("book_id", "title", "author", "price", "stock")
+
     def __init__(self, book_id: Optional[int], title: str, author: str, price: float, stock: int):
         # OCL-like invariant: price >= 0 and stock >= 0
         assert price >= 0, "price must be non-negative"
@@ -24,6 +26,30 @@ class Book:
         self.price = float(price)
         self.stock = int(stock)
 
+    @classmethod
+    def from_row(cls, book_id: int, title: str, author: str, price: float, stock: int) -> Book:
+        """
+        Fast path for trusted DB rows: the table's CHECK constraints already
+        guarantee the invariants, so skip re-validation and coercion.
+        """
+        book = object.__new__(cls)
+        book.book_id, book.title, book.author, book.price, book.stock = book_id, title, author, price, stock
+        return book
+
+    @staticmethod
+    def validate_fields(title: str, author: str, price: float, stock: int) -> Optional[str]:
+        """
+        Catalog entry rules shared by AdminController.add_book and bulk import.
+        Returns an error message, or None when the values are acceptable.
+        """
+        if not (title or "").strip() or not (author or "").strip():
+            return "Title and Author are required."
+        if price is None or price < 0:
+            return "Price must be ≥ 0."
+        if stock is None or stock < 0:
+            return "Stock must be ≥ 0."
+        return None
+
     def update_stock(self, new_stock: int) -> None:
         if new_stock < 0:
             raise ValueError("new_stock cannot be negative")
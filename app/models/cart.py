@@ -1,9 +1,46 @@
 # app/models/cart.py
 from __future__ import annotations
-from typing import List, Optional
+from collections.abc import Sequence
+from typing import Iterable, Optional
 from .book import Book
 from .cart_item import CartItem
 
+class CartLines(Sequence):
+    """
+    A cart's lines as a list-like sequence, in the order they were added.
+    len(), iteration and `in` read the cart directly; indexing and slicing use a
+    list the cart rebuilds only after a line is added or removed. append() goes
+    through the cart, so the book_id index and the running total stay right.
+    """
+    __slots__ = ("_cart",)
+
+    def __init__(self, cart: Cart):
+        self._cart = cart
+
+    def __len__(self) -> int:
+        return len(self._cart._lines)
+
+    def __iter__(self):
+        return iter(self._cart._lines.values())
+
+    def __getitem__(self, index):
+        return self._cart._ordered()[index]
+
+    def __contains__(self, item) -> bool:
+        return isinstance(item, CartItem) and self._cart._lines.get(item.book.book_id) is item
+
+    def append(self, item: CartItem) -> None:
+        """Adds a line; a book already in the cart has the quantities merged."""
+        self._cart._add_line(item)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (CartLines, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
 class Cart:
     """
     UML: Cart
@@ -12,10 +49,54 @@ class Cart:
     +calculateTotal()
     +clearCart()
     Composition: has many CartItem (1..*)
+
+    Lines are indexed by book_id (insertion ordered) and the total is kept up
+    to date on every change, so every operation and calculate_total() is O(1)
+    however many lines the cart holds. Change lines through the Cart methods,
+    not CartItem.update_quantity(), or the running total goes stale.
     """
     def __init__(self, user_id: Optional[int]):
         self.user_id = user_id
-        self.items: List[CartItem] = []
+        self._lines: dict[int, CartItem] = {}   # book_id -> line, in the order added
+        self._snapshot: list[CartItem] | None = None   # _lines as a list, for indexing
+        self._total = 0.0
+        self._compensation = 0.0                # Neumaier sum: no drift over many edits
+
+    @property
+    def items(self) -> CartLines:
+        """The lines in the order they were added (list-like; see CartLines)."""
+        return CartLines(self)
+
+    @items.setter
+    def items(self, items: Iterable[CartItem]) -> None:
+        """Replaces every line; lines for the same book_id are merged into one."""
+        self.clear_cart()
+        for ci in items:
+            self._add_line(ci)
+
+    def _ordered(self) -> list[CartItem]:
+        if self._snapshot is None:
+            self._snapshot = list(self._lines.values())
+        return self._snapshot
+
+    def _add_line(self, ci: CartItem) -> None:
+        existing = self._lines.get(ci.book.book_id)
+        if existing is not None:
+            before = existing.subtotal
+            existing.update_quantity(existing.quantity + ci.quantity)
+            self._add_to_total(existing.subtotal - before)
+            return
+        self._lines[ci.book.book_id] = ci
+        self._snapshot = None
+        self._add_to_total(ci.subtotal)
+
+    def _add_to_total(self, amount: float) -> None:
+        total = self._total + amount
+        if abs(self._total) >= abs(amount):
+            self._compensation += (self._total - total) + amount
+        else:
+            self._compensation += (amount - total) + self._total
+        self._total = total
 
     # --- Operations matching use cases ---
     def add_item(self, book: Book, qty: int) -> None:
@@ -23,34 +104,51 @@ class Cart:
             raise ValueError("qty must be > 0")
 
         # If book already in cart → update quantity
-        for ci in self.items:
-            if ci.book.book_id == book.book_id:
-                ci.update_quantity(ci.quantity + qty)
-                return
-        self.items.append(CartItem(book, qty))
+        ci = self._lines.get(book.book_id)
+        if ci is not None:
+            before = ci.subtotal
+            ci.update_quantity(ci.quantity + qty)
+            self._add_to_total(ci.subtotal - before)
+            return
+        ci = self._lines[book.book_id] = CartItem(book, qty)
+        self._snapshot = None
+        self._add_to_total(ci.subtotal)
 
     def remove_item(self, book_id: int) -> None:
-        self.items = [ci for ci in self.items if ci.book.book_id != book_id]
+        ci = self._lines.pop(book_id, None)
+        if ci is None:
+            return
+        self._snapshot = None
+        if self._lines:
+            self._add_to_total(-ci.subtotal)
+        else:
+            self._total = self._compensation = 0.0
 
     def update_quantity(self, book_id: int, new_qty: int) -> None:
-        found = False
-        for ci in self.items:
-            if ci.book.book_id == book_id:
-                ci.update_quantity(new_qty)
-                found = True
-                break
-        if not found:
+        ci = self._lines.get(book_id)
+        if ci is None:
             raise ValueError("book not present in cart")
+        before = ci.subtotal
+        ci.update_quantity(new_qty)
+        self._add_to_total(ci.subtotal - before)
+
+    def get_item(self, book_id: int) -> CartItem | None:
+        return self._lines.get(book_id)
 
     def calculate_total(self) -> float:
         # OCL-like invariant: total == sum(item.subtotal)
-        return round(sum(ci.subtotal for ci in self.items), 2)
+        return round(self._total + self._compensation, 2)
 
     def clear_cart(self) -> None:
-        self.items.clear()
+        self._lines.clear()
+        self._snapshot = None
+        self._total = self._compensation = 0.0
 
     def is_empty(self) -> bool:
-        return len(self.items) == 0
+        return not self._lines
+
+    def __contains__(self, book_id: int) -> bool:
+        return book_id in self._lines
 
     def __repr__(self) -> str:
-        return f"<Cart user_id={self.user_id} items={len(self.items)} total={self.calculate_total():.2f}>"
+        return f"<Cart user_id={self.user_id} items={len(self._lines)} total={self.calculate_total():.2f}>"
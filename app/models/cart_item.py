@@ -9,6 +9,8 @@ class CartItem:
     +updateQuantity()
     Aggregation: references Book (1)
     """
+    __slots__ = ("book", "quantity", "subtotal")
+
     def __init__(self, book: Book, quantity: int):
         if quantity <= 0:
             raise ValueError("quantity must be > 0")
@@ -16,6 +18,13 @@ class CartItem:
         self.quantity = int(quantity)
         self.subtotal = self.book.price * self.quantity
 
+    @classmethod
+    def from_row(cls, book: Book, quantity: int) -> CartItem:
+        """Fast path for trusted DB rows (quantity already checked > 0 by the schema)."""
+        item = object.__new__(cls)
+        item.book, item.quantity, item.subtotal = book, quantity, book.price * quantity
+        return item
+
     def update_quantity(self, new_qty: int) -> None:
         if new_qty <= 0:
             raise ValueError("new_qty must be > 0")
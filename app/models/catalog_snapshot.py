@@ -0,0 +1,85 @@
+# app/models/catalog_snapshot.py
+from __future__ import annotations
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+from .book import Book
+
+try:  # optional: zero-copy NumPy views over the columns
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is not a hard dependency
+    np = None
+
+class CatalogSnapshot:
+    """
+    Read-only, column-oriented copy of the catalog for bulk read workloads
+    (reports, price/stock scans) where building one Book per row is too heavy.
+
+    ids/prices/stock live in typed `array` columns (8 bytes per value);
+    authors are interned, so every book by the same author shares one string.
+    Titles are nearly always unique, so interning them would only add overhead.
+    Rows are kept in book_id order, which makes id lookups a binary search.
+    """
+    __slots__ = ("ids", "prices", "stock", "titles", "authors")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.prices = array("d")
+        self.stock = array("q")
+        self.titles: list[str] = []
+        self.authors: list[str] = []
+
+    @classmethod
+    def from_rows(cls, rows: Iterable) -> CatalogSnapshot:
+        """Builds a snapshot from (book_id, title, author, price, stock) rows sorted by book_id."""
+        snap = cls()
+        intern = sys.intern
+        for book_id, title, author, price, stock in rows:
+            snap.ids.append(book_id)
+            snap.titles.append(title)
+            snap.authors.append(intern(author))
+            snap.prices.append(price)
+            snap.stock.append(stock)
+        return snap
+
+    # --- Lookups ---
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def index_of(self, book_id: int) -> Optional[int]:
+        i = bisect_left(self.ids, book_id)
+        if i < len(self.ids) and self.ids[i] == book_id:
+            return i
+        return None
+
+    def book_at(self, i: int) -> Book:
+        return Book.from_row(self.ids[i], self.titles[i], self.authors[i], self.prices[i], self.stock[i])
+
+    def get(self, book_id: int) -> Optional[Book]:
+        i = self.index_of(book_id)
+        return None if i is None else self.book_at(i)
+
+    # --- Bulk reads ---
+    def total_stock(self) -> int:
+        return sum(self.stock)
+
+    def inventory_value(self) -> float:
+        return round(sum(p * s for p, s in zip(self.prices, self.stock)), 2)
+
+    def ids_with_stock_below(self, threshold: int) -> list[int]:
+        return [book_id for book_id, s in zip(self.ids, self.stock) if s < threshold]
+
+    def as_numpy(self) -> dict:
+        """Zero-copy NumPy views of the numeric columns (requires numpy)."""
+        if np is None:
+            raise RuntimeError("numpy is not installed; use the array columns directly.")
+        return {
+            "ids": np.frombuffer(self.ids, dtype=np.int64),
+            "prices": np.frombuffer(self.prices, dtype=np.float64),
+            "stock": np.frombuffer(self.stock, dtype=np.int64),
+        }
+
+    def __repr__(self) -> str:
+        return f"<CatalogSnapshot books={len(self)}>"
@@ -1,7 +1,7 @@
 # app/models/order.py
 from __future__ import annotations
 from typing import Optional, List, Dict
-from datetime import datetime
+from datetime import datetime, timezone
 
 class OrderStatus:
     PENDING = "Pending"
@@ -23,6 +23,8 @@ class Order:
     +generateInvoice()
     Association: 1..1 Payment
     """
+    __slots__ = ("order_id", "user_id", "total_amount", "status", "order_date")
+
     def __init__(self, order_id: Optional[int], user_id: int, total_amount: float,
                  status: str = OrderStatus.PENDING, order_date: Optional[datetime] = None):
         if total_amount < 0:
@@ -34,7 +36,7 @@ class Order:
         self.user_id = user_id
         self.total_amount = round(float(total_amount), 2)
         self.status = status
-        self.order_date = order_date or datetime.now()
+        self.order_date = order_date or datetime.now(timezone.utc).replace(tzinfo=None)  # naive UTC, as stored
 
     # --- Operations ---
     def update_status(self, new_status: str) -> None:
@@ -67,3 +69,42 @@ class Order:
 
     def __repr__(self) -> str:
         return f"<Order id={self.order_id} user={self.user_id} total={self.total_amount} status={self.status}>"
+
+
+class CheckoutResult:
+    """
+    Structured outcome of a headless checkout.
+    status: "Confirmed" | "PaymentPending" | "PaymentFailed" | "Rejected" (stock/cart) | "Error".
+    timings holds per-phase durations in milliseconds.
+    future resolves to the final payment status when the payment settles in the background.
+    """
+    __slots__ = ("status", "order_id", "payment_status", "method", "total",
+                 "message", "warnings", "shortfalls", "timings", "future")
+
+    CONFIRMED = "Confirmed"
+    PENDING = "PaymentPending"
+    PAYMENT_FAILED = "PaymentFailed"
+    REJECTED = "Rejected"
+    ERROR = "Error"
+
+    def __init__(self, status: str, message: str, order_id: Optional[int] = None,
+                 payment_status: Optional[str] = None, method: Optional[str] = None,
+                 total: float = 0.0):
+        self.status = status
+        self.message = message
+        self.order_id = order_id
+        self.payment_status = payment_status
+        self.method = method
+        self.total = total
+        self.warnings: List[str] = []
+        self.shortfalls: Dict[int, tuple] = {}
+        self.timings: Dict[str, float] = {}
+        self.future = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == CheckoutResult.CONFIRMED
+
+    def __repr__(self) -> str:
+        return (f"<CheckoutResult status={self.status} order={self.order_id} "
+                f"payment={self.payment_status} total={self.total}>")
@@ -21,6 +21,8 @@ class Payment:
     +processPayment()
     Association: belongs to Order (1:1)
     """
+    __slots__ = ("payment_id", "order_id", "method", "status")
+
     # All uppercase to match normalization
     VALID_METHODS = {"CARD", "UPI", "COD"}
 
@@ -48,18 +50,75 @@ class Payment:
         """
         return amount > 0 and self.method in Payment.VALID_METHODS
 
-    def process_payment(self, amount: float) -> bool:
+    def process_payment(self, amount: float, gateway=None, details: Optional[PaymentDetails] = None,
+                        key: Optional[str] = None, timeout: Optional[float] = None) -> bool:
         """
-        Simulated processing:
-        - If validate passes, mark Success; else Failed.
+        Processing:
+        - If validate fails, mark Failed.
+        - Without a gateway (console demo), mark Success.
+        - With a gateway, mark Success/Failed from its answer; transient gateway
+          errors propagate and leave the status Pending so the caller can retry.
         - Controllers/Repos handle persistence.
         """
-        if self.validate_payment(amount):
-            self.status = PaymentStatus.SUCCESS
-            return True
-        self.status = PaymentStatus.FAILED
-        return False
+        if not self.validate_payment(amount):
+            self.status = PaymentStatus.FAILED
+            return False
+        if gateway is not None:
+            key = key or f"order-{self.order_id}-payment-{self.payment_id}"
+            approved = gateway.charge(key, amount, details, timeout)
+            self.status = PaymentStatus.SUCCESS if approved else PaymentStatus.FAILED
+            return approved
+        self.status = PaymentStatus.SUCCESS
+        return True
 
     def __repr__(self) -> str:
         return (f"<Payment id={self.payment_id} order={self.order_id} "
                 f"method={self.method} status={self.status}>")
+
+
+class PaymentDetails:
+    """
+    Typed payment input for a checkout, independent of any UI.
+    Build with PaymentDetails.card(...), .upi(...) or .cod().
+    """
+    __slots__ = ("method", "card_number", "cvv", "upi_id")
+
+    def __init__(self, method: str, card_number: str = "", cvv: str = "", upi_id: str = ""):
+        method = (method or "").strip().upper()
+        if method not in Payment.VALID_METHODS:
+            raise ValueError(f"Unsupported payment method: {method}")
+        self.method = method
+        self.card_number = (card_number or "").strip()
+        self.cvv = (cvv or "").strip()
+        self.upi_id = (upi_id or "").strip()
+
+    @classmethod
+    def card(cls, card_number: str, cvv: str) -> PaymentDetails:
+        return cls("CARD", card_number=card_number, cvv=cvv)
+
+    @classmethod
+    def upi(cls, upi_id: str) -> PaymentDetails:
+        return cls("UPI", upi_id=upi_id)
+
+    @classmethod
+    def cod(cls) -> PaymentDetails:
+        return cls("COD")
+
+    @property
+    def db_method(self) -> str:
+        """Spelling expected by the payments.method CHECK constraint."""
+        return {"CARD": "Card", "UPI": "UPI", "COD": "COD"}[self.method]
+
+    def format_warnings(self) -> list[str]:
+        """Minimal format checks (informational; authorization decides success)."""
+        warnings = []
+        if self.method == "CARD":
+            if len(self.card_number) != 16 or not self.card_number.isdigit():
+                warnings.append("Invalid card number format.")
+            if len(self.cvv) != 3 or not self.cvv.isdigit():
+                warnings.append("Invalid CVV format.")
+        return warnings
+
+    def __repr__(self) -> str:
+        # never echo card numbers / CVVs
+        return f"<PaymentDetails method={self.method}>"
@@ -2,6 +2,7 @@
 from __future__ import annotations
 from typing import Optional
 from .cart import Cart
+from app.utils.password_hasher import PasswordHasher, get_default_hasher
 
 class User:
     """
@@ -14,18 +15,34 @@ class User:
     Responsibilities:
     - Hold identity & auth data for any user (Admin/Customer).
     - No persistence/DB logic here.
+    `password` is the stored encoded hash (legacy rows may still hold plain text).
     """
+    hasher: PasswordHasher | None = None   # None -> app-wide default
+
     def __init__(self, user_id: Optional[int], name: str, email: str, password: str, role: str):
         self.user_id = user_id
         self.name = name
         self.email = email
-        self._password = password    # plain compare for console demo
+        self._password = password    # encoded hash, see app/utils/password_hasher.py
         self.role = role             # 'customer' | 'admin'
         self._logged_in = False
 
     # --- Operations ---
+    def _hasher(self) -> PasswordHasher:
+        return self.hasher or get_default_hasher()
+
     def check_password(self, password: str) -> bool:
-        return self._password == password
+        return self._hasher().verify(password, self._password)
+
+    @property
+    def password_hash(self) -> str:
+        return self._password
+
+    def needs_rehash(self) -> bool:
+        return self._hasher().needs_rehash(self._password)
+
+    def set_password_hash(self, encoded: str) -> None:
+        self._password = encoded
 
     def login(self, password: str) -> bool:
         if self.check_password(password):
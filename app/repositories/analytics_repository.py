@@ -0,0 +1,189 @@
+# app/repositories/analytics_repository.py
+from .base_repository import BaseRepository
+from .order_repository import OrderRepository
+from app.models.order import OrderStatus
+from app.db.migrations import rebuild_summaries
+
+
+class AnalyticsRepository(BaseRepository):
+    """
+    Sales analytics computed with SQL aggregates.
+    Only Confirmed orders count as sales. Optional date bounds select
+    order_date in [date_from, date_to) (UTC; datetime, date or stored text).
+    Orders placed before order_items existed have no lines: they count towards
+    revenue by day and average order value, but not towards per-book figures.
+
+    All-time figures (no date bounds) and the dashboard read the summary tables
+    that triggers keep current (migration 7), so their cost does not grow with
+    order volume; rebuild_summaries() recomputes those tables from scratch.
+    """
+
+    @staticmethod
+    def _order_filter(date_from, date_to, alias: str = "") -> tuple[str, tuple]:
+        # status first, then the order_date range: a seek + range on idx_orders_status_date
+        where, params = [f"{alias}status = ?"], [OrderStatus.CONFIRMED]
+        if date_from is not None:
+            where.append(f"{alias}order_date >= ?")
+            params.append(OrderRepository.format_timestamp(date_from))
+        if date_to is not None:
+            where.append(f"{alias}order_date < ?")
+            params.append(OrderRepository.format_timestamp(date_to))
+        return " AND ".join(where), tuple(params)
+
+    def _book_sales_sql(self, date_from, date_to) -> tuple[str, tuple]:
+        """Per-book units and revenue; confirmed orders drive the join into their clustered lines."""
+        where, params = self._order_filter(date_from, date_to, "o.")
+        # CROSS JOIN pins orders as the outer loop, so a date range narrows the lines read
+        return (f"SELECT oi.book_id, SUM(oi.quantity) AS units, "
+                f"SUM(oi.quantity * oi.unit_price) AS revenue, COUNT(*) AS order_lines "
+                f"FROM orders o CROSS JOIN order_items oi ON oi.order_id = o.order_id "
+                f"WHERE {where} GROUP BY oi.book_id", params)
+
+    def _sales_source(self, date_from, date_to) -> tuple[str, tuple]:
+        if date_from is None and date_to is None:
+            return "SELECT book_id, units, revenue FROM book_sales WHERE units <> 0", ()
+        return self._book_sales_sql(date_from, date_to)
+
+    def revenue_by_book(self, date_from=None, date_to=None, limit: int = 10) -> list[dict]:
+        try:
+            sales, params = self._sales_source(date_from, date_to)
+            rows = self.fetch_all(
+                f"SELECT s.book_id, b.title, b.author, s.units, s.revenue "
+                f"FROM ({sales}) s LEFT JOIN books b ON b.book_id = s.book_id "
+                f"ORDER BY s.revenue DESC, s.book_id LIMIT ?",
+                params + (limit,),
+            )
+            return [dict(r) for r in rows]
+        except Exception as e:
+            print(f"Error computing revenue by book: {e}")
+            return []
+
+    def top_sellers(self, date_from=None, date_to=None, limit: int = 10) -> list[dict]:
+        """Best-selling books by units sold."""
+        try:
+            if date_from is None and date_to is None:
+                return self.top_books_sold(limit)
+            sales, params = self._book_sales_sql(date_from, date_to)
+            rows = self.fetch_all(
+                f"SELECT s.book_id, b.title, b.author, s.units, s.revenue "
+                f"FROM ({sales}) s LEFT JOIN books b ON b.book_id = s.book_id "
+                f"ORDER BY s.units DESC, s.book_id LIMIT ?",
+                params + (limit,),
+            )
+            return [dict(r) for r in rows]
+        except Exception as e:
+            print(f"Error computing top sellers: {e}")
+            return []
+
+    def revenue_by_author(self, date_from=None, date_to=None, limit: int = 10) -> list[dict]:
+        """Aggregates per book first, then rolls books up to authors (one books lookup per book sold)."""
+        try:
+            sales, params = self._sales_source(date_from, date_to)
+            rows = self.fetch_all(
+                f"SELECT COALESCE(b.author, '(deleted)') AS author, COUNT(*) AS titles, "
+                f"SUM(s.units) AS units, SUM(s.revenue) AS revenue "
+                f"FROM ({sales}) s LEFT JOIN books b ON b.book_id = s.book_id "
+                f"GROUP BY 1 ORDER BY revenue DESC, author LIMIT ?",
+                params + (limit,),
+            )
+            return [dict(r) for r in rows]
+        except Exception as e:
+            print(f"Error computing revenue by author: {e}")
+            return []
+
+    def revenue_by_day(self, date_from=None, date_to=None) -> list[dict]:
+        """Daily order count and revenue, oldest day first; read from the covering index alone."""
+        try:
+            if date_from is None and date_to is None:
+                rows = self.fetch_all("SELECT day, orders, revenue FROM sales_daily WHERE orders <> 0 ORDER BY day")
+                return [dict(r) for r in rows]
+            where, params = self._order_filter(date_from, date_to)
+            rows = self.fetch_all(
+                f"SELECT substr(order_date, 1, 10) AS day, COUNT(*) AS orders, SUM(total_amount) AS revenue "
+                f"FROM orders WHERE {where} GROUP BY day ORDER BY day",
+                params,
+            )
+            return [dict(r) for r in rows]
+        except Exception as e:
+            print(f"Error computing revenue by day: {e}")
+            return []
+
+    def order_summary(self, date_from=None, date_to=None) -> dict:
+        """Confirmed order count, revenue and average order value."""
+        try:
+            if date_from is None and date_to is None:
+                confirmed = self.status_totals().get(OrderStatus.CONFIRMED, {"orders": 0, "amount": 0.0})
+                orders, revenue = confirmed["orders"], confirmed["amount"]
+                return {"orders": orders, "revenue": revenue,
+                        "average_order_value": revenue / orders if orders else 0.0}
+            where, params = self._order_filter(date_from, date_to)
+            row = self.fetch_one(
+                f"SELECT COUNT(*) AS orders, COALESCE(SUM(total_amount), 0) AS revenue, "
+                f"COALESCE(AVG(total_amount), 0) AS average_order_value FROM orders WHERE {where}",
+                params,
+            )
+            return dict(row) if row else {"orders": 0, "revenue": 0.0, "average_order_value": 0.0}
+        except Exception as e:
+            print(f"Error computing order summary: {e}")
+            return {"orders": 0, "revenue": 0.0, "average_order_value": 0.0}
+
+    # --- Dashboard (summary tables) ---
+    def status_totals(self) -> dict[str, dict]:
+        """{status: {"orders": n, "amount": total}} across every order."""
+        try:
+            rows = self.fetch_all("SELECT status, orders, amount FROM order_status_totals")
+            return {r["status"]: {"orders": r["orders"], "amount": r["amount"]} for r in rows}
+        except Exception as e:
+            print(f"Error reading order status totals: {e}")
+            return {}
+
+    def payment_totals(self) -> list[dict]:
+        try:
+            rows = self.fetch_all("SELECT method, status, payments FROM payment_status_totals "
+                                  "WHERE payments <> 0 ORDER BY method, status")
+            return [dict(r) for r in rows]
+        except Exception as e:
+            print(f"Error reading payment totals: {e}")
+            return []
+
+    def recent_daily_revenue(self, days: int = 7) -> list[dict]:
+        """The latest `days` days with sales, newest first (a primary-key range read)."""
+        try:
+            rows = self.fetch_all("SELECT day, orders, revenue FROM sales_daily WHERE orders <> 0 "
+                                  "ORDER BY day DESC LIMIT ?", (days,))
+            return [dict(r) for r in rows]
+        except Exception as e:
+            print(f"Error reading daily revenue: {e}")
+            return []
+
+    def top_books_sold(self, limit: int = 10) -> list[dict]:
+        try:
+            rows = self.fetch_all(
+                "SELECT s.book_id, b.title, b.author, s.units, s.revenue "
+                "FROM book_sales s LEFT JOIN books b ON b.book_id = s.book_id "
+                "WHERE s.units > 0 ORDER BY s.units DESC LIMIT ?", (limit,))
+            return [dict(r) for r in rows]
+        except Exception as e:
+            print(f"Error reading top books: {e}")
+            return []
+
+    def top_customers(self, limit: int = 10) -> list[dict]:
+        try:
+            rows = self.fetch_all(
+                "SELECT s.user_id, u.name, u.email, s.orders, s.spend "
+                "FROM user_spend s LEFT JOIN users u ON u.user_id = s.user_id "
+                "WHERE s.orders > 0 ORDER BY s.spend DESC LIMIT ?", (limit,))
+            return [dict(r) for r in rows]
+        except Exception as e:
+            print(f"Error reading top customers: {e}")
+            return []
+
+    def rebuild_summaries(self) -> bool:
+        """Recomputes every summary table from the source tables in one transaction (repair)."""
+        try:
+            with self.transaction() as conn:
+                rebuild_summaries(conn)
+            return True
+        except Exception as e:
+            print(f"Failed to rebuild summary tables: {e}")
+            return False
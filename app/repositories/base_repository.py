@@ -1,50 +1,138 @@
 import sqlite3
+import threading
 from typing import Any
+from .connection_pool import ConnectionPool
+from app.db.migrations import migrate
 
 class BaseRepository:
     """
-    Implements Singleton pattern for shared DB connection.
+    Implements Singleton pattern per repository class.
+    All repositories share one ConnectionPool per database file
+    (WAL mode, busy timeout, per-thread or checked-out connections).
+    The schema is migrated to the latest version the first time a database is opened.
     Adds robust error handling for all queries.
     """
     _instance = None
-    _connection = None
+    _pools: dict[str, ConnectionPool] = {}
+    _pool_options: dict[str, dict] = {}
+    _pools_lock = threading.Lock()
+    _migrated: set[str] = set()
 
     def __new__(cls, db_name: str = "bookstore.db"):
-        if cls._instance is None:
+        # look up _instance on cls itself so subclasses never inherit a parent's singleton
+        if cls.__dict__.get("_instance") is None:
             try:
-                cls._instance = super().__new__(cls)
-                cls._connection = sqlite3.connect(db_name, check_same_thread=False)
-                cls._connection.row_factory = sqlite3.Row  # fetch as dict-like
+                instance = super().__new__(cls)
+                instance.db_name = db_name
+                instance.migrate()  # also fails fast on bad paths
+                cls._instance = instance
             except sqlite3.Error as e:
                 print(f"Failed to connect to database '{db_name}': {e}")
                 raise
         return cls._instance
 
+    # --- Pool management ---
+    @classmethod
+    def configure_pool(cls, db_name: str = "bookstore.db", **options) -> ConnectionPool:
+        """
+        Sets pool options (mode, max_size, busy_timeout_ms, journal_mode,
+        synchronous, cache_size, mmap_size) for db_name.
+        Any existing pool for that database is closed and rebuilt.
+        """
+        with BaseRepository._pools_lock:
+            BaseRepository._pool_options[db_name] = dict(options)
+            old = BaseRepository._pools.pop(db_name, None)
+        if old is not None:
+            old.close_all()
+        return BaseRepository._get_pool(db_name)
+
+    @staticmethod
+    def _get_pool(db_name: str) -> ConnectionPool:
+        with BaseRepository._pools_lock:
+            pool = BaseRepository._pools.get(db_name)
+            if pool is None:
+                options = BaseRepository._pool_options.get(db_name, {})
+                pool = ConnectionPool(db_name, **options)
+                BaseRepository._pools[db_name] = pool
+            return pool
+
+    def migrate(self) -> int:
+        """Brings the schema up to date (once per database per process); returns user_version."""
+        with self.pool.connection() as conn:
+            if self.db_name in BaseRepository._migrated:
+                return conn.execute("PRAGMA user_version").fetchone()[0]
+            version = migrate(conn)
+            BaseRepository._migrated.add(self.db_name)
+            return version
+
     @property
-    def conn(self):
-        if self._connection is None:
-            raise ConnectionError("Database connection not initialized.")
-        return self._connection
+    def pool(self) -> ConnectionPool:
+        return BaseRepository._get_pool(self.db_name)
 
-    # --- Safe Execution Methods ---
-    def execute(self, query: str, params: tuple = ()) -> Any:
-        """Execute a write operation with error handling and commit."""
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection bound to the calling thread."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(query, params)
-            self.conn.commit()
-            return cursor
+            return self.pool.thread_connection()
         except sqlite3.Error as e:
-            self.conn.rollback()
-            print(f"DB Execute Error: {e}\nQuery: {query}\nParams: {params}")
-            raise
+            raise ConnectionError(f"Database connection not initialized: {e}")
+
+    # --- Unit of Work ---
+    def transaction(self):
+        """
+        Context manager that commits every write issued inside it once.
+        Nested blocks become savepoints. Usage:
+
+            with repo.transaction():
+                repo.execute(...)
+                other_repo.execute(...)
+        """
+        return self.pool.transaction()
+
+    # --- Safe Execution Methods ---
+    def execute(self, query: str, params: tuple = ()) -> Any:
+        """Execute a write operation with error handling and commit (deferred inside a transaction)."""
+        with self.pool.connection() as conn:
+            in_tx = self.pool.in_transaction()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                if not in_tx:
+                    conn.commit()
+                return cursor
+            except sqlite3.Error as e:
+                if in_tx:
+                    self.pool.mark_failed()
+                else:
+                    conn.rollback()
+                print(f"DB Execute Error: {e}\nQuery: {query}\nParams: {params}")
+                raise
+
+    def executemany(self, query: str, seq_of_params) -> Any:
+        """Execute one write statement for many parameter tuples (single commit)."""
+        with self.pool.connection() as conn:
+            in_tx = self.pool.in_transaction()
+            try:
+                cursor = conn.cursor()
+                cursor.executemany(query, seq_of_params)
+                if not in_tx:
+                    conn.commit()
+                return cursor
+            except sqlite3.Error as e:
+                if in_tx:
+                    self.pool.mark_failed()
+                else:
+                    conn.rollback()
+                print(f"DB ExecuteMany Error: {e}\nQuery: {query}")
+                raise
 
     def fetch_all(self, query: str, params: tuple = ()) -> list[sqlite3.Row]:
         """Fetch multiple rows safely."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(query, params)
-            return cursor.fetchall()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                return cursor.fetchall()
         except sqlite3.Error as e:
             print(f"DB FetchAll Error: {e}\nQuery: {query}\nParams: {params}")
             return []
@@ -52,20 +140,18 @@ class BaseRepository:
     def fetch_one(self, query: str, params: tuple = ()) -> sqlite3.Row | None:
         """Fetch a single row safely."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(query, params)
-            return cursor.fetchone()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                return cursor.fetchone()
         except sqlite3.Error as e:
             print(f"DB FetchOne Error: {e}\nQuery: {query}\nParams: {params}")
             return None
 
     def close_connection(self):
-        """Safely close the shared database connection."""
-        try:
-            if self._connection:
-                self._connection.commit()
-                self._connection.close()
-                self._connection = None
-                print("Database connection closed.")
-        except sqlite3.Error as e:
-            print(f"Error closing connection: {e}")
+        """Safely close every pooled connection for this database."""
+        with BaseRepository._pools_lock:
+            pool = BaseRepository._pools.pop(self.db_name, None)
+        if pool is not None:
+            pool.close_all()
+            print("Database connection closed.")
@@ -1,89 +1,453 @@
 from .base_repository import BaseRepository
 from app.models.book import Book
+from app.utils.lru_cache import LRUCache
+from app.utils.notifier import Notifier
+import json
+
+class InsufficientStockError(ValueError):
+    """
+    Raised when a stock deduction cannot be fully satisfied.
+    shortfalls maps book_id -> (requested, available); available is 0 for missing books.
+    """
+    def __init__(self, shortfalls: dict[int, tuple[int, int]]):
+        self.shortfalls = shortfalls
+        details = ", ".join(f"book {b}: requested {r}, available {a}" for b, (r, a) in shortfalls.items())
+        super().__init__(f"Insufficient stock ({details})")
 
 class BookRepository(BaseRepository):
     """
     CRUD for Book table with error handling.
+    get_book_by_id is served through a bounded read-through LRU cache;
+    every stock/catalog write invalidates the affected book exactly.
     """
+    cache = LRUCache(max_size=4096)
+
+    @classmethod
+    def configure_cache(cls, max_size: int = 4096, ttl: float | None = None) -> LRUCache:
+        """Replaces the Book cache (ttl in seconds, None = entries live until evicted/invalidated)."""
+        cls.cache = LRUCache(max_size=max_size, ttl=ttl)
+        return cls.cache
+
+    def _invalidate(self, book_id: int) -> None:
+        """
+        Drops the cached book now and again once the surrounding transaction ends,
+        so neither uncommitted nor rolled-back stock is ever served.
+        """
+        cache = BookRepository.cache
+        cache.invalidate(book_id)
+        self.pool.after_transaction(lambda: cache.invalidate(book_id))
 
     def create_table(self):
+        """Kept for older callers: the schema is owned by app/db/migrations.py."""
         try:
-            self.execute("""
-            CREATE TABLE IF NOT EXISTS books (
-                book_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT,
-                author TEXT,
-                price REAL,
-                stock INTEGER
-            )""")
+            self.migrate()
         except Exception as e:
             print(f"Failed to create books table: {e}")
 
     def add_book(self, title: str, author: str, price: float, stock: int) -> int:
         try:
-            self.execute(
+            cursor = self.execute(
                 "INSERT INTO books (title, author, price, stock) VALUES (?, ?, ?, ?)",
                 (title, author, price, stock),
             )
-            return self.conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            return cursor.lastrowid
         except Exception as e:
             print(f"Failed to add book: {e}")
             return -1
 
+    # --- Bulk import ---
+    def get_import_checkpoint(self, source: str) -> int:
+        """Last feed line whose chunk was committed for this source (0 = start from the top)."""
+        row = self.fetch_one("SELECT line_no FROM import_checkpoints WHERE source = ?", (source,))
+        return row["line_no"] if row else 0
+
+    def clear_import_checkpoint(self, source: str):
+        self.execute("DELETE FROM import_checkpoints WHERE source = ?", (source,))
+
+    def add_books_bulk(self, rows: list[tuple], source: str | None = None, line_no: int | None = None) -> int:
+        """
+        Inserts (title, author, price, stock) rows with one executemany in one transaction.
+        When source/line_no are given the import checkpoint advances in the same
+        transaction, so a crash can never record a chunk that was not written (or vice versa).
+        Raises on failure so the caller can stop the import at the last good checkpoint.
+        """
+        with self.transaction():
+            if rows:
+                self.executemany(
+                    "INSERT INTO books (title, author, price, stock) VALUES (?, ?, ?, ?)", rows
+                )
+            if source is not None and line_no is not None:
+                self.execute(
+                    "INSERT INTO import_checkpoints (source, line_no) VALUES (?, ?) "
+                    "ON CONFLICT(source) DO UPDATE SET line_no = excluded.line_no",
+                    (source, line_no),
+                )
+        return len(rows)
+
     def get_book_by_id(self, book_id: int) -> Book | None:
         try:
-            row = self.fetch_one("SELECT * FROM books WHERE book_id = ?", (book_id,))
+            cache = BookRepository.cache
+            cached = cache.get(book_id)
+            if cached is not None:
+                return Book.from_row(*cached)
+            token = cache.token()
+            row = self.fetch_one(
+                "SELECT book_id, title, author, price, stock FROM books WHERE book_id = ?", (book_id,)
+            )
             if not row:
                 return None
-            return Book(row["book_id"], row["title"], row["author"], row["price"], row["stock"])
+            values = (row["book_id"], row["title"], row["author"], row["price"], row["stock"])
+            if not self.pool.in_transaction():  # never cache uncommitted reads
+                cache.put(book_id, values, token)
+            # a fresh Book per call, so callers can't mutate the cached copy
+            return Book.from_row(*values)
         except Exception as e:
             print(f"Error fetching book {book_id}: {e}")
             return None
 
+    def get_books_by_ids(self, book_ids) -> dict[int, Book]:
+        """
+        Fetches many books with one `book_id IN (...)` query (ids passed as one JSON
+        parameter, so there is no bound-variable limit). Missing ids are absent from
+        the result. Read fresh from the DB; the results refresh the Book cache.
+        """
+        ids = list(dict.fromkeys(int(b) for b in book_ids))
+        if not ids:
+            return {}
+        try:
+            cache = BookRepository.cache
+            token = cache.token()
+            rows = self.fetch_all(
+                "SELECT book_id, title, author, price, stock FROM books "
+                "WHERE book_id IN (SELECT value FROM json_each(?))",
+                (json.dumps(ids),),
+            )
+            cacheable = not self.pool.in_transaction()
+            books = {}
+            for r in rows:
+                values = (r["book_id"], r["title"], r["author"], r["price"], r["stock"])
+                if cacheable:
+                    cache.put(values[0], values, token)
+                books[values[0]] = Book.from_row(*values)
+            return books
+        except Exception as e:
+            print(f"Error fetching {len(ids)} books: {e}")
+            return {}
+
     def get_all_books(self):
         try:
             rows = self.fetch_all("SELECT * FROM books")
-            return [Book(r["book_id"], r["title"], r["author"], r["price"], r["stock"]) for r in rows]
+            return [Book.from_row(r["book_id"], r["title"], r["author"], r["price"], r["stock"]) for r in rows]
         except Exception as e:
             print(f"Error fetching books: {e}")
             return []
 
+    # --- Paged / streaming catalog access ---
+    SORT_KEYS = ("book_id", "title", "author", "price")
+
+    def get_books_page(self, page_size: int = 20, sort_key: str = "book_id",
+                       after_id: int | None = None, after_value=None) -> list[Book]:
+        """
+        Keyset pagination: returns the next `page_size` books ordered by (sort_key, book_id)
+        strictly after the cursor. Pass the last book's id (and its sort_key value, when
+        sorting by something other than book_id) to get the following page.
+        Cost per page is an index seek, independent of how deep the page is.
+        """
+        if sort_key not in BookRepository.SORT_KEYS:
+            raise ValueError(f"Unsupported sort key: {sort_key}")
+        if page_size <= 0:
+            raise ValueError("page_size must be > 0")
+        try:
+            if after_id is None:
+                where, params = "", ()
+            elif sort_key == "book_id":
+                where, params = "WHERE book_id > ?", (after_id,)
+            elif after_value is not None:
+                where, params = f"WHERE ({sort_key}, book_id) > (?, ?)", (after_value, after_id)
+            else:
+                where = f"WHERE ({sort_key}, book_id) > ((SELECT {sort_key} FROM books WHERE book_id = ?), ?)"
+                params = (after_id, after_id)
+            order = "book_id" if sort_key == "book_id" else f"{sort_key}, book_id"
+            rows = self.fetch_all(
+                f"SELECT book_id, title, author, price, stock FROM books {where} "
+                f"ORDER BY {order} LIMIT ?",
+                params + (page_size,),
+            )
+            return [Book.from_row(r["book_id"], r["title"], r["author"], r["price"], r["stock"]) for r in rows]
+        except Exception as e:
+            print(f"Error fetching books page: {e}")
+            return []
+
+    def iter_books(self, batch_size: int = 500, sort_key: str = "book_id"):
+        """
+        Streams the whole catalog with fetchmany, holding at most `batch_size` rows in memory.
+        """
+        if sort_key not in BookRepository.SORT_KEYS:
+            raise ValueError(f"Unsupported sort key: {sort_key}")
+        order = "book_id" if sort_key == "book_id" else f"{sort_key}, book_id"
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.execute(
+                    f"SELECT book_id, title, author, price, stock FROM books ORDER BY {order}"
+                )
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for r in rows:
+                        yield Book.from_row(r["book_id"], r["title"], r["author"], r["price"], r["stock"])
+        except Exception as e:
+            print(f"Error streaming books: {e}")
+
+    def load_catalog_snapshot(self, batch_size: int = 5000):
+        """
+        Streams the catalog into a columnar CatalogSnapshot without building Book objects.
+        """
+        from app.models.catalog_snapshot import CatalogSnapshot
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.execute(
+                    "SELECT book_id, title, author, price, stock FROM books ORDER BY book_id"
+                )
+
+                def rows():
+                    while True:
+                        batch = cursor.fetchmany(batch_size)
+                        if not batch:
+                            return
+                        yield from batch
+
+                return CatalogSnapshot.from_rows(rows())
+        except Exception as e:
+            print(f"Error loading catalog snapshot: {e}")
+            return CatalogSnapshot()
+
+    # --- Full-text search ---
+    def rebuild_search_index(self):
+        """Re-indexes every book (repair only: triggers keep books_fts in sync on every write)."""
+        try:
+            self.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+        except Exception as e:
+            print(f"Failed to rebuild search index: {e}")
+
+    @staticmethod
+    def _fts_query(text: str) -> str:
+        """Turns free text into an FTS5 prefix query: 'harry pot' -> '"harry"* "pot"*'."""
+        tokens = "".join(ch if ch.isalnum() else " " for ch in (text or "")).split()
+        return " ".join(f'"{t}"*' for t in tokens)
+
+    def search_books(self, text: str, limit: int = 20, offset: int = 0) -> list[Book]:
+        """
+        Ranked (bm25, title weighted above author) prefix search over title and author.
+        """
+        match = self._fts_query(text)
+        if not match:
+            return []
+        try:
+            rows = self.fetch_all(
+                """
+                SELECT b.book_id, b.title, b.author, b.price, b.stock
+                FROM books_fts
+                JOIN books b ON b.book_id = books_fts.rowid
+                WHERE books_fts MATCH ?
+                ORDER BY bm25(books_fts, 2.0, 1.0)
+                LIMIT ? OFFSET ?
+                """,
+                (match, limit, offset),
+            )
+            return [Book.from_row(r["book_id"], r["title"], r["author"], r["price"], r["stock"]) for r in rows]
+        except Exception as e:
+            print(f"Error searching books for {text!r}: {e}")
+            return []
+
     def update_book(self, book_id: int, new_stock: int):
         try:
             self.execute("UPDATE books SET stock = ? WHERE book_id = ?", (new_stock, book_id))
+            self.pool.after_commit(self.dispatch_stock_alerts)
         except Exception as e:
             print(f"Failed to update stock for book {book_id}: {e}")
+        finally:
+            self._invalidate(book_id)
+
+    def deduct_stock(self, lines: dict[int, int]) -> None:
+        """
+        Atomically deducts {book_id: qty} with one set-based conditional UPDATE
+        (stock = stock - qty WHERE stock - reserved >= qty), inside a savepoint.
+        Either every line is deducted or none is and InsufficientStockError is raised,
+        so concurrent checkouts can never oversell, lose an update, or take stock
+        other customers hold (release the buyer's own holds first).
+        """
+        if not lines:
+            return
+        if any(qty <= 0 for qty in lines.values()):
+            raise ValueError("quantities must be > 0")
+        payload = json.dumps([[int(b), int(q)] for b, q in lines.items()])
+        try:
+            with self.transaction():
+                with self.pool.connection() as conn:
+                    updated = {r[0] for r in conn.execute(
+                        """
+                        UPDATE books SET stock = books.stock - req.qty
+                        FROM (SELECT json_extract(value, '$[0]') AS book_id,
+                                     json_extract(value, '$[1]') AS qty
+                              FROM json_each(?)) AS req
+                        WHERE books.book_id = req.book_id AND books.stock - books.reserved >= req.qty
+                        RETURNING books.book_id
+                        """,
+                        (payload,),
+                    ).fetchall()}
+                    missing = [b for b in lines if b not in updated]
+                    if missing:
+                        # rows that failed the WHERE were not touched, so their stock is current
+                        marks = ",".join("?" * len(missing))
+                        available = dict(conn.execute(
+                            f"SELECT book_id, stock - reserved FROM books WHERE book_id IN ({marks})", missing
+                        ).fetchall())
+                        raise InsufficientStockError(
+                            {b: (lines[b], available.get(b, 0)) for b in missing}
+                        )
+            self.pool.after_commit(self.dispatch_stock_alerts)
+        finally:
+            for book_id in lines:
+                self._invalidate(book_id)
+
+    def restock(self, lines: dict[int, int]) -> None:
+        """Returns {book_id: qty} to stock, e.g. when an order's payment fails."""
+        if not lines:
+            return
+        try:
+            self.executemany(
+                "UPDATE books SET stock = stock + ? WHERE book_id = ?",
+                [(int(q), int(b)) for b, q in lines.items()],
+            )
+        finally:
+            for book_id in lines:
+                self._invalidate(book_id)
+
+    # --- Low-stock alerting ---
+    def set_reorder_threshold(self, book_id: int, threshold: int) -> bool:
+        """Stock below `threshold` puts the book on the low-stock report (0 disables it)."""
+        if threshold < 0:
+            raise ValueError("threshold must be >= 0")
+        try:
+            cursor = self.execute("UPDATE books SET reorder_threshold = ? WHERE book_id = ?", (threshold, book_id))
+            self.pool.after_commit(self.dispatch_stock_alerts)
+            return cursor.rowcount > 0
+        except Exception as e:
+            print(f"Failed to set reorder threshold for book {book_id}: {e}")
+            return False
+
+    def get_low_stock_books(self, limit: int = 50) -> list[dict]:
+        """Books with stock below their reorder threshold, emptiest first (reads only idx_books_low_stock's rows)."""
+        try:
+            rows = self.fetch_all(
+                "SELECT book_id, title, author, stock, reorder_threshold FROM books "
+                "WHERE stock < reorder_threshold ORDER BY stock, book_id LIMIT ?",
+                (limit,),
+            )
+            return [dict(r) for r in rows]
+        except Exception as e:
+            print(f"Error fetching low-stock books: {e}")
+            return []
+
+    def count_low_stock(self) -> int:
+        row = self.fetch_one("SELECT COUNT(*) AS n FROM books WHERE stock < reorder_threshold")
+        return row["n"] if row else 0
+
+    def dispatch_stock_alerts(self) -> int:
+        """
+        Drains the stock_alerts outbox (filled by the books_low_stock_au trigger) into
+        Notifier.notify_low_stock. Registered to run after commit by every stock write;
+        costs one indexed read when there is nothing to send.
+        """
+        try:
+            if self.fetch_one("SELECT 1 FROM stock_alerts LIMIT 1") is None:
+                return 0
+            with self.transaction() as conn:
+                alerts = conn.execute("DELETE FROM stock_alerts RETURNING book_id, title, stock, threshold").fetchall()
+            for a in alerts:
+                Notifier.notify_low_stock(a["book_id"], a["title"], a["stock"], a["threshold"])
+            return len(alerts)
+        except Exception as e:
+            print(f"Failed to dispatch low-stock alerts: {e}")
+            return 0
 
     def delete_book(self, book_id: int):
         try:
             self.execute("DELETE FROM books WHERE book_id = ?", (book_id,))
         except Exception as e:
             print(f"Failed to delete book {book_id}: {e}")
+        finally:
+            self._invalidate(book_id)
 
     # --- Cart Persistence Helpers ---
-    def save_cart(self, user_id: int, cart):
+    def save_cart(self, user_id: int, cart) -> bool:
+        """
+        Persists only what changed since the last save:
+        changed lines are upserted, removed lines deleted, both via executemany.
+        Returns False if the save failed.
+        """
         try:
-            self.execute("DELETE FROM cart_items WHERE user_id = ?", (user_id,))
-            for item in cart.items:
-                self.execute(
-                    "INSERT INTO cart_items (user_id, book_id, quantity) VALUES (?, ?, ?)",
-                    (user_id, item.book.book_id, item.quantity),
+            # copy first: a write-behind flush may run while another thread edits the cart
+            wanted = {item.book.book_id: item.quantity for item in list(cart.items)}
+            with self.transaction():
+                rows = self.fetch_all(
+                    "SELECT book_id, quantity FROM cart_items WHERE user_id = ?", (user_id,)
                 )
+                saved = {r["book_id"]: r["quantity"] for r in rows}
+
+                if not wanted:
+                    if saved:
+                        self.execute("DELETE FROM cart_items WHERE user_id = ?", (user_id,))
+                    return True
+
+                removed = [(user_id, book_id) for book_id in saved if book_id not in wanted]
+                changed = [(user_id, book_id, qty) for book_id, qty in wanted.items()
+                           if saved.get(book_id) != qty]
+                if removed:
+                    self.executemany(
+                        "DELETE FROM cart_items WHERE user_id = ? AND book_id = ?", removed
+                    )
+                if changed:
+                    self.executemany(
+                        "INSERT INTO cart_items (user_id, book_id, quantity) VALUES (?, ?, ?) "
+                        "ON CONFLICT(user_id, book_id) DO UPDATE SET quantity = excluded.quantity",
+                        changed,
+                    )
+            return True
         except Exception as e:
             print(f"Failed to save cart for user {user_id}: {e}")
+            return False
 
     def load_cart(self, user_id: int):
+        """
+        Hydrates the user's cart with one JOIN against books (no per-line lookups).
+        Lines whose book has since been deleted are skipped; the next save_cart prunes them.
+        """
+        from app.models.cart import Cart
+        from app.models.cart_item import CartItem
         try:
-            rows = self.fetch_all("SELECT * FROM cart_items WHERE user_id = ?", (user_id,))
-            from app.models.cart import Cart
-            from app.models.book import Book
+            rows = self.fetch_all(
+                """
+                SELECT ci.quantity, b.book_id, b.title, b.author, b.price, b.stock
+                FROM cart_items ci
+                JOIN books b ON b.book_id = ci.book_id
+                WHERE ci.user_id = ?
+                ORDER BY ci.cart_item_id
+                """,
+                (user_id,),
+            )
             cart = Cart(user_id)
-            for r in rows:
-                book = self.get_book_by_id(r["book_id"])
-                if book:
-                    cart.add_item(book, r["quantity"])
+            # (user_id, book_id) is unique, so rows map 1:1 onto cart lines
+            cart.items = [
+                CartItem.from_row(
+                    Book.from_row(r["book_id"], r["title"], r["author"], r["price"], r["stock"]),
+                    r["quantity"],
+                )
+                for r in rows
+                if (r["quantity"] or 0) > 0
+            ]
             return cart
         except Exception as e:
             print(f"Failed to load cart for user {user_id}: {e}")
-            from app.models.cart import Cart
             return Cart(user_id)
@@ -0,0 +1,236 @@
+# app/repositories/connection_pool.py
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+
+class ConnectionPool:
+    """
+    Pool of SQLite connections for one database file.
+
+    Modes:
+    - "thread": each thread lazily opens and keeps its own connection.
+    - "queue":  connections are checked out of a bounded pool (max_size)
+                and returned when the caller is done with them.
+
+    Every connection is opened in WAL journal mode with a busy timeout, so
+    readers never block behind a writer and writers wait instead of failing.
+    """
+
+    MODES = ("thread", "queue")
+
+    def __init__(self, db_name: str = "bookstore.db", mode: str = "thread", max_size: int = 8,
+                 checkout_timeout: float = 10.0, busy_timeout_ms: int = 5000,
+                 journal_mode: str = "WAL", synchronous: str = "NORMAL",
+                 cache_size: int = -16000, mmap_size: int = 0):
+        if mode not in ConnectionPool.MODES:
+            raise ValueError(f"Unsupported pool mode: {mode}")
+        if max_size <= 0:
+            raise ValueError("max_size must be > 0")
+
+        self.db_name = db_name
+        self.mode = mode
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.pragmas = {
+            "journal_mode": journal_mode,
+            "busy_timeout": int(busy_timeout_ms),
+            "synchronous": synchronous,
+            "cache_size": int(cache_size),
+            "mmap_size": int(mmap_size),
+        }
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all: list[sqlite3.Connection] = []
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._closed = False
+
+    # --- Connection setup ---
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_name, check_same_thread=False,
+                               timeout=self.pragmas["busy_timeout"] / 1000)
+        conn.row_factory = sqlite3.Row  # fetch as dict-like
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        with self._lock:
+            self._all.append(conn)
+        return conn
+
+    # --- Checkout / checkin ---
+    def _checkout(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_open = len(self._all) < self.max_size
+        if can_open:
+            return self._open()
+        try:
+            return self._idle.get(timeout=self.checkout_timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"No database connection available after {self.checkout_timeout}s "
+                f"(pool size {self.max_size})."
+            )
+
+    def _checkin(self, conn: sqlite3.Connection) -> None:
+        if self._closed:
+            conn.close()
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def thread_connection(self) -> sqlite3.Connection:
+        """
+        Returns the connection bound to the calling thread.
+        In "queue" mode the connection stays checked out until release() is called.
+        """
+        if self._closed:
+            raise ConnectionError("Connection pool is closed.")
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open() if self.mode == "thread" else self._checkout()
+            self._local.conn = conn
+        return conn
+
+    def release(self) -> None:
+        """Returns the calling thread's pinned connection to the pool ("queue" mode)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self.mode == "thread":
+            return
+        self._local.conn = None
+        self._checkin(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Yields a connection for a short unit of work.
+        Reuses the thread's pinned connection when there is one.
+        """
+        if self._closed:
+            raise ConnectionError("Connection pool is closed.")
+        pinned = getattr(self._local, "conn", None)
+        if pinned is not None or self.mode == "thread":
+            yield self.thread_connection()
+            return
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            self._checkin(conn)
+
+    # --- Transactions ---
+    def in_transaction(self) -> bool:
+        return getattr(self._local, "tx_depth", 0) > 0
+
+    def mark_failed(self) -> None:
+        """Flags the calling thread's transaction as rollback-only."""
+        if self.in_transaction():
+            self._local.tx_failed = True
+
+    def after_transaction(self, callback: Callable[[], None]) -> None:
+        """
+        Runs callback once the calling thread's outermost transaction ends (commit or
+        rollback), or immediately when no transaction is open.
+        """
+        if not self.in_transaction():
+            callback()
+            return
+        if getattr(self._local, "tx_callbacks", None) is None:
+            self._local.tx_callbacks = []
+        self._local.tx_callbacks.append(callback)
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """
+        Runs callback only if the calling thread's outermost transaction commits
+        (dropped on rollback, including rollback of the savepoint it was registered in),
+        or immediately when no transaction is open.
+        """
+        if not self.in_transaction():
+            callback()
+            return
+        if getattr(self._local, "commit_callbacks", None) is None:
+            self._local.commit_callbacks = []
+        self._local.commit_callbacks.append(callback)
+
+    def _run_tx_callbacks(self, committed: bool = False) -> None:
+        callbacks, self._local.tx_callbacks = getattr(self._local, "tx_callbacks", None) or [], []
+        commit_callbacks, self._local.commit_callbacks = getattr(self._local, "commit_callbacks", None) or [], []
+        for callback in callbacks + (commit_callbacks if committed else []):
+            try:
+                callback()
+            except Exception as e:
+                print(f"Post-transaction callback failed: {e}")
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Groups every statement issued by this thread into one atomic commit.
+        The outermost block runs BEGIN IMMEDIATE ... COMMIT; nested blocks
+        become SAVEPOINTs that roll back on their own.
+        A statement that failed inside the block (even if the caller swallowed
+        the error) rolls the block back and raises on exit.
+        """
+        depth = getattr(self._local, "tx_depth", 0)
+        if depth == 0:
+            pinned_here = getattr(self._local, "conn", None) is None
+            conn = self.thread_connection()
+            conn.execute("BEGIN IMMEDIATE")
+            self._local.tx_depth = 1
+            self._local.tx_failed = False
+            committed = False
+            try:
+                yield conn
+                if self._local.tx_failed:
+                    raise sqlite3.DatabaseError("a statement failed inside the transaction")
+                conn.commit()
+                committed = True
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self._local.tx_depth = 0
+                self._local.tx_failed = False
+                if pinned_here:
+                    self.release()
+                self._run_tx_callbacks(committed)
+        else:
+            conn = self._local.conn
+            name = f"sp_{depth}"
+            conn.execute(f"SAVEPOINT {name}")
+            self._local.tx_depth = depth + 1
+            outer_failed, self._local.tx_failed = self._local.tx_failed, False
+            if getattr(self._local, "commit_callbacks", None) is None:
+                self._local.commit_callbacks = []
+            pending_commit = len(self._local.commit_callbacks)
+            try:
+                yield conn
+                if self._local.tx_failed:
+                    raise sqlite3.DatabaseError("a statement failed inside the savepoint")
+                conn.execute(f"RELEASE {name}")
+            except BaseException:
+                conn.execute(f"ROLLBACK TO {name}")
+                conn.execute(f"RELEASE {name}")
+                del self._local.commit_callbacks[pending_commit:]
+                raise
+            finally:
+                self._local.tx_depth = depth
+                self._local.tx_failed = outer_failed
+
+    def close_all(self) -> None:
+        """Commits and closes every connection opened by this pool."""
+        with self._lock:
+            self._closed = True
+            conns, self._all = self._all, []
+        for conn in conns:
+            try:
+                conn.commit()
+                conn.close()
+            except sqlite3.Error as e:
+                print(f"Error closing connection: {e}")
+        self._local = threading.local()
@@ -1,6 +1,8 @@
 from .base_repository import BaseRepository
-from app.models.order import Order
+from app.models.order import Order, OrderStatus
 from app.models.payment import Payment, PaymentStatus
+from app.utils.notifier import Notifier
+from datetime import date, datetime, timezone
 
 class OrderRepository(BaseRepository):
     """
@@ -8,57 +10,127 @@ class OrderRepository(BaseRepository):
     """
 
     def create_tables(self):
+        """Kept for older callers: the schema is owned by app/db/migrations.py."""
         try:
-            self.execute("""
-            CREATE TABLE IF NOT EXISTS orders (
-                order_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                total_amount REAL,
-                status TEXT
-            )""")
-            self.execute("""
-            CREATE TABLE IF NOT EXISTS payments (
-                payment_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                order_id INTEGER,
-                method TEXT CHECK(method IN ('Card','UPI','COD')),
-                status TEXT
-            )""")
+            self.migrate()
         except Exception as e:
             print(f"Failed to create order/payment tables: {e}")
 
     def create_order(self, user_id: int, total_amount: float, status: str = "Pending") -> int:
         try:
-            self.execute(
+            cursor = self.execute(
                 "INSERT INTO orders (user_id, total_amount, status) VALUES (?, ?, ?)",
                 (user_id, total_amount, status),
             )
-            return self.conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            order_id = cursor.lastrowid
+            # observers hear about committed status changes only
+            self.pool.after_commit(lambda: Notifier.notify(order_id, status))
+            return order_id
         except Exception as e:
             print(f"Failed to create order for user {user_id}: {e}")
             return -1
 
+    @staticmethod
+    def _row_to_order(r) -> Order:
+        return Order(r["order_id"], r["user_id"], r["total_amount"], r["status"],
+                     datetime.fromisoformat(r["order_date"]))
+
+    @staticmethod
+    def format_timestamp(value: datetime | date | str) -> str:
+        """Formats a bound the way orders.order_date is stored (UTC text)."""
+        if isinstance(value, datetime):
+            if value.tzinfo is not None:
+                value = value.astimezone(timezone.utc).replace(tzinfo=None)
+            return value.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        if isinstance(value, date):
+            return value.strftime("%Y-%m-%d")
+        return str(value)
+
     def get_orders_by_user(self, user_id: int):
+        """Full history, oldest first. Prefer get_orders_page for anything user-facing."""
         try:
-            rows = self.fetch_all("SELECT * FROM orders WHERE user_id = ?", (user_id,))
-            return [Order(r["order_id"], r["user_id"], r["total_amount"], r["status"]) for r in rows]
+            rows = self.fetch_all("SELECT * FROM orders WHERE user_id = ? ORDER BY order_date, order_id", (user_id,))
+            return [self._row_to_order(r) for r in rows]
         except Exception as e:
             print(f"Error fetching orders for user {user_id}: {e}")
             return []
 
+    def get_orders_page(self, user_id: int, page_size: int = 20, status: str | None = None,
+                        date_from: datetime | date | str | None = None,
+                        date_to: datetime | date | str | None = None,
+                        before_date: datetime | str | None = None, before_id: int | None = None) -> list[Order]:
+        """
+        Keyset pagination over one user's orders, newest first, ordered by (order_date, order_id).
+        Optional filters: status, and order_date in [date_from, date_to) (UTC).
+        Pass the last order's order_date and order_id as before_date/before_id
+        for the next page; each page is a seek on idx_orders_user_date.
+        """
+        if page_size <= 0:
+            raise ValueError("page_size must be > 0")
+        try:
+            where, params = ["user_id = ?"], [user_id]
+            if status is not None:
+                where.append("status = ?")
+                params.append(status)
+            if date_from is not None:
+                where.append("order_date >= ?")
+                params.append(self.format_timestamp(date_from))
+            if date_to is not None:
+                where.append("order_date < ?")
+                params.append(self.format_timestamp(date_to))
+            if before_id is not None:
+                if before_date is None:
+                    where.append("(order_date, order_id) < ((SELECT order_date FROM orders WHERE order_id = ?), ?)")
+                    params += [before_id, before_id]
+                else:
+                    where.append("(order_date, order_id) < (?, ?)")
+                    params += [self.format_timestamp(before_date), before_id]
+            rows = self.fetch_all(
+                f"SELECT * FROM orders WHERE {' AND '.join(where)} "
+                f"ORDER BY order_date DESC, order_id DESC LIMIT ?",
+                tuple(params) + (page_size,),
+            )
+            return [self._row_to_order(r) for r in rows]
+        except Exception as e:
+            print(f"Error fetching orders page for user {user_id}: {e}")
+            return []
+
     def update_order_status(self, order_id: int, new_status: str):
         try:
             self.execute("UPDATE orders SET status = ? WHERE order_id = ?", (new_status, order_id))
+            self.pool.after_commit(lambda: Notifier.notify(order_id, new_status))
         except Exception as e:
             print(f"Failed to update order {order_id}: {e}")
 
+    # --- Order Items ---
+    def add_order_items(self, order_id: int, items) -> None:
+        """Writes an order's lines, (book_id, quantity, unit_price) each, with one executemany."""
+        try:
+            self.executemany(
+                "INSERT INTO order_items (order_id, book_id, quantity, unit_price) VALUES (?, ?, ?, ?)",
+                [(order_id, int(b), int(q), float(p)) for b, q, p in items],
+            )
+        except Exception as e:
+            print(f"Failed to add items for order {order_id}: {e}")
+
+    def get_order_items(self, order_id: int) -> list[tuple[int, int, float]]:
+        try:
+            rows = self.fetch_all(
+                "SELECT book_id, quantity, unit_price FROM order_items WHERE order_id = ?", (order_id,)
+            )
+            return [(r["book_id"], r["quantity"], r["unit_price"]) for r in rows]
+        except Exception as e:
+            print(f"Error fetching items for order {order_id}: {e}")
+            return []
+
     # --- Payment Methods ---
     def add_payment(self, order_id: int, method: str, status: str = PaymentStatus.PENDING) -> int:
         try:
-            self.execute(
+            cursor = self.execute(
                 "INSERT INTO payments (order_id, method, status) VALUES (?, ?, ?)",
                 (order_id, method, status),
             )
-            return self.conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            return cursor.lastrowid
         except Exception as e:
             print(f"Failed to add payment for order {order_id}: {e}")
             return -1
@@ -69,6 +141,39 @@ class OrderRepository(BaseRepository):
         except Exception as e:
             print(f"Failed to update payment {payment_id}: {e}")
 
+    def settle_order(self, order_id: int, payment_id: int, payment_status: str, order_status: str) -> bool:
+        """
+        Moves a Pending order and its payment to their final statuses (call inside a
+        transaction). False if the order was already settled, so a payment answered
+        twice (e.g. by reconciliation) is applied once. DB errors propagate, so the
+        caller can retry rather than lose the settlement.
+        """
+        cursor = self.execute(
+            "UPDATE orders SET status = ? WHERE order_id = ? AND status = ?",
+            (order_status, order_id, OrderStatus.PENDING),
+        )
+        if cursor.rowcount == 0:
+            return False
+        self.execute("UPDATE payments SET status = ? WHERE payment_id = ?", (payment_status, payment_id))
+        self.pool.after_commit(lambda: Notifier.notify(order_id, order_status))
+        return True
+
+    def get_pending_payments(self, placed_before: datetime | str, limit: int = 1000) -> list[tuple[Payment, float]]:
+        """(payment, order total) for Pending payments of Pending orders placed before the bound, oldest first."""
+        try:
+            rows = self.fetch_all(
+                "SELECT p.payment_id, p.order_id, p.method, p.status, o.total_amount "
+                "FROM orders o JOIN payments p ON p.order_id = o.order_id "
+                "WHERE o.status = ? AND o.order_date < ? AND p.status = ? "
+                "ORDER BY o.order_date, o.order_id LIMIT ?",
+                (OrderStatus.PENDING, self.format_timestamp(placed_before), PaymentStatus.PENDING, limit),
+            )
+            return [(Payment(r["payment_id"], r["order_id"], r["method"], r["status"]), r["total_amount"])
+                    for r in rows]
+        except Exception as e:
+            print(f"Error fetching pending payments: {e}")
+            return []
+
     def get_payment_by_order(self, order_id: int) -> Payment | None:
         try:
             row = self.fetch_one("SELECT * FROM payments WHERE order_id = ?", (order_id,))
@@ -0,0 +1,166 @@
+# app/repositories/reservation_repository.py
+import json
+import time
+
+from .base_repository import BaseRepository
+
+
+class ReservationError(RuntimeError):
+    """
+    Raised when holds could not be written (e.g. the database is locked). The
+    transaction was rolled back, so nothing changed and the call may be retried;
+    it never means the stock ran out.
+    """
+
+
+class ReservationRepository(BaseRepository):
+    """
+    Time-limited stock holds (stock_holds, migration 11).
+    A user holds at most one quantity per book; books.reserved is kept equal to the
+    sum of each book's holds, so available stock is stock - reserved.
+    Every change runs in one transaction (BEGIN IMMEDIATE), so availability checks
+    and the writes that depend on them cannot interleave with another writer.
+    Expired holds keep counting until released: reserve() releases the expired holds
+    of the books it touches, and release_expired() (the sweeper) releases the rest.
+    """
+    default_ttl = 900.0   # seconds a hold lives without being renewed
+
+    def _release_where(self, where: str, params: tuple, index: str | None = None) -> int:
+        """
+        Deletes the holds matching `where` and gives their quantities back (caller holds a
+        transaction). `index` pins the index both statements read the holds through.
+        """
+        source = f"stock_holds INDEXED BY {index}" if index else "stock_holds"
+        with self.pool.connection() as conn:
+            conn.execute(
+                f"""
+                UPDATE books SET reserved = books.reserved - h.qty
+                FROM (SELECT book_id, SUM(quantity) AS qty FROM {source} WHERE {where} GROUP BY book_id) AS h
+                WHERE books.book_id = h.book_id
+                """,
+                params,
+            )
+            return conn.execute(f"DELETE FROM {source} WHERE {where}", params).rowcount
+
+    def reserve(self, user_id: int, lines: dict[int, int], ttl: float | None = None,
+                now: float | None = None) -> dict[int, int]:
+        """
+        Sets the user's hold on each book to {book_id: qty} (0 releases it) and renews
+        its expiry. Lines that do not fit are left unchanged and returned as
+        {book_id: quantity available to this user} (0 for unknown books).
+        Raises ReservationError when the holds could not be written at all.
+        """
+        if not lines:
+            return {}
+        if any(qty < 0 for qty in lines.values()):
+            raise ValueError("quantities must be >= 0")
+        now = time.time() if now is None else now
+        expires_at = now + (ReservationRepository.default_ttl if ttl is None else ttl)
+        ids = json.dumps([int(b) for b in lines])
+        failures = {}
+        try:
+            with self.transaction():
+                self._release_where("book_id IN (SELECT value FROM json_each(?)) AND expires_at <= ?", (ids, now))
+                rows = self.fetch_all(
+                    """
+                    SELECT b.book_id, b.stock - b.reserved + COALESCE(h.quantity, 0) AS available,
+                           COALESCE(h.quantity, 0) AS held
+                    FROM books b LEFT JOIN stock_holds h ON h.user_id = ? AND h.book_id = b.book_id
+                    WHERE b.book_id IN (SELECT value FROM json_each(?))
+                    """,
+                    (user_id, ids),
+                )
+                found = {r["book_id"]: (r["available"], r["held"]) for r in rows}
+                deltas, holds, released = [], [], []
+                for book_id, qty in lines.items():
+                    available, held = found.get(book_id, (0, 0))
+                    if book_id not in found or qty > available:
+                        failures[book_id] = available
+                        continue
+                    if qty != held:
+                        deltas.append((qty - held, book_id))
+                    if qty:
+                        holds.append((user_id, book_id, qty, expires_at))
+                    elif held:
+                        released.append((user_id, book_id))
+                if deltas:
+                    self.executemany("UPDATE books SET reserved = reserved + ? WHERE book_id = ?", deltas)
+                if holds:
+                    self.executemany(
+                        "INSERT INTO stock_holds (user_id, book_id, quantity, expires_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(user_id, book_id) DO UPDATE SET quantity = excluded.quantity, "
+                        "expires_at = excluded.expires_at",
+                        holds,
+                    )
+                if released:
+                    self.executemany("DELETE FROM stock_holds WHERE user_id = ? AND book_id = ?", released)
+            return failures
+        except Exception as e:
+            # not a stock-out: callers must be able to tell the two apart
+            raise ReservationError(f"Could not reserve stock for user {user_id}: {e}") from e
+
+    def release(self, user_id: int, book_ids=None) -> int:
+        """Releases the user's holds on `book_ids` (all of them when None); returns holds released."""
+        try:
+            with self.transaction():
+                if book_ids is None:
+                    return self._release_where("user_id = ?", (user_id,))
+                ids = json.dumps([int(b) for b in book_ids])
+                return self._release_where("user_id = ? AND book_id IN (SELECT value FROM json_each(?))",
+                                           (user_id, ids))
+        except Exception as e:
+            print(f"Failed to release holds for user {user_id}: {e}")
+            return 0
+
+    def release_expired(self, now: float | None = None, batch_size: int = 10_000) -> int:
+        """
+        Releases every hold expired at `now`, oldest first, `batch_size` at a time (one
+        short transaction each). Only expired rows are read, via idx_stock_holds_expiry.
+        """
+        now = time.time() if now is None else now
+        released = 0
+        try:
+            while True:
+                # expiry of the batch_size-th expired hold: the batch covers everything up to it
+                row = self.fetch_one(
+                    "SELECT expires_at FROM stock_holds WHERE expires_at <= ? ORDER BY expires_at LIMIT 1 OFFSET ?",
+                    (now, batch_size - 1),
+                )
+                cutoff = now if row is None else row["expires_at"]
+                with self.transaction():
+                    # GROUP BY book_id would otherwise tempt the planner into walking every hold
+                    count = self._release_where("expires_at <= ?", (cutoff,), "idx_stock_holds_expiry")
+                released += count
+                if row is None or count == 0:
+                    return released
+        except Exception as e:
+            print(f"Failed to release expired holds: {e}")
+            return released
+
+    def get_available(self, book_ids) -> dict[int, int]:
+        """{book_id: stock - reserved} for the given books (missing books are absent)."""
+        try:
+            rows = self.fetch_all(
+                "SELECT book_id, stock - reserved AS available FROM books "
+                "WHERE book_id IN (SELECT value FROM json_each(?))",
+                (json.dumps([int(b) for b in book_ids]),),
+            )
+            return {r["book_id"]: r["available"] for r in rows}
+        except Exception as e:
+            print(f"Error fetching available stock: {e}")
+            return {}
+
+    def get_user_holds(self, user_id: int) -> dict[int, int]:
+        try:
+            rows = self.fetch_all("SELECT book_id, quantity FROM stock_holds WHERE user_id = ?", (user_id,))
+            return {r["book_id"]: r["quantity"] for r in rows}
+        except Exception as e:
+            print(f"Error fetching holds for user {user_id}: {e}")
+            return {}
+
+    def count_holds(self) -> int:
+        try:
+            return self.fetch_one("SELECT COUNT(*) AS n FROM stock_holds")["n"]
+        except Exception as e:
+            print(f"Error counting holds: {e}")
+            return 0
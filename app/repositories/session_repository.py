@@ -0,0 +1,61 @@
+# app/repositories/session_repository.py
+from .base_repository import BaseRepository
+
+
+class SessionRepository(BaseRepository):
+    """
+    Persistence for SessionStore (sessions table, migration 10).
+    Rows are keyed by the token's SHA-256, never the token itself.
+    """
+
+    def save_session(self, token_hash: str, user_id: int, expires_at: float) -> bool:
+        """Writes a new session (SessionStore.create); use extend_session for renewals."""
+        try:
+            self.execute(
+                "INSERT INTO sessions (token_hash, user_id, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(token_hash) DO UPDATE SET expires_at = excluded.expires_at",
+                (token_hash, user_id, expires_at),
+            )
+            return True
+        except Exception as e:
+            print(f"Failed to save session for user {user_id}: {e}")
+            return False
+
+    def extend_session(self, token_hash: str, expires_at: float) -> bool:
+        """
+        Moves an existing session's expiry. Never inserts, so a renewal racing a
+        logout cannot bring the deleted row back. False if the row is gone.
+        """
+        try:
+            return self.execute(
+                "UPDATE sessions SET expires_at = ? WHERE token_hash = ?", (expires_at, token_hash)
+            ).rowcount > 0
+        except Exception as e:
+            print(f"Failed to extend session: {e}")
+            return False
+
+    def get_session(self, token_hash: str, now: float):
+        """Returns (user_id, expires_at) for a live session, else None."""
+        try:
+            row = self.fetch_one(
+                "SELECT user_id, expires_at FROM sessions WHERE token_hash = ? AND expires_at > ?",
+                (token_hash, now),
+            )
+            return None if row is None else (row["user_id"], row["expires_at"])
+        except Exception as e:
+            print(f"Error fetching session: {e}")
+            return None
+
+    def delete_session(self, token_hash: str) -> None:
+        try:
+            self.execute("DELETE FROM sessions WHERE token_hash = ?", (token_hash,))
+        except Exception as e:
+            print(f"Failed to delete session: {e}")
+
+    def delete_expired(self, now: float) -> int:
+        """Range delete on idx_sessions_expiry: touches only the expired rows."""
+        try:
+            return self.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+        except Exception as e:
+            print(f"Failed to delete expired sessions: {e}")
+            return 0
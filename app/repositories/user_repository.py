@@ -1,48 +1,138 @@
 from .base_repository import BaseRepository
 from app.models.user import User, Customer, Admin
+from app.utils.password_hasher import PasswordHasher, get_default_hasher
 
 class UserRepository(BaseRepository):
     """
     Handles CRUD for User table with error handling.
+    Passwords are stored as salted KDF hashes, never as plain text.
     """
+    hasher: PasswordHasher | None = None   # None -> app-wide default
+
+    def password_hasher(self) -> PasswordHasher:
+        return self.hasher or get_default_hasher()
 
     def create_table(self):
+        """Kept for older callers: the schema is owned by app/db/migrations.py."""
         try:
-            self.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT,
-                email TEXT UNIQUE,
-                password TEXT,
-                role TEXT,
-                address TEXT
-            )""")
+            self.migrate()
         except Exception as e:
             print(f"Failed to create users table: {e}")
 
-    def add_user(self, name: str, email: str, password: str, role: str, address: str = "") -> int:
+    def add_user(self, name: str, email: str, password: str, role: str, address: str = "",
+                 password_hash: str | None = None) -> int:
+        """Hashes `password` unless a precomputed `password_hash` is given (e.g. from hash_async)."""
         try:
-            self.execute(
+            encoded = password_hash or self.password_hasher().hash(password)
+            cursor = self.execute(
                 "INSERT INTO users (name, email, password, role, address) VALUES (?, ?, ?, ?, ?)",
-                (name, email, password, role, address),
+                (name, email, encoded, role, address),
             )
-            return self.conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            return cursor.lastrowid
         except Exception as e:
             print(f"Failed to add user {email}: {e}")
             return -1
 
+    @staticmethod
+    def _row_to_user(row) -> User:
+        if row["role"] == "admin":
+            return Admin(row["user_id"], row["name"], row["email"], row["password"])
+        return Customer(row["user_id"], row["name"], row["email"], row["password"], row["address"])
+
     def get_user_by_email(self, email: str) -> User | None:
         try:
             row = self.fetch_one("SELECT * FROM users WHERE email = ?", (email,))
-            if row is None:
-                return None
-            if row["role"] == "admin":
-                return Admin(row["user_id"], row["name"], row["email"], row["password"])
-            return Customer(row["user_id"], row["name"], row["email"], row["password"], row["address"])
+            return None if row is None else self._row_to_user(row)
         except Exception as e:
             print(f"Error fetching user {email}: {e}")
             return None
 
+    def get_user_by_id(self, user_id: int) -> User | None:
+        try:
+            row = self.fetch_one("SELECT * FROM users WHERE user_id = ?", (user_id,))
+            return None if row is None else self._row_to_user(row)
+        except Exception as e:
+            print(f"Error fetching user {user_id}: {e}")
+            return None
+
+    def update_password_hash(self, user_id: int, new_hash: str, old_hash: str | None = None) -> bool:
+        """
+        Stores a new encoded hash. With `old_hash`, only replaces that exact value,
+        so a concurrent password change is never overwritten by a login-time upgrade.
+        """
+        try:
+            if old_hash is None:
+                cursor = self.execute("UPDATE users SET password = ? WHERE user_id = ?", (new_hash, user_id))
+            else:
+                cursor = self.execute(
+                    "UPDATE users SET password = ? WHERE user_id = ? AND password = ?",
+                    (new_hash, user_id, old_hash),
+                )
+            return cursor.rowcount > 0
+        except Exception as e:
+            print(f"Failed to update password for user {user_id}: {e}")
+            return False
+
+    # --- Aggregate / existence queries (index-only, independent of table size) ---
+    def count_by_role(self, role: str) -> int:
+        try:
+            return self.fetch_one("SELECT COUNT(*) AS n FROM users WHERE role = ?", (role,))["n"]
+        except Exception as e:
+            print(f"Error counting {role} users: {e}")
+            return 0
+
+    def email_exists(self, email: str) -> bool:
+        try:
+            return self.fetch_one("SELECT 1 FROM users WHERE email = ? LIMIT 1", (email,)) is not None
+        except Exception as e:
+            print(f"Error checking email {email}: {e}")
+            return False
+
+    # --- Paged / streaming listings (no password hashes) ---
+    LIST_COLUMNS = "user_id, name, email, role, address"
+
+    def get_users_page(self, page_size: int = 20, after_id: int | None = None, role: str | None = None) -> list:
+        """
+        Keyset pagination by user_id: the next `page_size` users after `after_id`,
+        optionally of one role. Each page is an index seek, however deep.
+        """
+        if page_size <= 0:
+            raise ValueError("page_size must be > 0")
+        try:
+            clauses, params = [], []
+            if after_id is not None:
+                clauses.append("user_id > ?")
+                params.append(after_id)
+            if role is not None:
+                clauses.append("role = ?")
+                params.append(role)
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            return self.fetch_all(
+                f"SELECT {UserRepository.LIST_COLUMNS} FROM users {where} ORDER BY user_id LIMIT ?",
+                tuple(params) + (page_size,),
+            )
+        except Exception as e:
+            print(f"Error fetching users page: {e}")
+            return []
+
+    def iter_users(self, batch_size: int = 500, role: str | None = None):
+        """Streams users in user_id order with fetchmany, holding at most `batch_size` rows."""
+        try:
+            with self.pool.connection() as conn:
+                if role is None:
+                    cursor = conn.execute(f"SELECT {UserRepository.LIST_COLUMNS} FROM users ORDER BY user_id")
+                else:
+                    cursor = conn.execute(
+                        f"SELECT {UserRepository.LIST_COLUMNS} FROM users WHERE role = ? ORDER BY user_id", (role,)
+                    )
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield from rows
+        except Exception as e:
+            print(f"Error streaming users: {e}")
+
     def get_all_users(self):
         try:
             return self.fetch_all("SELECT * FROM users")
@@ -0,0 +1,153 @@
+# app/utils/book_import.py
+"""
+Streaming bulk import of catalog feeds (CSV or JSONL) into the books table.
+Rows are validated with Book.validate_fields, written in chunked executemany
+transactions, and the import can resume from its last committed line.
+"""
+import csv
+import json
+import math
+import os
+import time
+from typing import Iterator
+
+from app.models.book import Book
+from app.repositories.book_repository import BookRepository
+
+
+class FeedError(ValueError):
+    """A single feed record that could not be parsed."""
+
+
+def iter_feed(path: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    """
+    Streams (line_no, record, error) from a .csv or .jsonl/.ndjson file.
+    CSV needs a header with title, author, price, stock columns.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as fh:
+            reader = csv.DictReader(fh)
+            missing = {"title", "author", "price", "stock"} - set(reader.fieldnames or [])
+            if missing:
+                raise FeedError(f"CSV header is missing: {', '.join(sorted(missing))}")
+            for record in reader:
+                yield reader.line_num, record, None
+    elif ext in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as fh:
+            for line_no, line in enumerate(fh, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_no, None, f"Invalid JSON: {e.msg}"
+                    continue
+                if not isinstance(record, dict):
+                    yield line_no, None, "Expected a JSON object."
+                    continue
+                yield line_no, record, None
+    else:
+        raise FeedError(f"Unsupported feed type '{ext}' (use .csv or .jsonl).")
+
+
+def parse_record(record: dict) -> tuple[str, str, float, int]:
+    """Coerces one feed record and applies the same rules as AdminController.add_book."""
+    title = str(record.get("title") or "").strip()
+    author = str(record.get("author") or "").strip()
+    try:
+        price = float(record.get("price"))
+    except (TypeError, ValueError):
+        raise FeedError(f"Invalid price: {record.get('price')!r}")
+    if not math.isfinite(price):
+        raise FeedError(f"Invalid price: {record.get('price')!r}")
+    raw_stock = record.get("stock")
+    try:
+        if isinstance(raw_stock, bool):
+            raise ValueError
+        stock = raw_stock if isinstance(raw_stock, int) else int(str(raw_stock).strip())
+    except (TypeError, ValueError):
+        raise FeedError(f"Invalid stock: {raw_stock!r}")
+    error = Book.validate_fields(title, author, price, stock)
+    if error:
+        raise FeedError(error)
+    return title, author, price, stock
+
+
+class ImportReport:
+    """
+    Outcome of one import run.
+    rejected keeps the first `max_rejects` (line_no, reason) pairs; rejected_count has them all.
+    """
+    __slots__ = ("source", "imported", "skipped", "rejected", "rejected_count",
+                 "resumed_from", "elapsed", "completed", "max_rejects")
+
+    def __init__(self, source: str, resumed_from: int = 0, max_rejects: int = 1000):
+        self.source = source
+        self.imported = 0
+        self.skipped = 0
+        self.rejected: list[tuple[int, str]] = []
+        self.rejected_count = 0
+        self.resumed_from = resumed_from
+        self.elapsed = 0.0
+        self.completed = False
+        self.max_rejects = max_rejects
+
+    def reject(self, line_no: int, reason: str) -> None:
+        self.rejected_count += 1
+        if len(self.rejected) < self.max_rejects:
+            self.rejected.append((line_no, reason))
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.imported / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (f"<ImportReport imported={self.imported} rejected={self.rejected_count} "
+                f"skipped={self.skipped} {self.rows_per_second:.0f} rows/s>")
+
+
+class BookImporter:
+    """
+    Imports a feed in chunks of `chunk_size` rows. Each chunk and the checkpoint
+    (last line consumed) commit together, so re-running after a crash resumes
+    exactly where the last committed chunk ended.
+    """
+
+    def __init__(self, book_repo: BookRepository | None = None, chunk_size: int = 5000):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be > 0")
+        self.book_repo = book_repo or BookRepository()
+        self.chunk_size = chunk_size
+
+    def run(self, path: str, resume: bool = True) -> ImportReport:
+        source = os.path.abspath(path)
+        if not resume:
+            self.book_repo.clear_import_checkpoint(source)
+        start_after = self.book_repo.get_import_checkpoint(source)
+        report = ImportReport(source, resumed_from=start_after)
+
+        started = time.perf_counter()
+        pending: list[tuple] = []
+        last_line = start_after
+        for line_no, record, error in iter_feed(path):
+            if line_no <= start_after:
+                report.skipped += 1
+                continue
+            last_line = line_no
+            if error is None:
+                try:
+                    pending.append(parse_record(record))
+                except FeedError as e:
+                    error = str(e)
+            if error is not None:
+                report.reject(line_no, error)
+            if len(pending) >= self.chunk_size:
+                report.imported += self.book_repo.add_books_bulk(pending, source, last_line)
+                pending = []
+        # final (possibly empty) chunk also records that trailing rejected lines were consumed
+        if pending or last_line > start_after:
+            report.imported += self.book_repo.add_books_bulk(pending, source, last_line)
+        report.elapsed = time.perf_counter() - started
+        report.completed = True
+        return report
@@ -0,0 +1,193 @@
+# app/utils/cart_cache.py
+"""
+Bounded, write-behind cache of live carts.
+
+Carts stay in memory in LRU order under an entry budget and a total-lines
+budget (lines are what a cart's memory grows with). Mutations only mark a
+cart dirty; a flusher thread writes dirty carts every `flush_interval`, so a
+burst of edits to one cart coalesces into a single save. A cart is written
+synchronously when it is evicted, when flush(user_id) forces it (checkout),
+and for every dirty cart on close().
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+from app.models.cart import Cart
+
+
+class CartCache:
+    def __init__(self, loader: Callable[[int], Cart], saver: Callable[[int, Cart], bool],
+                 max_entries: int = 10_000, max_lines: int = 500_000, flush_interval: float = 0.5):
+        if max_entries <= 0 or max_lines <= 0:
+            raise ValueError("max_entries and max_lines must be > 0")
+        self._loader = loader
+        self._saver = saver
+        self.max_entries = max_entries
+        self.max_lines = max_lines
+        self.flush_interval = flush_interval
+        self._entries: OrderedDict[int, list] = OrderedDict()   # user_id -> [cart, lines]
+        self._lines = 0
+        self._dirty: OrderedDict[int, None] = OrderedDict()
+        self._evicting: dict[int, Cart] = {}   # evicted, save still in progress
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()        # one save at a time, so saves land in order
+        self._wake = threading.Condition(self._lock)
+        self._closed = False
+        self._stop = threading.Event()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "marks": 0, "saves": 0, "save_failures": 0}
+        self._flusher = threading.Thread(target=self._run, name="cart-flusher", daemon=True)
+        self._flusher.start()
+
+    # --- Access ---
+    def get(self, user_id: int) -> Cart:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+                self.stats["hits"] += 1
+                return entry[0]
+            cart = self._evicting.get(user_id)
+            self.stats["misses"] += 1
+        if cart is None:
+            try:
+                saved = self._loader(user_id)
+                cart = saved if saved is not None else Cart(user_id)
+            except Exception:
+                cart = Cart(user_id)   # fall back to an empty cart if the DB read fails
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:      # another thread loaded it meanwhile
+                return entry[0]
+            self._entries[user_id] = [cart, len(cart.items)]
+            self._lines += len(cart.items)
+            victims = self._evict_locked()
+        self._save_evicted(victims)
+        return cart
+
+    def mark_dirty(self, cart: Cart) -> None:
+        """Call after mutating a cart returned by get(); it is saved write-behind."""
+        user_id = cart.user_id
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] is not cart:
+                # evicted (or replaced) while the caller was editing it: this copy is the latest
+                if entry is not None:
+                    self._lines -= entry[1]
+                entry = self._entries[user_id] = [cart, 0]
+            self._entries.move_to_end(user_id)
+            lines = len(cart.items)
+            self._lines += lines - entry[1]
+            entry[1] = lines
+            self._dirty[user_id] = None
+            self._wake.notify()
+            self.stats["marks"] += 1
+            victims = self._evict_locked()
+        self._save_evicted(victims)
+
+    # --- Eviction ---
+    def _evict_locked(self) -> list[tuple[int, Cart, bool]]:
+        victims = []
+        # never evict the most recently used cart: the caller is about to use it
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._lines > self.max_lines):
+            user_id, (cart, lines) = self._entries.popitem(last=False)
+            self._lines -= lines
+            dirty = user_id in self._dirty
+            if dirty:
+                del self._dirty[user_id]
+                self._evicting[user_id] = cart
+            victims.append((user_id, cart, dirty))
+            self.stats["evictions"] += 1
+        return victims
+
+    def _save_evicted(self, victims: list[tuple[int, Cart, bool]]) -> None:
+        for user_id, cart, dirty in victims:
+            if not dirty:
+                continue
+            saved = self._save(user_id, cart)
+            with self._lock:
+                self._evicting.pop(user_id, None)
+                if not saved and user_id not in self._entries:
+                    # keep the unsaved cart rather than lose it; the flusher retries
+                    self._entries[user_id] = [cart, len(cart.items)]
+                    self._entries.move_to_end(user_id, last=False)
+                    self._lines += len(cart.items)
+                    self._dirty[user_id] = None
+
+    # --- Flushing ---
+    def _save(self, user_id: int, cart: Cart) -> bool:
+        with self._io_lock:
+            return self._save_locked(user_id, cart)
+
+    def _save_locked(self, user_id: int, cart: Cart) -> bool:
+        ok = self._saver(user_id, cart) is not False
+        with self._lock:
+            self.stats["saves" if ok else "save_failures"] += 1
+        return ok
+
+    def flush(self, user_id: int | None = None) -> bool:
+        """
+        Writes one user's cart (or every dirty cart) now and returns False if a save failed.
+        A cart is taken off the dirty list only under the I/O lock, so when flush(user_id)
+        returns, any earlier edit to that cart is on disk.
+        """
+        with self._lock:
+            budget = len(self._dirty) if user_id is None else 1
+        failed = []
+        for _ in range(budget):
+            with self._io_lock:
+                with self._lock:
+                    if user_id is None:
+                        if not self._dirty:
+                            break
+                        uid = self._dirty.popitem(last=False)[0]
+                    elif user_id in self._dirty:
+                        uid = user_id
+                        del self._dirty[uid]
+                    else:
+                        uid = None
+                    entry = self._entries.get(uid) if uid is not None else None
+                    # a cart mid-eviction is saved here too; the evicting thread's save is then a no-op
+                    cart = entry[0] if entry is not None else self._evicting.get(user_id)
+                if cart is None:
+                    continue
+                if not self._save_locked(cart.user_id, cart):
+                    failed.append(cart.user_id)
+        if failed:
+            with self._lock:
+                for uid in failed:
+                    if uid in self._entries:
+                        self._dirty[uid] = None
+        return not failed
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._dirty and not self._closed:
+                    self._wake.wait()
+                if self._closed:
+                    return
+            # linger so later edits to the same carts coalesce; close() cuts it short
+            if self._stop.wait(self.flush_interval):
+                return
+            self.flush()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._dirty)
+
+    def close(self) -> bool:
+        """Stops the flusher and writes every dirty cart."""
+        with self._lock:
+            self._closed = True
+            self._wake.notify_all()
+        self._stop.set()
+        self._flusher.join()
+        return self.flush()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def lines(self) -> int:
+        return self._lines
@@ -0,0 +1,53 @@
+# app/utils/hold_sweeper.py
+"""
+Background release of expired stock holds.
+
+Holds that outlive their TTL keep counting against stock until released.
+reserve() releases the expired holds of the books it touches, so contended
+books recover immediately; the sweeper returns everything else, reading
+only expired rows through idx_stock_holds_expiry and releasing them in
+short batched transactions so checkout never waits behind a long sweep.
+"""
+import threading
+
+from app.repositories.reservation_repository import ReservationRepository
+
+
+class HoldSweeper:
+    def __init__(self, repo: ReservationRepository | None = None, interval: float = 30.0,
+                 batch_size: int = 10_000):
+        if interval <= 0 or batch_size <= 0:
+            raise ValueError("interval and batch_size must be > 0")
+        self.repo = repo if repo is not None else ReservationRepository()
+        self.interval = interval
+        self.batch_size = batch_size
+        self.released = 0
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def sweep(self) -> int:
+        """Releases every hold expired now; returns how many were released."""
+        count = self.repo.release_expired(batch_size=self.batch_size)
+        self.released += count
+        return count
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(self.interval):
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"Hold sweep failed: {e}")
+
+        self._thread = threading.Thread(target=run, name="hold-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
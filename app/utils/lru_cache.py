@@ -0,0 +1,86 @@
+# app/utils/lru_cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU cache with optional TTL and hit/miss counters.
+    Used by repositories as an in-process read-through cache.
+    """
+    _MISSING = object()
+
+    def __init__(self, max_size: int = 1024, ttl: float | None = None):
+        if max_size <= 0:
+            raise ValueError("max_size must be > 0")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be > 0 (or None to disable)")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def token(self) -> int:
+        """
+        Snapshot taken before a read-through load. Passing it to put() drops the
+        value if anything was invalidated meanwhile, so a slow reader can never
+        re-cache a row that a concurrent writer just replaced.
+        """
+        return self._generation
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, LRUCache._MISSING)
+            if entry is LRUCache._MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if self.ttl is not None and time.monotonic() >= expires_at:
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, token: int | None = None) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else 0.0
+        with self._lock:
+            if token is not None and token != self._generation:
+                return
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,28 +1,193 @@
 # app/utils/notifier.py
+"""
+Order status notifications as a background event bus.
+
+Notifier.notify() (order status) and Notifier.notify_low_stock() only record
+the event in each observer's mailbox and return; a dispatcher thread per
+observer delivers batches to it. Within a mailbox, repeated events for the
+same order (or book) coalesce to the latest one, and a full mailbox drops its
+oldest event, so a slow observer never stalls the caller or the other observers.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
 class Observer:
     def update(self, order_id: int, status: str):
         raise NotImplementedError
 
+    def update_batch(self, events: list[tuple[int, str]]):
+        """Receives (order_id, status) pairs in arrival order; override to handle a batch at once."""
+        for order_id, status in events:
+            self.update(order_id, status)
+
+    def low_stock(self, book_id: int, title: str, stock: int, threshold: int):
+        """A book's stock fell below its reorder threshold. Ignored unless overridden."""
+
+    def low_stock_batch(self, alerts: list[tuple[int, str, int, int]]):
+        for book_id, title, stock, threshold in alerts:
+            self.low_stock(book_id, title, stock, threshold)
+
 class CustomerNotifier(Observer):
     def update(self, order_id: int, status: str):
         print(f"Notification to Customer: Order #{order_id} is now {status}.")
 
+    def update_batch(self, events: list[tuple[int, str]]):
+        print("\n".join(f"Notification to Customer: Order #{o} is now {s}." for o, s in events))
+
 class AdminNotifier(Observer):
     def update(self, order_id: int, status: str):
         print(f"Notification to Admin: Order #{order_id} changed to {status}.")
 
+    def update_batch(self, events: list[tuple[int, str]]):
+        print("\n".join(f"Notification to Admin: Order #{o} changed to {s}." for o, s in events))
+
+    def low_stock(self, book_id: int, title: str, stock: int, threshold: int):
+        print(f"Notification to Admin: '{title}' (ID {book_id}) is low on stock: {stock} left (reorder at {threshold}).")
+
+    def low_stock_batch(self, alerts: list[tuple[int, str, int, int]]):
+        print("\n".join(f"Notification to Admin: '{t}' (ID {b}) is low on stock: {s} left (reorder at {r})."
+                        for b, t, s, r in alerts))
+
+
+class _Mailbox:
+    """
+    Per-observer bounded, coalescing queue drained by its own dispatcher thread.
+    Events are keyed by (topic, key): ("order", order_id) or ("low_stock", book_id).
+    """
+
+    def __init__(self, observer: Observer, capacity: int, max_batch: int, linger: float):
+        self.observer = observer
+        self.capacity = capacity
+        self.max_batch = max_batch
+        self.linger = linger
+        self.pending: OrderedDict[tuple, object] = OrderedDict()
+        self.cond = threading.Condition()
+        self.busy = False
+        self.closed = False
+        self.stats = {"enqueued": 0, "coalesced": 0, "dropped": 0, "delivered": 0, "batches": 0, "errors": 0}
+        self.thread = threading.Thread(target=self._run, daemon=True,
+                                       name=f"notifier-{type(observer).__name__}")
+        self.thread.start()
+
+    def put(self, topic: str, key: int, value) -> None:
+        with self.cond:
+            if (topic, key) in self.pending:
+                # keep the original queue position, deliver only the latest value
+                self.pending[(topic, key)] = value
+                self.stats["coalesced"] += 1
+                return
+            if len(self.pending) >= self.capacity:
+                self.pending.popitem(last=False)
+                self.stats["dropped"] += 1
+            self.pending[(topic, key)] = value
+            self.stats["enqueued"] += 1
+            if len(self.pending) == 1 or len(self.pending) >= self.max_batch:
+                self.cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.pending or self.closed)
+                if not self.pending and self.closed:
+                    return
+            if self.linger:
+                # let a burst accumulate (and coalesce) before delivering
+                time.sleep(self.linger)
+            with self.cond:
+                batch = []
+                while self.pending and len(batch) < self.max_batch:
+                    batch.append(self.pending.popitem(last=False))
+                self.busy = True
+            try:
+                orders = [(key, value) for (topic, key), value in batch if topic == "order"]
+                alerts = [value for (topic, key), value in batch if topic == "low_stock"]
+                if orders:
+                    self.observer.update_batch(orders)
+                if alerts:
+                    self.observer.low_stock_batch(alerts)
+                self.stats["delivered"] += len(batch)
+                self.stats["batches"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Notifier observer {type(self.observer).__name__} failed: {e}")
+            finally:
+                with self.cond:
+                    self.busy = False
+                    self.cond.notify_all()
+
+    def drained(self) -> bool:
+        return not self.pending and not self.busy
+
+    def close(self, timeout: float | None) -> None:
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join(timeout)
+
+
 class Notifier:
     """
     Observable — manages observers and broadcasts updates.
-    Implements Observer pattern.
+    Implements Observer pattern; delivery is asynchronous and batched (see module docstring).
     """
     observers: list[Observer] = []
+    _mailboxes: dict[int, _Mailbox] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def register(cls, observer: Observer, capacity: int = 10_000, max_batch: int = 100,
+                 linger: float = 0.005):
+        """
+        capacity: distinct orders buffered for this observer before the oldest is dropped.
+        max_batch: most events handed to one update_batch call.
+        linger: seconds a dispatcher waits for more events before delivering.
+        """
+        with cls._lock:
+            if id(observer) in cls._mailboxes:
+                return
+            cls._mailboxes[id(observer)] = _Mailbox(observer, capacity, max_batch, linger)
+            cls.observers.append(observer)
 
     @classmethod
-    def register(cls, observer: Observer):
-        cls.observers.append(observer)
+    def unregister(cls, observer: Observer, timeout: float | None = 5.0):
+        """Stops delivering to observer after flushing what it already has queued."""
+        with cls._lock:
+            mailbox = cls._mailboxes.pop(id(observer), None)
+            if observer in cls.observers:
+                cls.observers.remove(observer)
+        if mailbox is not None:
+            mailbox.close(timeout)
 
     @classmethod
     def notify(cls, order_id: int, status: str):
-        for observer in cls.observers:
-            observer.update(order_id, status)
+        for mailbox in list(cls._mailboxes.values()):
+            mailbox.put("order", order_id, status)
+
+    @classmethod
+    def notify_low_stock(cls, book_id: int, title: str, stock: int, threshold: int):
+        for mailbox in list(cls._mailboxes.values()):
+            mailbox.put("low_stock", book_id, (book_id, title, stock, threshold))
+
+    @classmethod
+    def flush(cls, timeout: float | None = None) -> bool:
+        """Blocks until every observer has received everything notified so far; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for mailbox in list(cls._mailboxes.values()):
+            with mailbox.cond:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                if not mailbox.cond.wait_for(mailbox.drained, remaining):
+                    return False
+        return True
+
+    @classmethod
+    def stats(cls) -> dict[str, dict[str, int]]:
+        return {f"{i}:{type(m.observer).__name__}": dict(m.stats)
+                for i, m in enumerate(list(cls._mailboxes.values()))}
+
+    @classmethod
+    def shutdown(cls, timeout: float | None = 5.0):
+        """Flushes and stops every dispatcher thread."""
+        for observer in list(cls.observers):
+            cls.unregister(observer, timeout)
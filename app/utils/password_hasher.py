@@ -0,0 +1,257 @@
+# app/utils/password_hasher.py
+"""
+Salted password hashing with standard-library KDFs.
+
+Encoded hashes carry their own algorithm and cost, so the configured cost can
+change at any time and every stored hash still verifies:
+
+    scrypt$n=16384,r=8,p=1$<salt b64>$<hash b64>
+    pbkdf2_sha256$600000$<salt b64>$<hash b64>
+
+A value without that algo$params$salt$hash shape is a legacy plain-text
+password: it still verifies (constant-time compare) and needs_rehash()
+reports it for upgrade. A value with the shape that cannot be verified here
+(unknown algorithm, scrypt missing from this build, malformed fields) never
+verifies: comparing it as plain text would let the stored hash itself work
+as the password.
+KDF calls release the GIL, so hash_async/verify_async scale across cores.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import re
+import secrets
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+def _b64(raw: bytes) -> str:
+    return base64.b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _unb64(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+# algo$params$salt$hash; salt and hash are unpadded base64
+_ENCODED = re.compile(r"[a-z][a-z0-9_]*\$[A-Za-z0-9=,._-]+\$[A-Za-z0-9+/]+\$[A-Za-z0-9+/]+")
+_SCRYPT_PARAMS = re.compile(r"n=\d+,r=\d+,p=\d+")
+
+
+class UnverifiableHashError(ValueError):
+    """An encoded hash that cannot be verified here: unknown or unavailable algorithm, or malformed."""
+
+
+class PasswordHasher:
+    """Base class: hash(), verify() against any supported format, needs_rehash()."""
+    algorithm = ""
+
+    _executor: ThreadPoolExecutor | None = None
+    _executor_lock = threading.Lock()
+
+    def hash(self, password: str) -> str:
+        raise NotImplementedError
+
+    def params(self) -> str:
+        """The cost part of this hasher's encoded hashes."""
+        raise NotImplementedError
+
+    def spec(self) -> str:
+        """Compact description accepted by hasher_from_spec(), e.g. 'scrypt:n=16384,r=8,p=1'."""
+        raise NotImplementedError
+
+    def verify(self, password: str, encoded: str) -> bool:
+        try:
+            hasher = identify(encoded)
+        except UnverifiableHashError:
+            return False   # never fall back to comparing a hash as plain text
+        if hasher is None:
+            # legacy plain-text row
+            return hmac.compare_digest((password or "").encode(), (encoded or "").encode())
+        try:
+            return hasher._verify(password, encoded)
+        except ValueError:   # corrupt base64 or cost fields: deny, like any unverifiable hash
+            return False
+
+    def _verify(self, password: str, encoded: str) -> bool:
+        raise NotImplementedError
+
+    def needs_rehash(self, encoded: str) -> bool:
+        """
+        True for plain text, another algorithm, or a different cost than this hasher's.
+        False for a hash that cannot be verified here: it can never log in to be upgraded.
+        """
+        try:
+            if identify(encoded) is None:
+                return True
+        except UnverifiableHashError:
+            return False
+        parts = encoded.split("$")
+        return parts[0] != self.algorithm or parts[1] != self.params()
+
+    # --- Thread-pool offload ---
+    @classmethod
+    def executor(cls) -> ThreadPoolExecutor:
+        with PasswordHasher._executor_lock:
+            if PasswordHasher._executor is None:
+                PasswordHasher._executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 2,
+                                                              thread_name_prefix="kdf")
+            return PasswordHasher._executor
+
+    def hash_async(self, password: str) -> Future:
+        return self.executor().submit(self.hash, password)
+
+    def verify_async(self, password: str, encoded: str) -> Future:
+        return self.executor().submit(self.verify, password, encoded)
+
+
+class ScryptHasher(PasswordHasher):
+    algorithm = "scrypt"
+
+    def __init__(self, n: int = 2 ** 14, r: int = 8, p: int = 1, dklen: int = 32, salt_bytes: int = 16):
+        if n < 2 or n & (n - 1):
+            raise ValueError("n must be a power of two > 1")
+        self.n, self.r, self.p = n, r, p
+        self.dklen = dklen
+        self.salt_bytes = salt_bytes
+
+    @staticmethod
+    def _derive(password: str, salt: bytes, n: int, r: int, p: int, dklen: int) -> bytes:
+        # scrypt needs ~128 * n * r bytes; leave headroom over OpenSSL's 32 MiB default cap
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, dklen=dklen,
+                              maxmem=256 * n * r * max(p, 1) + 2 ** 20)
+
+    def params(self) -> str:
+        return f"n={self.n},r={self.r},p={self.p}"
+
+    def spec(self) -> str:
+        return f"scrypt:{self.params()}"
+
+    def hash(self, password: str) -> str:
+        salt = secrets.token_bytes(self.salt_bytes)
+        digest = self._derive(password, salt, self.n, self.r, self.p, self.dklen)
+        return f"scrypt${self.params()}${_b64(salt)}${_b64(digest)}"
+
+    def _verify(self, password: str, encoded: str) -> bool:
+        _, params, salt, digest = encoded.split("$")
+        cost = dict(kv.split("=") for kv in params.split(","))
+        expected = _unb64(digest)
+        actual = self._derive(password, _unb64(salt), int(cost["n"]), int(cost["r"]), int(cost["p"]), len(expected))
+        return hmac.compare_digest(actual, expected)
+
+
+class Pbkdf2Hasher(PasswordHasher):
+    algorithm = "pbkdf2_sha256"
+
+    def __init__(self, iterations: int = 600_000, dklen: int = 32, salt_bytes: int = 16):
+        if iterations <= 0:
+            raise ValueError("iterations must be > 0")
+        self.iterations = iterations
+        self.dklen = dklen
+        self.salt_bytes = salt_bytes
+
+    def params(self) -> str:
+        return str(self.iterations)
+
+    def spec(self) -> str:
+        return f"pbkdf2_sha256:{self.iterations}"
+
+    def hash(self, password: str) -> str:
+        salt = secrets.token_bytes(self.salt_bytes)
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, self.iterations, self.dklen)
+        return f"pbkdf2_sha256${self.iterations}${_b64(salt)}${_b64(digest)}"
+
+    def _verify(self, password: str, encoded: str) -> bool:
+        _, iterations, salt, digest = encoded.split("$")
+        expected = _unb64(digest)
+        actual = hashlib.pbkdf2_hmac("sha256", password.encode(), _unb64(salt), int(iterations), len(expected))
+        return hmac.compare_digest(actual, expected)
+
+
+HAS_SCRYPT = hasattr(hashlib, "scrypt")  # needs Python built against OpenSSL 1.1+
+
+
+def identify(encoded: str) -> PasswordHasher | None:
+    """
+    Returns a hasher able to verify `encoded`, or None for legacy plain text (no
+    algo$params$salt$hash shape at all). Raises UnverifiableHashError for a value
+    with that shape which cannot be verified here.
+    """
+    if not _ENCODED.fullmatch(encoded or ""):
+        return None
+    algorithm, params, _, _ = encoded.split("$")
+    if algorithm == "scrypt" and _SCRYPT_PARAMS.fullmatch(params):
+        if not HAS_SCRYPT:
+            raise UnverifiableHashError("scrypt hash, but this Python has no hashlib.scrypt")
+        return ScryptHasher()
+    if algorithm == "pbkdf2_sha256" and params.isdigit() and int(params) > 0:
+        return Pbkdf2Hasher()
+    raise UnverifiableHashError(f"unsupported or malformed {algorithm!r} hash")
+
+
+def hasher_from_spec(spec: str) -> PasswordHasher:
+    """'scrypt:n=32768,r=8,p=1' or 'pbkdf2_sha256:600000' -> configured hasher."""
+    algorithm, _, params = (spec or "").partition(":")
+    if algorithm == "scrypt":
+        cost = dict(kv.split("=") for kv in params.split(",")) if params else {}
+        return ScryptHasher(**{k: int(v) for k, v in cost.items()})
+    if algorithm == "pbkdf2_sha256":
+        return Pbkdf2Hasher(int(params)) if params else Pbkdf2Hasher()
+    raise ValueError(f"Unknown password hasher spec: {spec!r}")
+
+
+SCRYPT_MAX_MEMORY = 64 * 2 ** 20   # calibrate() never picks an n needing more (128 * n * r bytes)
+
+
+def calibrate(target_ms: float = 50.0, algorithm: str = "scrypt", samples: int = 3,
+              max_memory: int = SCRYPT_MAX_MEMORY) -> PasswordHasher:
+    """
+    Returns the cheapest hasher of `algorithm` whose hash takes at least target_ms
+    on this machine (scrypt doubles n, PBKDF2 scales iterations). scrypt's n stops
+    where a hash would need more than `max_memory`; if that is still faster than
+    target_ms, PBKDF2 is calibrated instead.
+    """
+    def cost_ms(hasher: PasswordHasher) -> float:
+        best = float("inf")
+        for _ in range(samples):
+            start = time.perf_counter()
+            hasher.hash("calibration-password")
+            best = min(best, (time.perf_counter() - start) * 1000)
+        return best
+
+    if algorithm == "scrypt":
+        n = 2 ** 10
+        while True:
+            hasher = ScryptHasher(n=n)
+            if cost_ms(hasher) >= target_ms:
+                return hasher
+            if 128 * (n * 2) * hasher.r > max_memory:
+                return calibrate(target_ms, "pbkdf2_sha256", samples)
+            n *= 2
+    if algorithm == "pbkdf2_sha256":
+        probe = Pbkdf2Hasher(10_000)
+        iterations = int(10_000 * target_ms / max(cost_ms(probe), 1e-3))
+        return Pbkdf2Hasher(max(iterations, 1_000))
+    raise ValueError(f"Unknown algorithm: {algorithm}")
+
+
+_default: PasswordHasher | None = None
+
+
+def get_default_hasher() -> PasswordHasher:
+    """
+    The hasher new hashes use: NOB_PASSWORD_HASHER (a spec from calibrate_password_hash.py)
+    if set, else scrypt n=2**14 (PBKDF2 when scrypt is unavailable).
+    """
+    global _default
+    if _default is None:
+        spec = os.environ.get("NOB_PASSWORD_HASHER")
+        _default = hasher_from_spec(spec) if spec else (ScryptHasher() if HAS_SCRYPT else Pbkdf2Hasher())
+    return _default
+
+
+def set_default_hasher(hasher: PasswordHasher) -> None:
+    global _default
+    _default = hasher
@@ -0,0 +1,81 @@
+# app/utils/payment_gateway.py
+"""
+Pluggable payment gateways.
+
+A gateway exposes charge(key, amount, details, timeout) -> bool:
+- True / False: the charge was approved / declined (final).
+- GatewayError: transient failure, safe to retry with the same idempotency key.
+- GatewayTimeout: no answer within `timeout` seconds (also retryable).
+"""
+import random
+import threading
+import time
+
+
+class GatewayError(Exception):
+    """Transient gateway failure; the charge may be retried."""
+
+
+class GatewayTimeout(GatewayError):
+    """The gateway did not answer in time."""
+
+
+class PaymentGateway:
+    def charge(self, key: str, amount: float, details, timeout: float | None = None) -> bool:
+        """
+        Charges `amount` once per idempotency `key`. Should give up after `timeout`
+        seconds with GatewayTimeout; PaymentProcessor enforces the deadline itself,
+        so an implementation that overruns costs a call thread, not a worker.
+        """
+        raise NotImplementedError
+
+
+class RuleBasedGateway(PaymentGateway):
+    """
+    The console demo's authorization rules, answered instantly:
+    cards starting with "4", UPI ids containing "@UPI", and COD are approved.
+    """
+    def charge(self, key: str, amount: float, details, timeout: float | None = None) -> bool:
+        if details.method == "CARD":
+            return details.card_number.startswith("4")
+        if details.method == "UPI":
+            return "@UPI" in details.upi_id.upper()
+        return details.method == "COD"
+
+
+class FakeGateway(PaymentGateway):
+    """
+    In-process stand-in for a remote gateway, for load tests and benchmarks.
+    - latency / jitter: seconds per call (uniform jitter added on top).
+    - failure_rate: share of calls that raise GatewayError.
+    - decline_rate: share of answered calls that are declined.
+    Approvals are remembered per idempotency key, so a retry never charges twice.
+    """
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, failure_rate: float = 0.0,
+                 decline_rate: float = 0.0, seed: int | None = None):
+        if not 0 <= failure_rate <= 1 or not 0 <= decline_rate <= 1:
+            raise ValueError("failure_rate and decline_rate must be between 0 and 1")
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.decline_rate = decline_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._answers: dict[str, bool] = {}
+        self.calls = 0
+
+    def charge(self, key: str, amount: float, details, timeout: float | None = None) -> bool:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            fails = self._random.random() < self.failure_rate
+            declines = self._random.random() < self.decline_rate
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise GatewayTimeout(f"gateway did not answer within {timeout}s")
+        if delay:
+            time.sleep(delay)
+        if fails:
+            raise GatewayError("gateway temporarily unavailable")
+        with self._lock:
+            return self._answers.setdefault(key, amount > 0 and not declines)
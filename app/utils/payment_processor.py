@@ -0,0 +1,205 @@
+# app/utils/payment_processor.py
+"""
+Asynchronous payment pipeline.
+
+Payments are submitted to a bounded worker pool and charged through a
+PaymentGateway with a per-attempt timeout that the processor enforces
+itself: each charge call runs on its own daemon thread, and a call that
+has not answered in time raises GatewayTimeout in the worker, so a gateway
+that ignores `timeout` cannot stall the pipeline. Transient gateway errors are
+retried with exponential backoff and jitter (the retry is scheduled on a
+timer, so a backing-off payment does not hold a worker). Once a payment is
+final, on_settled(payment, error) runs on the worker thread and the returned
+Future resolves to the final payment status.
+
+Two outcomes are left Pending for OrderController.reconcile_pending() rather
+than guessed: a payment whose last attempt timed out (the gateway may have
+charged), and one whose on_settled kept failing after its retries. Both are
+resolved later by resubmitting under the same idempotency key.
+"""
+import random
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Optional
+
+from app.models.payment import Payment, PaymentDetails, PaymentStatus
+from app.utils.payment_gateway import GatewayError, GatewayTimeout, PaymentGateway
+
+
+class _PaymentJob:
+    __slots__ = ("payment", "amount", "details", "key", "attempt", "settle_attempt", "future", "on_settled")
+
+    def __init__(self, payment: Payment, amount: float, details: PaymentDetails,
+                 key: str, future: Future, on_settled: Optional[Callable]):
+        self.payment = payment
+        self.amount = amount
+        self.details = details
+        self.key = key
+        self.attempt = 0
+        self.settle_attempt = 0
+        self.future = future
+        self.on_settled = on_settled
+
+
+class _DeadlineGateway(PaymentGateway):
+    """
+    Wraps a gateway so charge() returns or raises within `timeout` whatever the
+    gateway does. Calls run on daemon threads (a hung call must not block
+    interpreter exit); at most `slots` calls run at once, so a gateway that hangs
+    every call costs a bounded number of threads and further charges fail fast.
+    """
+    def __init__(self, gateway: PaymentGateway, slots: int):
+        self.gateway = gateway
+        self._slots = threading.BoundedSemaphore(slots)
+
+    def charge(self, key: str, amount: float, details, timeout: float | None = None) -> bool:
+        if timeout is None:
+            return self.gateway.charge(key, amount, details, timeout)
+        if not self._slots.acquire(timeout=timeout):
+            # nothing was sent, so this is an ordinary (not-charged) transient error
+            raise GatewayError("every gateway call slot is busy")
+        call = Future()
+
+        def run():
+            try:
+                call.set_result(self.gateway.charge(key, amount, details, timeout))
+            except BaseException as e:
+                call.set_exception(e)
+            finally:
+                self._slots.release()
+
+        threading.Thread(target=run, name="payment-call", daemon=True).start()
+        try:
+            return call.result(timeout)
+        except FutureTimeout:
+            raise GatewayTimeout(f"gateway did not answer within {timeout}s") from None
+
+
+class PaymentProcessor:
+    def __init__(self, gateway: PaymentGateway, workers: int = 4, timeout: float = 5.0,
+                 max_attempts: int = 3, backoff_base: float = 0.2, backoff_max: float = 5.0):
+        if workers <= 0 or max_attempts <= 0:
+            raise ValueError("workers and max_attempts must be > 0")
+        self.gateway = gateway
+        self._calls = _DeadlineGateway(gateway, workers * 2)
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="payment")
+        self._idle = threading.Condition()
+        self._inflight = 0
+        self._jobs: dict[str, _PaymentJob] = {}   # idempotency key -> in-flight job
+        self._closed = False
+        self.stats = {"submitted": 0, "succeeded": 0, "failed": 0, "unresolved": 0,
+                      "retries": 0, "timeouts": 0, "settle_retries": 0}
+
+    # --- Submission ---
+    def submit(self, payment: Payment, amount: float, details: PaymentDetails,
+               on_settled: Optional[Callable[[Payment, Optional[Exception]], None]] = None) -> Future:
+        """
+        Queues a Pending payment for charging; returns a Future of its final status
+        (Pending if it could not be resolved). A payment already in flight is not
+        queued twice: its existing Future is returned.
+        """
+        key = f"order-{payment.order_id}-payment-{payment.payment_id}"
+        with self._idle:
+            if self._closed:
+                raise RuntimeError("Payment processor is shut down.")
+            job = self._jobs.get(key)
+            if job is not None:
+                return job.future
+            job = self._jobs[key] = _PaymentJob(payment, amount, details, key, Future(), on_settled)
+            self._inflight += 1
+            self.stats["submitted"] += 1
+        self._executor.submit(self._run, job)
+        return job.future
+
+    def _run(self, job: _PaymentJob) -> None:
+        job.attempt += 1
+        try:
+            job.payment.process_payment(job.amount, self._calls, job.details, job.key, self.timeout)
+        except GatewayError as e:
+            retry = job.attempt < self.max_attempts and not self._closed
+            with self._idle:
+                self.stats["timeouts"] += isinstance(e, GatewayTimeout)
+                self.stats["retries"] += retry
+            if retry:
+                timer = threading.Timer(self._backoff(job.attempt), self._retry, (job,))
+                timer.daemon = True
+                timer.start()
+                return
+            # a timed-out charge may have gone through: leave it Pending for reconciliation
+            if not isinstance(e, GatewayTimeout):
+                job.payment.status = PaymentStatus.FAILED
+            self._settle(job, e)
+            return
+        except Exception as e:
+            job.payment.status = PaymentStatus.FAILED
+            self._settle(job, e)
+            return
+        self._settle(job, None)
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with "equal jitter": half fixed, half random."""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _retry(self, job: _PaymentJob) -> None:
+        try:
+            self._executor.submit(self._run, job)
+        except RuntimeError as e:  # executor shut down while backing off: outcome unknown
+            self._settle(job, e)
+
+    def _settle(self, job: _PaymentJob, error: Optional[Exception]) -> None:
+        job.settle_attempt += 1
+        try:
+            if job.on_settled is not None:
+                job.on_settled(job.payment, error)
+        except Exception as e:
+            if job.settle_attempt < self.max_attempts and not self._closed:
+                with self._idle:
+                    self.stats["settle_retries"] += 1
+                timer = threading.Timer(self._backoff(job.settle_attempt), self._retry_settle, (job, error))
+                timer.daemon = True
+                timer.start()
+                return
+            print(f"Payment settlement failed for order {job.payment.order_id}: {e}; "
+                  f"left Pending for reconciliation")
+            self._finish(job, PaymentStatus.PENDING)
+            return
+        self._finish(job, job.payment.status)
+
+    def _retry_settle(self, job: _PaymentJob, error: Optional[Exception]) -> None:
+        try:
+            self._executor.submit(self._settle, job, error)
+        except RuntimeError:  # shut down while backing off; the order is still Pending in the DB
+            self._finish(job, PaymentStatus.PENDING)
+
+    def _finish(self, job: _PaymentJob, status: str) -> None:
+        job.future.set_result(status)
+        with self._idle:
+            outcome = {PaymentStatus.SUCCESS: "succeeded", PaymentStatus.FAILED: "failed"}.get(status, "unresolved")
+            self.stats[outcome] += 1
+            self._jobs.pop(job.key, None)
+            self._inflight -= 1
+            if self._inflight == 0:
+                self._idle.notify_all()
+
+    # --- Lifecycle ---
+    def pending(self) -> int:
+        with self._idle:
+            return self._inflight
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until every submitted payment has settled; False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._inflight == 0, timeout)
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None) -> None:
+        """Stops accepting payments; with wait=True lets in-flight ones (and their retries) finish."""
+        if wait:
+            self.wait_idle(timeout)
+        with self._idle:
+            self._closed = True
+        self._executor.shutdown(wait=wait)
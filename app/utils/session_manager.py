@@ -1,20 +1,263 @@
 # app/utils/session_manager.py
+"""
+Login sessions for many concurrent users.
+
+SessionStore maps opaque random tokens to users with a sliding TTL. Sessions
+are spread over lock stripes by token hash, so concurrent lookups rarely
+contend; each stripe keeps an expiry min-heap, so a sweep pops only expired
+entries instead of scanning every session. Sliding a session's expiry does
+not touch the heap: the sweeper re-files an entry that turns out to have
+been extended when it reaches the top.
+
+With persist=True sessions are also written to the sessions table and are
+restored on first use after a restart; expiry extensions are written back
+(update-only, never re-inserting a revoked row) once they move by more than
+`persist_slack` of the TTL.
+"""
+import hashlib
+import heapq
+import secrets
+import threading
+import time
+from typing import Callable
+
 from app.models.user import User
+from app.repositories.session_repository import SessionRepository
+from app.repositories.user_repository import UserRepository
+
+
+class Session:
+    __slots__ = ("token_hash", "user", "created_at", "expires_at", "persisted_until")
+
+    def __init__(self, token_hash: str, user: User, created_at: float, expires_at: float):
+        self.token_hash = token_hash
+        self.user = user
+        self.created_at = created_at
+        self.expires_at = expires_at
+        self.persisted_until = 0.0
+
+
+class _Stripe:
+    __slots__ = ("lock", "sessions", "heap", "revoked")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions: dict[str, Session] = {}
+        self.heap: list[tuple[float, str]] = []   # (expires_at when filed, token_hash)
+        self.revoked: dict[str, float] = {}       # token_hash -> drop tombstone after (persist only)
+
+
+class SessionStore:
+    """
+    Thread-safe token -> user store with sliding expiry.
+    Tokens are only ever held by clients; the store keys everything by SHA-256(token).
+    """
+    SWEEP_BATCH = 1000   # expired entries removed per stripe-lock hold
+
+    def __init__(self, ttl: float = 1800.0, stripes: int = 16, persist: bool = False,
+                 persist_slack: float = 0.1, clock: Callable[[], float] = time.time):
+        if ttl <= 0:
+            raise ValueError("ttl must be > 0")
+        if stripes <= 0 or stripes & (stripes - 1):
+            raise ValueError("stripes must be a power of two")
+        self.ttl = ttl
+        self.persist = persist
+        self.persist_slack = persist_slack
+        self._clock = clock
+        self._stripes = [_Stripe() for _ in range(stripes)]
+        self._mask = stripes - 1
+        self._repo = SessionRepository() if persist else None
+        self._stats_lock = threading.Lock()
+        self._created = 0
+        self._expired = 0
+        self._revoked = 0
+        self._sweeper: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @staticmethod
+    def _hash(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def _stripe(self, token_hash: str) -> _Stripe:
+        return self._stripes[int(token_hash[:8], 16) & self._mask]
+
+    def _count(self, field: str, n: int = 1) -> None:
+        with self._stats_lock:
+            setattr(self, field, getattr(self, field) + n)
+
+    # --- Operations ---
+    def create(self, user: User) -> str:
+        """Starts a session for `user` and returns its token."""
+        token = secrets.token_urlsafe(32)
+        token_hash = self._hash(token)
+        now = self._clock()
+        session = Session(token_hash, user, now, now + self.ttl)
+        stripe = self._stripe(token_hash)
+        with stripe.lock:
+            stripe.sessions[token_hash] = session
+            heapq.heappush(stripe.heap, (session.expires_at, token_hash))
+        if self._repo is not None and self._repo.save_session(token_hash, user.user_id, session.expires_at):
+            session.persisted_until = session.expires_at
+        self._count("_created")
+        return token
+
+    def get(self, token: str | None) -> User | None:
+        """The token's user, extending the session by another TTL; None if unknown or expired."""
+        if not token:
+            return None
+        token_hash = self._hash(token)
+        stripe = self._stripe(token_hash)
+        now = self._clock()
+        with stripe.lock:
+            session = stripe.sessions.get(token_hash)
+            if session is not None:
+                if session.expires_at <= now:
+                    del stripe.sessions[token_hash]   # its heap entry is dropped by the next sweep
+                    session = None
+                else:
+                    session.expires_at = now + self.ttl
+        if session is None:
+            if self._repo is None:
+                return None
+            session = self._restore(token_hash, stripe, now)
+            if session is None:
+                return None
+        if self._repo is not None and session.expires_at - session.persisted_until > self.ttl * self.persist_slack:
+            with stripe.lock:
+                live = stripe.sessions.get(token_hash) is session
+            # extend-only: a logout that lands after this check deletes the row for good
+            if live and self._repo.extend_session(token_hash, session.expires_at):
+                session.persisted_until = session.expires_at
+        return session.user
+
+    def _restore(self, token_hash: str, stripe: _Stripe, now: float) -> Session | None:
+        """Loads a persisted session into memory (first use after a restart)."""
+        found = self._repo.get_session(token_hash, now)
+        if found is None:
+            return None
+        user_id, persisted_until = found
+        user = UserRepository().get_user_by_id(user_id)
+        if user is None:
+            return None
+        with stripe.lock:
+            if token_hash in stripe.revoked:   # logged out after we read the row
+                return None
+            session = stripe.sessions.get(token_hash)
+            if session is None:   # another thread may have restored it meanwhile
+                session = Session(token_hash, user, now, now + self.ttl)
+                session.persisted_until = persisted_until
+                stripe.sessions[token_hash] = session
+                heapq.heappush(stripe.heap, (session.expires_at, token_hash))
+        return session
+
+    def revoke(self, token: str | None) -> bool:
+        """Ends a session (logout). Returns False if it did not exist in memory."""
+        if not token:
+            return False
+        token_hash = self._hash(token)
+        stripe = self._stripe(token_hash)
+        with stripe.lock:
+            if self._repo is not None:
+                # tombstone before the row goes: a _restore() that already read the row
+                # checks it under this lock and does not re-insert the session
+                stripe.revoked[token_hash] = self._clock() + self.ttl
+            session = stripe.sessions.pop(token_hash, None)
+        if self._repo is not None:
+            self._repo.delete_session(token_hash)
+        if session is not None:
+            self._count("_revoked")
+        return session is not None
+
+    def sweep(self) -> int:
+        """Evicts every expired session; cost is proportional to the expired (and extended) entries."""
+        now = self._clock()
+        evicted = 0
+        for stripe in self._stripes:
+            if stripe.revoked:
+                with stripe.lock:   # a tombstone outlives any row it guards (rows expire within a TTL)
+                    stripe.revoked = {h: t for h, t in stripe.revoked.items() if t > now}
+            while True:
+                with stripe.lock:
+                    heap, sessions = stripe.heap, stripe.sessions
+                    for _ in range(SessionStore.SWEEP_BATCH):
+                        if not heap or heap[0][0] > now:
+                            break
+                        token_hash = heap[0][1]
+                        session = sessions.get(token_hash)
+                        if session is not None and session.expires_at > now:
+                            heapq.heapreplace(heap, (session.expires_at, token_hash))   # was extended
+                            continue
+                        heapq.heappop(heap)
+                        if session is not None:   # else revoked, or already dropped on lookup
+                            del sessions[token_hash]
+                            evicted += 1
+                    done = not heap or heap[0][0] > now
+                if done:
+                    break
+        if self._repo is not None:
+            self._repo.delete_expired(now)
+        self._count("_expired", evicted)
+        return evicted
+
+    # --- Background sweeper ---
+    def start_sweeper(self, interval: float = 30.0) -> None:
+        if self._sweeper is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"Session sweep failed: {e}")
+
+        self._sweeper = threading.Thread(target=run, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def close(self) -> None:
+        """Stops the sweeper thread (sessions are kept)."""
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def __len__(self) -> int:
+        return sum(len(s.sessions) for s in self._stripes)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "sessions": len(self),
+                "stripes": len(self._stripes),
+                "created": self._created,
+                "expired": self._expired,
+                "revoked": self._revoked,
+            }
+
 
 class SessionManager:
     """
-    Simple session tracker for currently logged-in user.
+    Session tracker for the console: the one user of this terminal, held as a
+    token in a (possibly shared) SessionStore.
     Used by ConsoleUI to maintain login state.
     """
 
-    def __init__(self):
-        self._current_user: User | None = None
+    def __init__(self, store: SessionStore | None = None):
+        self.store = store if store is not None else SessionStore()
+        self._token: str | None = None
 
     def set_user(self, user: User):
-        self._current_user = user
+        self.store.revoke(self._token)
+        self._token = self.store.create(user)
 
     def get_user(self) -> User | None:
-        return self._current_user
+        return self.store.get(self._token)
+
+    @property
+    def token(self) -> str | None:
+        return self._token
 
     def clear_session(self):
-        self._current_user = None
+        self.store.revoke(self._token)
+        self._token = None
@@ -0,0 +1,66 @@
+# benchmarks/bench_bulk_cart.py
+"""
+Importing a reading list into a cart: add_to_cart per book vs one
+add_many_to_cart call. Counts the SQL statements each issues (Book cache
+cold, cart flushed to disk at the end) and the wall time.
+
+    python -m benchmarks.bench_bulk_cart [items]
+"""
+import random
+import sys
+import time
+
+from benchmarks.common import temp_database, seed_books
+from app.controllers.cart_controller import CartController
+from app.repositories.book_repository import BookRepository
+from app.utils.cart_cache import CartCache
+
+
+def measure(repo: BookRepository, label: str, work) -> None:
+    BookRepository.cache.clear()
+    statements = []
+    conn = repo.conn
+    conn.set_trace_callback(statements.append)
+    start = time.perf_counter()
+    work()
+    elapsed = (time.perf_counter() - start) * 1000
+    conn.set_trace_callback(None)
+    book_reads = sum("FROM books" in s for s in statements)
+    print(f"{label:>22}: {elapsed:8.1f} ms, {len(statements):5} SQL statements ({book_reads} book reads)")
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    repo = BookRepository(temp_database())
+    book_ids = seed_books(repo, 20_000)
+    reading_list = [(b, random.Random(b).randint(1, 3)) for b in random.Random(1).sample(book_ids, items)]
+    reading_list += [(10 ** 9, 1), (book_ids[0], 0)]   # a missing book and a bad quantity
+    # saves run on this thread (not the flusher) so the trace sees them; the write-through
+    # variant is what add_to_cart cost before carts were cached: a save per call
+    controller = CartController(CartCache(repo.load_cart, repo.save_cart, flush_interval=3600))
+
+    def one_by_one(user_id: int, write_through: bool):
+        for book_id, qty in reading_list:
+            controller.add_to_cart(user_id, book_id, qty)
+            if write_through:
+                controller.carts.flush(user_id)
+        controller.carts.flush(user_id)
+
+    def batch(user_id: int):
+        summary, failures = controller.add_many_to_cart(user_id, reading_list)
+        controller.carts.flush(user_id)
+        print(f"{'':>24}{summary} Failures: {failures}")
+
+    print(f"{len(reading_list)}-line reading list")
+    measure(repo, "add_to_cart x N (sync)", lambda: one_by_one(1, True))
+    measure(repo, "add_to_cart x N", lambda: one_by_one(2, False))
+    measure(repo, "add_many_to_cart", lambda: batch(3))
+    same = {(r["book_id"], r["quantity"]) for r in repo.fetch_all("SELECT * FROM cart_items WHERE user_id = 1")} \
+        == {(r["book_id"], r["quantity"]) for r in repo.fetch_all("SELECT * FROM cart_items WHERE user_id = 3")}
+    print(f"saved carts {'match' if same else 'DIFFER'}")
+    controller.close()
+    sys.exit(0 if same else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# benchmarks/bench_bulk_import.py
+"""
+Bulk catalog import throughput (rows/s): BookImporter vs one AdminController.add_book per row.
+
+    python -m benchmarks.bench_bulk_import [rows]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import temp_database
+from app.repositories.book_repository import BookRepository
+from app.controllers.admin_controller import AdminController
+from app.utils.book_import import BookImporter
+
+ROWS = 200_000
+LEGACY_ROWS = 2_000
+
+
+def write_feeds(rows: int) -> tuple[str, str]:
+    folder = tempfile.mkdtemp(prefix="nob_feed_")
+    csv_path, jsonl_path = os.path.join(folder, "feed.csv"), os.path.join(folder, "feed.jsonl")
+    with open(csv_path, "w", encoding="utf-8") as csv_fh, open(jsonl_path, "w", encoding="utf-8") as json_fh:
+        csv_fh.write("title,author,price,stock\n")
+        for i in range(rows):
+            price, stock = f"{100 + i % 900}.50", str(i % 50)
+            if i % 1000 == 999:
+                price = "-1"  # rejected row
+            csv_fh.write(f"Feed Title {i},Feed Author {i % 5000},{price},{stock}\n")
+            json_fh.write(json.dumps({"title": f"Feed Title {i}", "author": f"Feed Author {i % 5000}",
+                                      "price": float(price), "stock": int(stock)}) + "\n")
+    return csv_path, jsonl_path
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    repo = BookRepository(temp_database())
+    admin = AdminController()
+    csv_path, jsonl_path = write_feeds(rows)
+
+    start = time.perf_counter()
+    for i in range(LEGACY_ROWS):
+        admin.add_book(f"Single {i}", "Author", 10.0, 5)
+    legacy_rate = LEGACY_ROWS / (time.perf_counter() - start)
+    print(f"{'add_book per row':>20}: {legacy_rate:>10,.0f} rows/s  ({LEGACY_ROWS:,} rows)")
+
+    for label, path in (("BookImporter CSV", csv_path), ("BookImporter JSONL", jsonl_path)):
+        report = BookImporter(repo, chunk_size=5000).run(path, resume=False)
+        print(f"{label:>20}: {report.rows_per_second:>10,.0f} rows/s  "
+              f"({report.imported:,} imported, {report.rejected_count:,} rejected, "
+              f"first reject at line {report.rejected[0][0]})")
+
+    rerun = BookImporter(repo).run(csv_path)
+    print(f"{'re-run (resume)':>20}: {rerun.imported} imported, {rerun.skipped:,} lines skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_cart_cache.py
+"""
+Cart mutations through CartController: the old write-through behaviour (a
+save_cart per edit, every cart kept forever) vs the bounded write-behind
+CartCache. Reports edit latency, saves issued, and how many carts stay in
+memory; then checks every cart on disk matches what the users built.
+Exits non-zero on a mismatch.
+
+    python -m benchmarks.bench_cart_cache [users] [edits_per_user] [max_entries]
+"""
+import random
+import statistics
+import sys
+import time
+
+from benchmarks.common import temp_database, seed_books
+from app.controllers.cart_controller import CartController
+from app.repositories.book_repository import BookRepository
+from app.utils.cart_cache import CartCache
+
+
+class WriteThroughCache(CartCache):
+    """The pre-cache behaviour: unbounded, and every edit saved before returning."""
+
+    def mark_dirty(self, cart):
+        super().mark_dirty(cart)
+        self.flush(cart.user_id)
+
+
+def workload(users: int, edits: int, book_ids: list[int]):
+    """Bursty sessions: each user makes `edits` edits in a row, users interleave a little."""
+    rng = random.Random(42)
+    for start in range(1, users + 1, 8):
+        group = list(range(start, min(start + 8, users + 1)))
+        for _ in range(edits):
+            for user_id in group:
+                yield user_id, rng.choice(book_ids), rng.randint(1, 3)
+
+
+def run(controller: CartController, users: int, edits: int, book_ids: list[int]):
+    latencies, peak = [], 0
+    for user_id, book_id, qty in workload(users, edits, book_ids):
+        start = time.perf_counter()
+        controller.add_to_cart(user_id, book_id, qty)
+        latencies.append((time.perf_counter() - start) * 1000)
+        peak = max(peak, len(controller.carts))
+    start = time.perf_counter()
+    controller.close()
+    close_ms = (time.perf_counter() - start) * 1000
+    return latencies, peak, close_ms
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    edits = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    max_entries = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    repo = BookRepository(temp_database())
+    book_ids = seed_books(repo, 2000)
+
+    for label, cache in (
+        ("write-through", WriteThroughCache(repo.load_cart, repo.save_cart, max_entries=10 ** 9)),
+        ("write-behind", CartCache(repo.load_cart, repo.save_cart, max_entries=max_entries)),
+    ):
+        with repo.transaction():
+            repo.execute("DELETE FROM cart_items")
+        latencies, peak, close_ms = run(CartController(cache), users, edits, book_ids)
+        latencies.sort()
+        print(f"{label:>13}: edit p50 {statistics.median(latencies):.3f} ms  "
+              f"p99 {latencies[int(len(latencies) * 0.99)]:.3f} ms | {cache.stats['saves']:,} saves "
+              f"for {cache.stats['marks']:,} edits | peak {peak:,} carts in memory | close {close_ms:.0f} ms")
+
+    # what every user built, replayed in memory, must equal what is on disk
+    expected: dict[int, dict[int, int]] = {}
+    for user_id, book_id, qty in workload(users, edits, book_ids):
+        lines = expected.setdefault(user_id, {})
+        lines[book_id] = lines.get(book_id, 0) + qty
+    stored: dict[int, dict[int, int]] = {}
+    for r in repo.fetch_all("SELECT user_id, book_id, quantity FROM cart_items"):
+        stored.setdefault(r["user_id"], {})[r["book_id"]] = r["quantity"]
+    consistent = stored == expected
+    print(f"carts on disk {'match' if consistent else 'DO NOT match'} the edits ({len(stored):,} users)")
+    sys.exit(0 if consistent else 1)
+
+
+if __name__ == "__main__":
+    main()
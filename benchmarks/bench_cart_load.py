@@ -0,0 +1,60 @@
+# benchmarks/bench_cart_load.py
+"""
+Cart hydration: single JOIN load_cart vs the old per-line get_book_by_id (N+1).
+
+    python -m benchmarks.bench_cart_load
+"""
+import time
+
+from benchmarks.common import temp_database, seed_books
+from app.repositories.book_repository import BookRepository
+from app.models.cart import Cart
+
+CART_SIZES = (1, 10, 100, 1000, 10_000)
+REPEATS = 5
+
+
+def legacy_load_cart(repo: BookRepository, user_id: int) -> Cart:
+    """The pre-JOIN strategy: one query for the lines plus one per book."""
+    rows = repo.fetch_all("SELECT * FROM cart_items WHERE user_id = ?", (user_id,))
+    cart = Cart(user_id)
+    for r in rows:
+        book = repo.get_book_by_id(r["book_id"])
+        if book:
+            cart.add_item(book, r["quantity"])
+    return cart
+
+
+def best_of(fn, *args) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    repo = BookRepository(temp_database())
+    book_ids = seed_books(repo, max(CART_SIZES))
+    with repo.transaction():
+        for user_id, size in enumerate(CART_SIZES, start=1):
+            repo.executemany(
+                "INSERT INTO cart_items (user_id, book_id, quantity) VALUES (?, ?, 1)",
+                ((user_id, book_id) for book_id in book_ids[:size]),
+            )
+        # a line whose book was deleted after it was added
+        repo.execute("INSERT INTO cart_items (user_id, book_id, quantity) VALUES (1, ?, 1)",
+                     (book_ids[-1] + 1,))
+
+    assert len(repo.load_cart(1).items) == 1, "deleted books must be skipped"
+
+    print(f"{'lines':>6} | {'N+1 ms':>10} | {'JOIN ms':>10} | {'speedup':>7}")
+    for user_id, size in enumerate(CART_SIZES, start=1):
+        legacy_ms = best_of(legacy_load_cart, repo, user_id)
+        join_ms = best_of(repo.load_cart, user_id)
+        print(f"{size:>6} | {legacy_ms:>10.2f} | {join_ms:>10.2f} | {legacy_ms / join_ms:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
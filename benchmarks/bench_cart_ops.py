@@ -0,0 +1,96 @@
+# benchmarks/bench_cart_ops.py
+"""
+Cart operations on very large (B2B) carts: the indexed Cart with a running
+total vs the previous list-scanning Cart. Also checks both end with the same
+lines, order and total. Exits non-zero if they differ.
+
+    python -m benchmarks.bench_cart_ops [lines]
+"""
+import random
+import sys
+import time
+
+from app.models.book import Book
+from app.models.cart import Cart
+from app.models.cart_item import CartItem
+
+
+class ListCart:
+    """The pre-index Cart: linear scans and a full re-sum per total."""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.items = []
+
+    def add_item(self, book, qty):
+        for ci in self.items:
+            if ci.book.book_id == book.book_id:
+                ci.update_quantity(ci.quantity + qty)
+                return
+        self.items.append(CartItem(book, qty))
+
+    def remove_item(self, book_id):
+        self.items = [ci for ci in self.items if ci.book.book_id != book_id]
+
+    def update_quantity(self, book_id, new_qty):
+        for ci in self.items:
+            if ci.book.book_id == book_id:
+                ci.update_quantity(new_qty)
+                return
+        raise ValueError("book not present in cart")
+
+    def calculate_total(self):
+        return round(sum(ci.subtotal for ci in self.items), 2)
+
+
+def run(cart_cls, books: list[Book], ops: list[tuple]) -> tuple[dict, object]:
+    cart = cart_cls(1)
+    timings = {}
+    start = time.perf_counter()
+    for book in books:
+        cart.add_item(book, 1)
+    timings["build"] = time.perf_counter() - start
+    for name, batch in ops:
+        start = time.perf_counter()
+        for op, book, qty in batch:
+            if op == "add":
+                cart.add_item(book, qty)
+            elif op == "update":
+                cart.update_quantity(book.book_id, qty)
+            elif op == "remove":
+                cart.remove_item(book.book_id)
+            cart.calculate_total()   # view_cart shows the total after every edit
+        timings[name] = time.perf_counter() - start
+    return timings, cart
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rng = random.Random(3)
+    books = [Book.from_row(i, f"Title {i}", f"Author {i % 97}", round(rng.uniform(50, 900), 2), 10 ** 6)
+             for i in range(1, lines + 1)]
+    picks = lambda n: [rng.choice(books) for _ in range(n)]
+    removed = rng.sample(books, 1000)
+    ops = [
+        ("1k add (existing)", [("add", b, 2) for b in picks(1000)]),
+        ("1k update", [("update", b, rng.randint(1, 50)) for b in picks(1000)]),
+        ("1k remove", [("remove", b, 0) for b in removed]),
+    ]
+
+    old_t, old_cart = run(ListCart, books, ops)
+    new_t, new_cart = run(Cart, books, ops)
+    print(f"{lines:,}-line cart  {'list Cart':>12} {'indexed Cart':>14}")
+    print(f"  build {lines:,} lines  {old_t['build'] * 1000:9.1f} ms {new_t['build'] * 1000:11.1f} ms")
+    for name, _ in ops:
+        print(f"  {name:<17}  {old_t[name] * 1000:9.1f} ms {new_t[name] * 1000:11.1f} ms "
+              f"({old_t[name] / new_t[name]:,.0f}x)")
+
+    same = ([(ci.book.book_id, ci.quantity) for ci in old_cart.items]
+            == [(ci.book.book_id, ci.quantity) for ci in new_cart.items]
+            and old_cart.calculate_total() == new_cart.calculate_total())
+    print(f"lines, order and total {'match' if same else 'DIFFER'} ({new_cart.calculate_total():,.2f})")
+    sys.exit(0 if same else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/bench_cart_persistence.py
+"""
+Rows written per cart mutation: diff-based save_cart vs the old
+delete-and-reinsert strategy.
+
+    python -m benchmarks.bench_cart_persistence
+"""
+import time
+
+from benchmarks.common import temp_database, seed_books
+from app.repositories.book_repository import BookRepository
+from app.models.cart import Cart
+
+CART_SIZES = (10, 100, 1000, 5000)
+MUTATIONS = 50
+
+
+def legacy_save_cart(repo: BookRepository, user_id: int, cart: Cart):
+    """The pre-diff strategy: wipe the user's rows and insert every line again."""
+    with repo.transaction():
+        repo.execute("DELETE FROM cart_items WHERE user_id = ?", (user_id,))
+        for item in cart.items:
+            repo.execute(
+                "INSERT INTO cart_items (user_id, book_id, quantity) VALUES (?, ?, ?)",
+                (user_id, item.book.book_id, item.quantity),
+            )
+
+
+def run(save, repo: BookRepository, user_id: int, size: int, book_ids: list[int]):
+    cart = Cart(user_id)
+    for book_id in book_ids[:size]:
+        cart.add_item(repo.get_book_by_id(book_id), 1)
+    save(repo, user_id, cart)
+
+    conn = repo.conn
+    before = conn.total_changes
+    start = time.perf_counter()
+    for i in range(MUTATIONS):
+        # one "keystroke": bump the quantity of a single line
+        cart.update_quantity(book_ids[i % size], 2 + i)
+        save(repo, user_id, cart)
+    elapsed = time.perf_counter() - start
+    return (conn.total_changes - before) / MUTATIONS, elapsed / MUTATIONS * 1000
+
+
+def main():
+    repo = BookRepository(temp_database())
+    book_ids = seed_books(repo, max(CART_SIZES))
+
+    print(f"{'lines':>6} | {'legacy rows/op':>14} {'legacy ms/op':>12} | {'diff rows/op':>12} {'diff ms/op':>10}")
+    for user_id, size in enumerate(CART_SIZES, start=1):
+        legacy_rows, legacy_ms = run(legacy_save_cart, repo, user_id, size, book_ids)
+        diff_rows, diff_ms = run(BookRepository.save_cart, repo, user_id + 1000, size, book_ids)
+        print(f"{size:>6} | {legacy_rows:>14.1f} {legacy_ms:>12.2f} | {diff_rows:>12.1f} {diff_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_catalog_memory.py
+"""
+Per-book memory and construction time for a large loaded catalog:
+legacy dict-based Book vs slotted Book(...) vs Book.from_row vs CatalogSnapshot.
+
+    python -m benchmarks.bench_catalog_memory [rows]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import temp_database, seed_books
+from app.repositories.book_repository import BookRepository
+from app.models.book import Book
+from app.models.catalog_snapshot import CatalogSnapshot
+
+ROWS = 200_000
+
+
+class LegacyBook:
+    """The pre-__slots__ Book: per-instance __dict__, validated and coerced on every row."""
+    def __init__(self, book_id, title, author, price, stock):
+        assert price >= 0, "price must be non-negative"
+        assert stock >= 0, "stock must be non-negative"
+        self.book_id = book_id
+        self.title = title
+        self.author = author
+        self.price = float(price)
+        self.stock = int(stock)
+
+
+def measure(label: str, build, rows: list):
+    # time and memory are measured in separate runs: tracemalloc slows allocation down
+    elapsed = float("inf")
+    for _ in range(3):
+        gc.collect()
+        start = time.perf_counter()
+        build(rows)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    result = build(rows)
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n = len(rows)
+    print(f"{label:>18} | {used / n:>9.1f} B/book | {elapsed * 1e9 / n:>8.0f} ns/book")
+    return result
+
+
+def main():
+    rows_wanted = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    repo = BookRepository(temp_database())
+    seed_books(repo, rows_wanted, stock=25)
+    # materialise plain tuples once so every variant pays only for its own objects
+    rows = [tuple(r) for r in repo.fetch_all(
+        "SELECT book_id, title, author, price, stock FROM books ORDER BY book_id")]
+
+    print(f"{len(rows):,} books (title/author strings are shared by every variant and not counted)")
+    measure("legacy Book", lambda rs: [LegacyBook(*r) for r in rs], rows)
+    measure("slotted Book()", lambda rs: [Book(*r) for r in rs], rows)
+    measure("Book.from_row", lambda rs: [Book.from_row(*r) for r in rs], rows)
+    measure("CatalogSnapshot", CatalogSnapshot.from_rows, rows)
+
+    start = time.perf_counter()
+    snap = repo.load_catalog_snapshot()
+    print(f"\nload_catalog_snapshot straight from SQLite: {time.perf_counter() - start:.2f}s "
+          f"for {len(snap):,} books, inventory value ₹{snap.inventory_value():,.2f}")
+
+
+if __name__ == "__main__":
+    main()
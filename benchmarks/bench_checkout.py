@@ -0,0 +1,53 @@
+# benchmarks/bench_checkout.py
+"""
+Scripted checkout throughput through the headless OrderController.place_order API,
+with per-phase timing percentiles taken from CheckoutResult.timings.
+
+    python -m benchmarks.bench_checkout [orders] [lines_per_order]
+"""
+import statistics
+import sys
+import time
+
+from benchmarks.common import temp_database, seed_books
+from app.repositories.book_repository import BookRepository
+from app.controllers.order_controller import OrderController
+from app.models.cart import Cart
+from app.models.payment import PaymentDetails
+
+PAYMENTS = (PaymentDetails.card("4111111111111111", "123"), PaymentDetails.upi("reader@upi"), PaymentDetails.cod())
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    repo = BookRepository(temp_database())
+    books = [repo.get_book_by_id(b) for b in seed_books(repo, 500)]
+    controller = OrderController()
+
+    results = []
+    started = time.perf_counter()
+    for n in range(orders):
+        cart = Cart(1 + n % 50)
+        for k in range(lines):
+            cart.add_item(books[(n * lines + k) % len(books)], 1)
+        results.append(controller.place_order(cart.user_id, cart, PAYMENTS[n % len(PAYMENTS)]))
+    elapsed = time.perf_counter() - started
+
+    confirmed = sum(r.ok for r in results)
+    print(f"{orders} checkouts × {lines} lines in {elapsed:.2f}s "
+          f"({orders / elapsed * 60:,.0f}/min), {confirmed} confirmed")
+    for phase in ("payment_ms", "persist_ms", "total_ms"):
+        values = [r.timings[phase] for r in results if phase in r.timings]
+        print(f"  {phase:<11} mean {statistics.fmean(values):7.3f}  "
+              f"p50 {percentile(values, 0.50):7.3f}  p99 {percentile(values, 0.99):7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/bench_dashboard.py
+"""
+Admin dashboard from trigger-maintained summary tables vs the same figures
+aggregated from the raw tables, the per-checkout cost of the triggers, and a
+check that the incrementally maintained tables equal a full rebuild.
+Exits non-zero if they differ.
+
+    python -m benchmarks.bench_dashboard [orders]
+"""
+import statistics
+import sys
+import time
+
+from benchmarks.common import temp_database, seed_books
+from benchmarks.bench_sales_analytics import seed_orders
+from app.db.migrations import SUMMARY_TABLES, SUMMARY_TRIGGERS, _v7_summaries
+from app.controllers.admin_controller import AdminController
+from app.controllers.order_controller import OrderController
+from app.repositories.analytics_repository import AnalyticsRepository
+from app.repositories.book_repository import BookRepository
+from app.repositories.order_repository import OrderRepository
+from app.models.cart import Cart
+from app.models.payment import PaymentDetails
+
+
+def snapshot(conn) -> dict:
+    out = {}
+    for table in SUMMARY_TABLES:
+        rows = conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2").fetchall()
+        # rows whose counters all went back to zero are equivalent to missing rows
+        out[table] = [tuple(round(v, 4) if isinstance(v, float) else v for v in r)
+                      for r in rows if any(isinstance(v, (int, float)) and v for v in tuple(r)[1:])]
+    return out
+
+
+def checkout_latency(controller: OrderController, book, n: int = 1000) -> float:
+    cod = PaymentDetails.cod()
+    totals = []
+    for _ in range(n):
+        cart = Cart(1)
+        cart.add_item(book, 1)
+        totals.append(controller.place_order(1, cart, cod).timings["persist_ms"])
+    return statistics.median(totals)
+
+
+def main():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    path = temp_database()
+    order_repo = OrderRepository(path)
+    book_ids = seed_books(order_repo, 20_000)
+    seed_orders(order_repo, orders, book_ids)
+    # some status churn, as payments settle and orders get cancelled
+    with order_repo.transaction():
+        order_repo.execute("UPDATE orders SET status = 'Cancelled' WHERE order_id % 97 = 0")
+        order_repo.execute("UPDATE orders SET status = 'Confirmed' WHERE order_id % 89 = 0")
+
+    analytics = AnalyticsRepository(path)
+    admin = AdminController()
+    start = time.perf_counter()
+    admin.dashboard()
+    summary_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    analytics.order_summary("0000", "9999")  # date bounds force the raw-table path
+    analytics.revenue_by_day("0000", "9999")
+    analytics.top_sellers("0000", "9999", 5)
+    raw_ms = (time.perf_counter() - start) * 1000
+    print(f"{orders:,} orders: dashboard from summaries {summary_ms:.2f} ms, "
+          f"same figures from raw tables {raw_ms:.0f} ms")
+
+    conn = analytics.conn
+    incremental = snapshot(conn)
+    analytics.rebuild_summaries()
+    consistent = snapshot(conn) == incremental
+    print(f"incremental summaries {'match' if consistent else 'DIFFER from'} a full rebuild")
+
+    controller = OrderController()
+    book = BookRepository().get_book_by_id(book_ids[0])
+    with_triggers = checkout_latency(controller, book)
+    with analytics.transaction() as tx:
+        for name in SUMMARY_TRIGGERS:
+            tx.execute(f"DROP TRIGGER {name}")
+    without_triggers = checkout_latency(controller, book)
+    with analytics.transaction() as tx:
+        _v7_summaries(tx)
+    print(f"checkout persist p50: {with_triggers:.3f} ms with summary triggers, "
+          f"{without_triggers:.3f} ms without")
+    sys.exit(0 if consistent else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# benchmarks/bench_login.py
+"""
+Login throughput with salted KDF hashes: logins/s on one thread, logins/s with
+one thread per core (KDFs release the GIL), the per-core rate, and the one-off
+cost of upgrading a legacy plain-text password on first login.
+
+    python -m benchmarks.bench_login [scrypt_spec_or_pbkdf2_spec] [users]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import temp_database
+from app.controllers.user_controller import UserController
+from app.repositories.user_repository import UserRepository
+from app.utils.password_hasher import get_default_hasher, hasher_from_spec, set_default_hasher
+
+
+def login_rate(users: list[str], threads: int) -> float:
+    def login(email: str) -> bool:
+        # one controller per "session": it holds current_user
+        return "logged in" in UserController().login(email, "secret-pw")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        ok = sum(pool.map(login, users))
+    elapsed = time.perf_counter() - start
+    assert ok == len(users), f"{len(users) - ok} logins failed"
+    return len(users) / elapsed
+
+
+def main():
+    if len(sys.argv) > 1:
+        set_default_hasher(hasher_from_spec(sys.argv[1]))
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    cores = os.cpu_count() or 1
+    hasher = get_default_hasher()
+
+    repo = UserRepository(temp_database())
+    encoded = hasher.hash("secret-pw")  # same hash for all rows keeps seeding cheap
+    with repo.transaction():
+        repo.executemany(
+            "INSERT INTO users (name, email, password, role) VALUES (?, ?, ?, 'customer')",
+            ((f"User {i}", f"user{i}@bench.io", encoded) for i in range(count)),
+        )
+    users = [f"user{i}@bench.io" for i in range(count)]
+
+    print(f"{hasher.spec()}, {count} users, {cores} core(s)")
+    single = login_rate(users, 1)
+    print(f"  1 thread      {single:8.1f} logins/s")
+    parallel = login_rate(users, cores)
+    print(f"  {cores:>2} thread(s) {parallel:8.1f} logins/s   ({parallel / cores:.1f} per core)")
+
+    # legacy plain-text rows: the first login pays one extra hash to upgrade
+    with repo.transaction():
+        repo.execute("UPDATE users SET password = 'secret-pw'")
+    first = login_rate(users, 1)
+    upgraded = sum(not hasher.needs_rehash(r["password"]) for r in repo.get_all_users())
+    second = login_rate(users, 1)
+    print(f"  plain-text rows: first login {first:8.1f} logins/s (upgrade), "
+          f"then {second:8.1f} logins/s; {upgraded}/{count} upgraded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_low_stock.py
+"""
+Low-stock report on a large catalog: the partial-index range read vs scanning
+the whole catalog, and the cost of alert detection on the checkout path.
+
+    python -m benchmarks.bench_low_stock [books] [low_stock_share]
+"""
+import statistics
+import sys
+import time
+
+from benchmarks.common import temp_database
+from app.repositories.book_repository import BookRepository
+from app.controllers.order_controller import OrderController
+from app.models.cart import Cart
+from app.models.payment import PaymentDetails
+from app.utils.notifier import Notifier, Observer
+
+
+class AlertCounter(Observer):
+    def __init__(self):
+        self.alerts = 0
+
+    def update(self, order_id: int, status: str):
+        pass
+
+    def low_stock_batch(self, alerts):
+        self.alerts += len(alerts)
+
+
+def main():
+    books = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    share = float(sys.argv[2]) if len(sys.argv) > 2 else 0.005
+    every = max(1, int(1 / share))
+
+    repo = BookRepository(temp_database())
+    with repo.transaction():
+        repo.executemany(
+            "INSERT INTO books (title, author, price, stock) VALUES (?, ?, ?, ?)",
+            ((f"Title {i}", f"Author {i % 997}", 100.0, (i % 5) if i % every == 0 else 50 + i % 100)
+             for i in range(books)),
+        )
+    repo.conn.execute("ANALYZE")
+
+    start = time.perf_counter()
+    report = repo.get_low_stock_books(50)
+    indexed_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    total = repo.count_low_stock()
+    count_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    scanned = [b for b in repo.iter_books() if b.stock < 5]
+    scan_ms = (time.perf_counter() - start) * 1000
+    print(f"{books:,} books, {total:,} below threshold")
+    print(f"  low-stock report (top {len(report)}) {indexed_ms:8.2f} ms   count {count_ms:8.2f} ms")
+    print(f"  full catalog scan               {scan_ms:8.0f} ms   ({len(scanned):,} found)")
+
+    # --- checkout path: crossings fire alerts, the no-alert case costs one outbox probe ---
+    counter = AlertCounter()
+    Notifier.register(counter)
+    controller = OrderController()
+    cod = PaymentDetails.cod()
+    book = repo.get_book_by_id(2)  # stock 52, threshold 5
+    persist = []
+    for _ in range(48):
+        cart = Cart(1)
+        cart.add_item(book, 1)
+        persist.append(controller.place_order(1, cart, cod).timings["persist_ms"])
+    Notifier.flush(timeout=5)
+    print(f"  48 checkouts 52 -> 4 units: persist p50 {statistics.median(persist):.3f} ms, "
+          f"{counter.alerts} low-stock alert(s) fired")
+    Notifier.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_notifier.py
+"""
+Notifier event bus: caller-side cost of notify() with a fast and a slow
+observer, compared with delivering synchronously on the caller's thread,
+plus coalescing/batching counts and checkout latency with observers attached.
+
+    python -m benchmarks.bench_notifier [events] [orders]
+"""
+import statistics
+import sys
+import time
+
+from benchmarks.common import temp_database, seed_books
+from app.repositories.book_repository import BookRepository
+from app.controllers.order_controller import OrderController
+from app.models.cart import Cart
+from app.models.payment import PaymentDetails
+from app.utils.notifier import Notifier, Observer
+
+
+class CountingObserver(Observer):
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.seen = 0
+
+    def update(self, order_id: int, status: str):
+        if self.delay:
+            time.sleep(self.delay)
+        self.seen += 1
+
+    def update_batch(self, events):
+        if self.delay:
+            time.sleep(self.delay)  # one slow call per batch, e.g. a remote push
+        self.seen += len(events)
+
+
+def caller_cost(fire, events: int, orders: int) -> float:
+    start = time.perf_counter()
+    for n in range(events):
+        fire(n % orders, "Confirmed" if n % 3 else "Pending")
+    return (time.perf_counter() - start) / events * 1e6
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    orders = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+
+    fast, slow = CountingObserver(), CountingObserver(delay=0.002)
+    sync_events = min(events, 2_000)
+    print(f"synchronous, fast+slow observers : {caller_cost(lambda o, s: (fast.update(o, s), slow.update(o, s)), sync_events, orders):8.2f} µs/event")
+
+    Notifier.register(fast)
+    Notifier.register(slow)
+    cost = caller_cost(Notifier.notify, events, orders)
+    Notifier.flush(timeout=30)
+    print(f"event bus,   fast+slow observers : {cost:8.2f} µs/event")
+    for name, stats in Notifier.stats().items():
+        print(f"  {name}: {stats}")
+
+    # --- checkout latency with the bus attached (statuses are published after commit) ---
+    repo = BookRepository(temp_database())
+    book = repo.get_book_by_id(seed_books(repo, 1)[0])
+    controller = OrderController()
+    cod = PaymentDetails.cod()
+    for label in ("with observers", "without observers"):
+        totals = []
+        for n in range(2_000):
+            cart = Cart(1)
+            cart.add_item(book, 1)
+            totals.append(controller.place_order(1, cart, cod).timings["total_ms"])
+        print(f"checkout {label:<18}: mean {statistics.fmean(totals):.3f} ms, p50 {sorted(totals)[len(totals) // 2]:.3f} ms")
+        Notifier.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_order_history.py
+"""
+Order history for a heavy customer: the full unbounded load vs keyset pages
+(first, deep and last), plus status and date-range filtered pages.
+
+    python -m benchmarks.bench_order_history [orders_for_user]
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import temp_database
+from app.repositories.order_repository import OrderRepository
+
+PAGE = 20
+REPEATS = 5
+
+
+def best_of(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    repo = OrderRepository(temp_database())
+    start = datetime(2024, 1, 1)
+    statuses = ("Confirmed", "Confirmed", "Confirmed", "Pending", "Cancelled")
+    with repo.transaction():
+        # the heavy customer (user 1) plus background traffic from 200 other users
+        repo.executemany(
+            "INSERT INTO orders (user_id, total_amount, status, order_date) VALUES (?, ?, ?, ?)",
+            ((1 if n % 3 == 0 else 2 + n % 200, 100.0 + n % 50, statuses[n % 5],
+              repo.format_timestamp(start + timedelta(minutes=n // 3)))
+             for n in range(count * 3)),
+        )
+    repo.conn.execute("ANALYZE")
+
+    # a cursor near the end of the history, found by walking pages once
+    deep, cursor, pages = None, {}, 0
+    while True:
+        page = repo.get_orders_page(1, 1000, **cursor)
+        if len(page) < 1000:
+            break
+        pages += 1
+        cursor = {"before_date": page[-1].order_date, "before_id": page[-1].order_id}
+        if pages == (count // 1000) - 1:
+            deep = cursor
+
+    mid = start + timedelta(minutes=count // 2)
+    results = {
+        "full history (unbounded)": best_of(lambda: repo.get_orders_by_user(1)),
+        "first page": best_of(lambda: repo.get_orders_page(1, PAGE)),
+        "deep page (keyset)": best_of(lambda: repo.get_orders_page(1, PAGE, **deep)),
+        "first page, status=Cancelled": best_of(lambda: repo.get_orders_page(1, PAGE, "Cancelled")),
+        "first page, one-day range": best_of(
+            lambda: repo.get_orders_page(1, PAGE, date_from=mid, date_to=mid + timedelta(days=1))),
+    }
+    print(f"user 1 has {count:,} orders ({count * 3:,} rows total); page size {PAGE}, best of {REPEATS}")
+    for label, ms in results.items():
+        print(f"  {label:<30} {ms:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
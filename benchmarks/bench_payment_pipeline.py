@@ -0,0 +1,92 @@
+# benchmarks/bench_payment_pipeline.py
+"""
+Checkout latency with a slow, flaky gateway: inline charging vs the
+asynchronous PaymentProcessor. Also checks that every payment settles (after
+reconciling the ones timeouts left Pending) and that cancelled orders gave
+their stock back. Exits non-zero on inconsistency.
+
+    python -m benchmarks.bench_payment_pipeline [orders] [gateway_latency_ms]
+"""
+import contextlib
+import io
+import statistics
+import sys
+import time
+
+from benchmarks.common import temp_database, seed_books
+from app.repositories.book_repository import BookRepository
+from app.controllers.order_controller import OrderController
+from app.models.cart import Cart
+from app.models.order import CheckoutResult
+from app.models.payment import PaymentDetails
+from app.utils.payment_gateway import FakeGateway
+from app.utils.payment_processor import PaymentProcessor
+
+STOCK = 1_000_000
+
+
+def run(controller: OrderController, books, orders: int) -> tuple[list[CheckoutResult], float]:
+    card = PaymentDetails.card("4111111111111111", "123")
+    results = []
+    started = time.perf_counter()
+    for n in range(orders):
+        cart = Cart(1 + n % 50)
+        cart.add_item(books[n % len(books)], 1)
+        results.append(controller.place_order(cart.user_id, cart, card))
+    return results, time.perf_counter() - started
+
+
+def report(label: str, results: list[CheckoutResult], elapsed: float) -> None:
+    totals = sorted(r.timings["total_ms"] for r in results)
+    print(f"{label:<7} {len(results)} checkouts in {elapsed:6.2f}s   "
+          f"latency p50 {totals[len(totals) // 2]:8.3f} ms   p99 {totals[int(len(totals) * 0.99)]:8.3f} ms   "
+          f"mean {statistics.fmean(totals):8.3f} ms")
+
+
+def main():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20.0) / 1000
+
+    repo = BookRepository(temp_database())
+    books = [repo.get_book_by_id(b) for b in seed_books(repo, 100, stock=STOCK)]
+
+    def gateway():
+        return FakeGateway(latency=latency, jitter=latency, failure_rate=0.1, decline_rate=0.05, seed=7)
+
+    inline = OrderController(gateway=gateway())
+    results, elapsed = run(inline, books, orders)
+    report("inline", results, elapsed)
+
+    processor = PaymentProcessor(gateway(), workers=16, timeout=latency * 1.5, max_attempts=4, backoff_base=0.01)
+    deferred = OrderController(processor=processor)
+    with contextlib.redirect_stdout(io.StringIO()):
+        results, elapsed = run(deferred, books, orders)
+        settled_in = time.perf_counter()
+        drained = processor.wait_idle(timeout=60)
+        settled_in = time.perf_counter() - settled_in
+        # charges whose last attempt timed out stay Pending; resubmit them as the app would
+        unresolved = processor.stats["unresolved"]
+        for rounds in range(1, 6):
+            if not deferred.reconcile_pending():
+                break
+            drained = processor.wait_idle(timeout=60) and drained
+    report("async", results, elapsed)
+    print(f"        all payments settled {settled_in:.2f}s after the last checkout; stats {processor.stats}")
+    print(f"        {unresolved} left Pending by timeouts, resolved in {rounds - 1} reconciliation pass(es)")
+    deferred.close()
+
+    # --- consistency: every async order is final, and only confirmed ones keep their stock deducted ---
+    ids = [r.order_id for r in results]
+    marks = ",".join("?" * len(ids))
+    statuses = {r["status"]: r["n"] for r in repo.fetch_all(
+        f"SELECT status, COUNT(*) AS n FROM orders WHERE order_id IN ({marks}) GROUP BY status", ids)}
+    confirmed_total = (repo.fetch_one("SELECT COUNT(*) AS n FROM orders WHERE status = 'Confirmed'")["n"])
+    sold = repo.fetch_one("SELECT ? - SUM(stock) AS n FROM books", (STOCK * len(books),))["n"]
+    print(f"        async order statuses {statuses}; units sold {sold}, confirmed orders {confirmed_total}")
+    ok = drained and "Pending" not in statuses and sold == confirmed_total
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# benchmarks/bench_reservations.py
+"""
+Time-limited stock holds: reserve/release throughput from several threads,
+a last-copy race (exactly one hold may win), and the expiry sweep over a
+large hold table with ~1% expired — the indexed batched sweep against the
+same release done with a full scan of stock_holds (on a copy of the data). Finishes by checking
+that books.reserved still equals the sum of every book's holds.
+
+    python -m benchmarks.bench_reservations [holds]
+"""
+import random
+import sqlite3
+import sys
+import threading
+import time
+
+from benchmarks.common import temp_database, seed_books
+from app.repositories.reservation_repository import ReservationRepository, ReservationError
+
+THREADS = 4
+CYCLES = 500   # reserve + release pairs per thread
+
+
+def seed_users(repo, count: int) -> None:
+    with repo.transaction():
+        repo.executemany(
+            "INSERT INTO users (user_id, name, email, password, role) VALUES (?, ?, ?, 'x', 'customer')",
+            ((u, f"User {u}", f"user{u}@example.com") for u in range(1, count + 1)),
+        )
+
+
+def throughput(repo: ReservationRepository, book_ids: list[int]) -> None:
+    errors, retryable = [], []
+
+    def worker(user_id: int):
+        rng = random.Random(user_id)
+        for _ in range(CYCLES):
+            book_id = rng.choice(book_ids)
+            try:
+                if repo.reserve(user_id, {book_id: rng.randint(1, 3)}):
+                    errors.append(book_id)
+            except ReservationError:
+                retryable.append(book_id)
+            repo.release(user_id, [book_id])
+
+    threads = [threading.Thread(target=worker, args=(u,)) for u in range(1, THREADS + 1)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    ops = THREADS * CYCLES * 2
+    print(f"reserve/release, {THREADS} threads: {ops / elapsed:8.0f} ops/s "
+          f"({elapsed * 1000 / ops:.3f} ms each), {len(errors)} unexpected stock-outs, "
+          f"{len(retryable)} retryable errors")
+
+
+def last_copy_race(repo: ReservationRepository, book_id: int, contenders: int = 16) -> bool:
+    repo.execute("UPDATE books SET stock = 1 WHERE book_id = ?", (book_id,))
+    barrier = threading.Barrier(contenders)
+    won, retryable = [], []
+
+    def worker(user_id: int):
+        barrier.wait()
+        while True:
+            try:
+                if not repo.reserve(user_id, {book_id: 1}):
+                    won.append(user_id)
+                return
+            except ReservationError:
+                retryable.append(user_id)
+
+    threads = [threading.Thread(target=worker, args=(u,)) for u in range(1, contenders + 1)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ok = len(won) == 1
+    print(f"last copy, {contenders} contenders: {len(won)} hold(s) granted {'(ok)' if ok else '(OVERSOLD)'}, "
+          f"{len(retryable)} retried")
+    for user_id in won:
+        repo.release(user_id)
+    return ok
+
+
+def seed_holds(repo: ReservationRepository, users: int, book_ids: list[int], holds: int, now: float) -> int:
+    """Bulk-inserts `holds` holds, ~1% of them already expired; returns the expired count."""
+    rng = random.Random(7)
+    per_user = -(-holds // users)
+    rows, expired = [], 0
+    for user_id in range(1, users + 1):
+        for book_id in rng.sample(book_ids, per_user):
+            if len(rows) == holds:
+                break
+            stale = rng.random() < 0.01
+            expired += stale
+            expires_at = now - rng.uniform(1, 600) if stale else now + rng.uniform(60, 900)
+            rows.append((user_id, book_id, rng.randint(1, 3), expires_at))
+    with repo.transaction():
+        repo.executemany("INSERT INTO stock_holds (user_id, book_id, quantity, expires_at) VALUES (?, ?, ?, ?)", rows)
+        repo.execute(
+            "UPDATE books SET reserved = h.qty "
+            "FROM (SELECT book_id, SUM(quantity) AS qty FROM stock_holds GROUP BY book_id) AS h "
+            "WHERE books.book_id = h.book_id"
+        )
+    repo.execute("ANALYZE")
+    return expired
+
+
+def sweep(repo: ReservationRepository, path: str, now: float) -> None:
+    # baseline: the same release with the expiry index disabled (+expires_at), on a copy of the database
+    copy = sqlite3.connect(path + ".scan", isolation_level=None)
+    repo.conn.backup(copy)
+    start = time.perf_counter()
+    copy.execute("BEGIN IMMEDIATE")
+    copy.execute(
+        "UPDATE books SET reserved = books.reserved - h.qty "
+        "FROM (SELECT book_id, SUM(quantity) AS qty FROM stock_holds "
+        "WHERE +expires_at <= ? GROUP BY book_id) AS h WHERE books.book_id = h.book_id",
+        (now,),
+    )
+    copy.execute("DELETE FROM stock_holds WHERE +expires_at <= ?", (now,))
+    copy.execute("COMMIT")
+    scan_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    copy.execute("SELECT COUNT(*) FROM stock_holds WHERE +expires_at <= ?", (now,)).fetchone()
+    scan_idle_ms = (time.perf_counter() - start) * 1000
+    copy.close()
+
+    start = time.perf_counter()
+    released = repo.release_expired(now)
+    sweep_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    repo.release_expired(now)
+    idle_ms = (time.perf_counter() - start) * 1000
+    print(f"sweep: {released:,} expired released in {sweep_ms:.1f} ms vs {scan_ms:.1f} ms "
+          f"by full scan; with nothing expired: {idle_ms:.3f} ms vs {scan_idle_ms:.1f} ms")
+
+
+def consistent(repo: ReservationRepository) -> bool:
+    row = repo.fetch_one(
+        "SELECT COUNT(*) AS n FROM books b "
+        "WHERE b.reserved != COALESCE((SELECT SUM(quantity) FROM stock_holds h WHERE h.book_id = b.book_id), 0) "
+        "OR b.reserved > b.stock"
+    )
+    bad = row["n"]
+    print(f"books.reserved == SUM(holds) for every book: {'yes' if not bad else f'NO ({bad} books)'}")
+    return not bad
+
+
+def main():
+    holds = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    path = temp_database()
+    repo = ReservationRepository(path)
+    book_ids = seed_books(repo, 20_000)
+    users = max(50, -(-holds // 10_000))
+    seed_users(repo, users)
+
+    throughput(repo, book_ids)
+    race_ok = last_copy_race(repo, book_ids[0])
+
+    now = time.time()
+    start = time.perf_counter()
+    expired = seed_holds(repo, users, book_ids[1:], holds, now)
+    print(f"seeded {repo.count_holds():,} holds ({expired:,} expired) in {time.perf_counter() - start:.1f} s")
+    sweep(repo, path, now)
+    left = repo.fetch_one("SELECT COUNT(*) AS n FROM stock_holds WHERE expires_at <= ?", (now,))["n"]
+    ok = race_ok and left == 0 and consistent(repo)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_sales_analytics.py
+"""
+Sales analytics over a large order history: each AnalyticsRepository query
+over the whole year and over one week.
+
+    python -m benchmarks.bench_sales_analytics [orders] [books]
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import temp_database, seed_books
+from app.repositories.analytics_repository import AnalyticsRepository
+from app.repositories.order_repository import OrderRepository
+
+START = datetime(2025, 1, 1)
+
+
+def seed_orders(repo: OrderRepository, orders: int, book_ids: list[int]) -> int:
+    rng = random.Random(42)
+    lines = 0
+    with repo.transaction():
+        for n in range(orders):
+            when = START + timedelta(seconds=int(n * 365 * 86400 / orders))
+            status = "Confirmed" if n % 10 else rng.choice(("Pending", "Cancelled"))
+            items = {b: (rng.randint(1, 3), 100.0 + b % 400) for b in rng.sample(book_ids, rng.randint(1, 6))}
+            total = sum(q * p for q, p in items.values())
+            cursor = repo.execute(
+                "INSERT INTO orders (user_id, total_amount, status, order_date) VALUES (?, ?, ?, ?)",
+                (1 + n % 5000, total, status, repo.format_timestamp(when)),
+            )
+            repo.add_order_items(cursor.lastrowid, [(b, q, p) for b, (q, p) in items.items()])
+            lines += len(items)
+    repo.conn.execute("ANALYZE")
+    return lines
+
+
+def main():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    books = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+
+    path = temp_database()
+    order_repo = OrderRepository(path)
+    book_ids = seed_books(order_repo, books)
+    started = time.perf_counter()
+    lines = seed_orders(order_repo, orders, book_ids)
+    print(f"seeded {orders:,} orders / {lines:,} lines over {books:,} books in {time.perf_counter() - started:.1f}s")
+
+    analytics = AnalyticsRepository(path)
+    week = (START + timedelta(days=180), START + timedelta(days=187))
+    queries = {
+        "order_summary": analytics.order_summary,
+        "revenue_by_day": analytics.revenue_by_day,
+        "revenue_by_book (top 10)": analytics.revenue_by_book,
+        "top_sellers (top 10)": analytics.top_sellers,
+        "revenue_by_author (top 10)": analytics.revenue_by_author,
+    }
+    print(f"{'query':<28} {'full year':>12} {'one week':>12}")
+    for label, fn in queries.items():
+        timings = []
+        for bounds in ((None, None), week):
+            start = time.perf_counter()
+            fn(*bounds)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{label:<28} {timings[0]:9.1f} ms {timings[1]:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
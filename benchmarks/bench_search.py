@@ -0,0 +1,75 @@
+# benchmarks/bench_search.py
+"""
+Catalog search: FTS5 search_books vs a LIKE '%...%' scan, at 100k and 1M books.
+
+    python -m benchmarks.bench_search            # 100k and 1M
+    python -m benchmarks.bench_search 100000     # custom sizes
+"""
+import random
+import sys
+import time
+
+from benchmarks.common import temp_database
+from app.repositories.book_repository import BookRepository
+
+SIZES = (100_000, 1_000_000)
+QUERIES = ("harry", "potter chamber", "tolk", "dune herbert", "zzzz")
+WORDS = ("silent", "river", "empire", "garden", "shadow", "winter", "glass", "night", "ocean",
+         "forest", "stone", "fire", "crown", "storm", "letter", "journey", "mirror", "secret")
+NAMES = ("Rowling", "Tolkien", "Herbert", "Austen", "Orwell", "Christie", "Murakami", "Atwood")
+
+
+def fill_catalog(repo: BookRepository, target: int):
+    rng = random.Random(42)
+    have = repo.fetch_one("SELECT COUNT(*) AS n FROM books")["n"]
+    batch = 50_000
+    while have < target:
+        n = min(batch, target - have)
+        rows = []
+        for i in range(n):
+            title = " ".join(rng.choice(WORDS) for _ in range(3)).title()
+            if (have + i) % 10_000 == 0:
+                title = "Harry Potter and the Chamber of Secrets"
+            if (have + i) % 25_000 == 1:
+                title = "Dune"
+            rows.append((title, f"{rng.choice(NAMES)} {have + i}", 100.0, 10))
+        with repo.transaction():
+            repo.executemany("INSERT INTO books (title, author, price, stock) VALUES (?, ?, ?, ?)", rows)
+        have += n
+
+
+def like_search(repo: BookRepository, text: str, limit: int = 20):
+    clauses, params = [], []
+    for token in text.split():
+        clauses.append("(title LIKE ? OR author LIKE ?)")
+        params += [f"%{token}%", f"%{token}%"]
+    return repo.fetch_all(
+        f"SELECT * FROM books WHERE {' AND '.join(clauses)} LIMIT ?", tuple(params) + (limit,)
+    )
+
+
+def ms(fn, *args, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    sizes = tuple(int(a) for a in sys.argv[1:]) or SIZES
+    repo = BookRepository(temp_database())
+    for size in sorted(sizes):
+        start = time.perf_counter()
+        fill_catalog(repo, size)
+        print(f"\n{size:,} books (loaded in {time.perf_counter() - start:.1f}s)")
+        print(f"{'query':>16} | {'LIKE ms':>9} | {'FTS5 ms':>9} | hits")
+        for q in QUERIES:
+            like_ms = ms(like_search, repo, q)
+            fts_ms = ms(repo.search_books, q)
+            print(f"{q:>16} | {like_ms:>9.2f} | {fts_ms:>9.2f} | {len(repo.search_books(q))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_sessions.py
+"""
+Session store: token lookups/s from many threads (striped vs one lock), the
+cost of sweeping expired sessions out of a large store vs scanning it, and
+persisted sessions surviving a restart.
+
+    python -m benchmarks.bench_sessions [sessions] [threads]
+"""
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import temp_database
+from app.models.user import Customer
+from app.repositories.user_repository import UserRepository
+from app.utils.session_manager import SessionStore
+
+
+class ManualClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def lookup_rate(store: SessionStore, tokens: list[str], threads: int, lookups: int) -> float:
+    def worker(seed: int) -> int:
+        rng = random.Random(seed)
+        hits = 0
+        for _ in range(lookups // threads):
+            hits += store.get(tokens[rng.randrange(len(tokens))]) is not None
+        return hits
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        hits = sum(pool.map(worker, range(threads)))
+    assert hits == lookups // threads * threads
+    return hits / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    users = [Customer(i, f"User {i}", f"user{i}@bench.io", "x") for i in range(1, 1001)]
+
+    for stripes in (1, 16):
+        store = SessionStore(ttl=1800, stripes=stripes)
+        tokens = [store.create(users[i % len(users)]) for i in range(count)]
+        rate = lookup_rate(store, tokens, threads, 400_000)
+        print(f"{count:,} sessions, {stripes:>2} stripe(s), {threads} threads: {rate:,.0f} lookups/s")
+
+    # steady state: a sweep every 30 s while a twentieth of recent sessions are used each time
+    clock = ManualClock()
+    store = SessionStore(ttl=1800, clock=clock)
+    tokens = []
+    rng = random.Random(7)
+    sweep_ms, scan_ms, evicted = [], [], 0
+    for step in range(180):   # 90 simulated minutes
+        clock.now += 30
+        tokens.extend(store.create(users[rng.randrange(len(users))]) for _ in range(count // 60))
+        for token in rng.sample(tokens, len(tokens) // 20):
+            store.get(token)
+        start = time.perf_counter()
+        sum(1 for st in store._stripes for s in st.sessions.values() if s.expires_at <= clock.now)
+        scan_ms.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        evicted += store.sweep()
+        sweep_ms.append((time.perf_counter() - start) * 1000)
+        del tokens[:-count]   # older tokens are long expired
+    print(f"periodic sweep (30 s, ttl 30 min, ~{len(store):,} live): "
+          f"{statistics.mean(sweep_ms[60:]):.1f} ms/sweep vs {statistics.mean(scan_ms[60:]):.1f} ms "
+          f"to scan for expired; {evicted:,} evicted in total")
+    start = time.perf_counter()
+    store.sweep()
+    print(f"sweep with nothing expired: {(time.perf_counter() - start) * 1000:.3f} ms")
+
+    # persistence: sessions survive a new store (process restart)
+    repo = UserRepository(temp_database())
+    with repo.transaction():
+        repo.executemany("INSERT INTO users (user_id, name, email, password, role) VALUES (?, ?, ?, 'x', 'customer')",
+                         ((u.user_id, u.name, u.email) for u in users))
+    persisted = SessionStore(persist=True)
+    start = time.perf_counter()
+    saved = [persisted.create(u) for u in users]
+    create_ms = (time.perf_counter() - start) * 1000 / len(users)
+    restarted = SessionStore(persist=True)
+    start = time.perf_counter()
+    restored = sum(restarted.get(t) is not None for t in saved)
+    restore_ms = (time.perf_counter() - start) * 1000 / len(users)
+    print(f"persisted: create {create_ms:.3f} ms/session, {restored}/{len(saved)} restored after restart "
+          f"({restore_ms:.3f} ms each on first use)")
+
+
+if __name__ == "__main__":
+    main()
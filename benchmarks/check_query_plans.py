@@ -0,0 +1,94 @@
+# benchmarks/check_query_plans.py
+"""
+Asserts via EXPLAIN QUERY PLAN that none of the hot lookups scans a table
+on a freshly migrated database. Exits non-zero when one does.
+
+    python -m benchmarks.check_query_plans
+"""
+import sys
+
+from benchmarks.common import temp_database
+from app.repositories.book_repository import BookRepository
+
+HOT_QUERIES = {
+    "load_cart": (
+        "SELECT ci.quantity, b.book_id, b.title, b.author, b.price, b.stock "
+        "FROM cart_items ci JOIN books b ON b.book_id = ci.book_id "
+        "WHERE ci.user_id = ? ORDER BY ci.cart_item_id", (1,)),
+    "save_cart (diff read)": ("SELECT book_id, quantity FROM cart_items WHERE user_id = ?", (1,)),
+    "save_cart (line delete)": ("DELETE FROM cart_items WHERE user_id = ? AND book_id = ?", (1, 1)),
+    "get_orders_by_user": ("SELECT * FROM orders WHERE user_id = ? ORDER BY order_date, order_id", (1,)),
+    "get_orders_page": (
+        "SELECT * FROM orders WHERE user_id = ? AND (order_date, order_id) < (?, ?) "
+        "ORDER BY order_date DESC, order_id DESC LIMIT ?", (1, "2030-01-01", 10**9, 20)),
+    "get_pending_payments": (
+        "SELECT p.payment_id, p.order_id, p.method, p.status, o.total_amount "
+        "FROM orders o JOIN payments p ON p.order_id = o.order_id "
+        "WHERE o.status = ? AND o.order_date < ? AND p.status = ? "
+        "ORDER BY o.order_date, o.order_id LIMIT ?", ("Pending", "2030-01-01", "Pending", 1000)),
+    "get_payment_by_order": ("SELECT * FROM payments WHERE order_id = ?", (1,)),
+    "get_book_by_id": ("SELECT book_id, title, author, price, stock FROM books WHERE book_id = ?", (1,)),
+    "get_books_by_ids": (
+        "SELECT book_id, title, author, price, stock FROM books "
+        "WHERE book_id IN (SELECT value FROM json_each(?))", ("[1, 2, 3]",)),
+    "get_user_by_email": ("SELECT * FROM users WHERE email = ?", ("a@b.c",)),
+    "email_exists": ("SELECT 1 FROM users WHERE email = ? LIMIT 1", ("a@b.c",)),
+    "count_by_role": ("SELECT COUNT(*) AS n FROM users WHERE role = ?", ("admin",)),
+    "get_session": ("SELECT user_id, expires_at FROM sessions WHERE token_hash = ? AND expires_at > ?", ("ab", 0.0)),
+    "sessions delete_expired": ("DELETE FROM sessions WHERE expires_at <= ?", (0.0,)),
+    "release_expired (cutoff)": (
+        "SELECT expires_at FROM stock_holds WHERE expires_at <= ? ORDER BY expires_at LIMIT 1 OFFSET ?", (0.0, 999)),
+    "release_expired (sums)": (
+        "SELECT book_id, SUM(quantity) AS qty FROM stock_holds INDEXED BY idx_stock_holds_expiry "
+        "WHERE expires_at <= ? GROUP BY book_id", (0.0,)),
+    "reserve (expired on books)": (
+        "SELECT book_id, SUM(quantity) AS qty FROM stock_holds "
+        "WHERE book_id IN (SELECT value FROM json_each(?)) AND expires_at <= ? GROUP BY book_id", ("[1, 2]", 0.0)),
+    "reserve (availability)": (
+        "SELECT b.book_id, b.stock - b.reserved + COALESCE(h.quantity, 0) AS available, "
+        "COALESCE(h.quantity, 0) AS held "
+        "FROM books b LEFT JOIN stock_holds h ON h.user_id = ? AND h.book_id = b.book_id "
+        "WHERE b.book_id IN (SELECT value FROM json_each(?))", (1, "[1, 2]")),
+    "release (user)": ("DELETE FROM stock_holds WHERE user_id = ?", (1,)),
+    "get_users_page (role)": (
+        "SELECT user_id, name, email, role, address FROM users WHERE user_id > ? AND role = ? "
+        "ORDER BY user_id LIMIT ?", (1, "customer", 20)),
+    "sales by book (week)": (
+        "SELECT oi.book_id, SUM(oi.quantity), SUM(oi.quantity * oi.unit_price) "
+        "FROM orders o CROSS JOIN order_items oi ON oi.order_id = o.order_id "
+        "WHERE o.status = ? AND o.order_date >= ? AND o.order_date < ? GROUP BY oi.book_id",
+        ("Confirmed", "2025-01-01", "2025-01-08")),
+    "revenue_by_day (week)": (
+        "SELECT substr(order_date, 1, 10) AS day, COUNT(*), SUM(total_amount) FROM orders "
+        "WHERE status = ? AND order_date >= ? AND order_date < ? GROUP BY day ORDER BY day",
+        ("Confirmed", "2025-01-01", "2025-01-08")),
+    "get_low_stock_books": (
+        "SELECT book_id, title, author, stock, reorder_threshold FROM books "
+        "WHERE stock < reorder_threshold ORDER BY stock, book_id LIMIT ?", (50,)),
+    "get_books_page (title)": (
+        "SELECT book_id, title, author, price, stock FROM books "
+        "WHERE (title, book_id) > (?, ?) ORDER BY title, book_id LIMIT ?", ("m", 1, 20)),
+}
+
+
+def plan(conn, sql: str, params: tuple) -> list[str]:
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+
+def main():
+    repo = BookRepository(temp_database())
+    conn = repo.conn
+    conn.execute("ANALYZE")
+    failures = 0
+    for name, (sql, params) in HOT_QUERIES.items():
+        steps = plan(conn, sql, params)
+        # scanning a json_each parameter list is expected; scanning a table is not
+        scans = [s for s in steps if s.startswith("SCAN") and "USING" not in s and "VIRTUAL TABLE" not in s]
+        failures += bool(scans)
+        print(f"{'FAIL' if scans else 'ok  '} {name:<26} {' | '.join(steps)}")
+    print("PASS: no hot query scans a table" if not failures else f"FAIL: {failures} hot queries scan")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# benchmarks/common.py
+"""
+Shared helpers for the benchmark scripts.
+Run any benchmark from the repo root, e.g.:  python -m benchmarks.bench_cart_persistence
+"""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from create_tables import setup_database
+from app.repositories.book_repository import BookRepository
+from app.repositories.order_repository import OrderRepository
+from app.repositories.user_repository import UserRepository
+from app.repositories.analytics_repository import AnalyticsRepository
+from app.repositories.session_repository import SessionRepository
+from app.repositories.reservation_repository import ReservationRepository
+
+
+def temp_database() -> str:
+    """
+    Creates a fresh, fully set-up database in a temp dir and returns its path.
+    Call this before constructing any repository so the singletons bind to it.
+    """
+    path = os.path.join(tempfile.mkdtemp(prefix="nob_bench_"), "bench.db")
+    setup_database(path)
+    # bind every repository singleton now, so controllers never fall back to bookstore.db
+    for repo_cls in (BookRepository, OrderRepository, UserRepository, AnalyticsRepository, SessionRepository,
+                     ReservationRepository):
+        repo_cls(path)
+    return path
+
+
+def seed_books(repo, count: int, stock: int = 1_000_000, price: float = 100.0) -> list[int]:
+    """Bulk-inserts `count` books and returns their ids."""
+    with repo.transaction():
+        repo.executemany(
+            "INSERT INTO books (title, author, price, stock) VALUES (?, ?, ?, ?)",
+            ((f"Title {i}", f"Author {i % 997}", price, stock) for i in range(count)),
+        )
+    return [r["book_id"] for r in repo.fetch_all("SELECT book_id FROM books ORDER BY book_id")]
+
+
+@contextmanager
+def timed(label: str, results: dict):
+    start = time.perf_counter()
+    yield
+    results[label] = time.perf_counter() - start
@@ -0,0 +1,89 @@
+# benchmarks/stress_checkout.py
+"""
+Multi-threaded checkout stress run: many customers race for a few titles.
+Exits non-zero if any book is oversold or a confirmed order lost its deduction.
+
+    python -m benchmarks.stress_checkout [threads] [attempts_per_thread]
+"""
+import contextlib
+import io
+import sys
+import threading
+import time
+
+from benchmarks.common import temp_database
+from app.repositories.book_repository import BookRepository
+from app.controllers.order_controller import OrderController
+from app.models.cart import Cart
+from app.models.order import CheckoutResult
+from app.models.payment import PaymentDetails
+
+INITIAL_STOCK = {0: 50, 1: 7, 2: 120}
+QTY = {0: 2, 1: 1, 2: 3}
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    attempts = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+
+    repo = BookRepository(temp_database())
+    book_ids = {k: repo.add_book(f"Hot Title {k}", "Author", 10.0, stock) for k, stock in INITIAL_STOCK.items()}
+    orders = OrderController()
+
+    cod = PaymentDetails.cod()  # every checkout pays cash on delivery
+    confirmed, rejected, failed = [0], [0], []
+    lock = threading.Lock()
+    start_gate = threading.Barrier(threads)
+
+    def customer(user_id: int):
+        start_gate.wait()
+        for n in range(attempts):
+            cart = Cart(user_id)
+            # the cart's Book snapshots go stale immediately; checkout must not trust them
+            for k in ((n + user_id) % 3, (n + user_id + 1) % 3):
+                cart.add_item(repo.get_book_by_id(book_ids[k]), QTY[k])
+            result = orders.place_order(user_id, cart, cod)
+            with lock:
+                if result.ok:
+                    confirmed[0] += 1
+                elif result.status == CheckoutResult.REJECTED:
+                    rejected[0] += 1
+                else:
+                    failed.append(result.message)
+
+    workers = [threading.Thread(target=customer, args=(uid,)) for uid in range(1, threads + 1)]
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+    elapsed = time.perf_counter() - started
+
+    ok = not failed
+    print(f"{threads} threads × {attempts} attempts in {elapsed:.2f}s: "
+          f"{confirmed[0]} confirmed, {rejected[0]} rejected, {len(failed)} errors")
+    confirmed_rows = repo.fetch_one("SELECT COUNT(*) AS n FROM orders WHERE status = 'Confirmed'")["n"]
+    ok &= confirmed_rows == confirmed[0]
+    # the stock that left each book must be exactly what its confirmed orders bought:
+    # fewer means a lost update, more means stock left without a confirmed order
+    for k, book_id in book_ids.items():
+        remaining = repo.fetch_one("SELECT stock FROM books WHERE book_id = ?", (book_id,))["stock"]
+        bought = repo.fetch_one(
+            "SELECT COUNT(*) AS lines, COALESCE(SUM(oi.quantity), 0) AS units "
+            "FROM order_items oi JOIN orders o ON o.order_id = oi.order_id "
+            "WHERE oi.book_id = ? AND o.status = 'Confirmed'", (book_id,))
+        sold = INITIAL_STOCK[k] - remaining
+        book_ok = sold == bought["units"] == bought["lines"] * QTY[k]
+        print(f"  book {book_id}: initial {INITIAL_STOCK[k]}, remaining {remaining}, sold {sold}, "
+              f"bought by {bought['lines']} confirmed orders {bought['units']} {'ok' if book_ok else 'MISMATCH'}")
+        ok &= book_ok
+    print(f"  confirmed orders in DB: {confirmed_rows} (checkout reported {confirmed[0]})")
+    for msg in failed[:5]:
+        print(f"  error: {msg}")
+    print("PASS: no oversell" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
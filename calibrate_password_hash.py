@@ -0,0 +1,23 @@
+# calibrate_password_hash.py
+"""
+Picks the password-hash cost that takes about `target_ms` per hash on this
+machine and prints it as a NOB_PASSWORD_HASHER setting. Existing hashes keep
+verifying with their own stored cost and are upgraded on the next login.
+
+    python calibrate_password_hash.py [target_ms] [scrypt|pbkdf2_sha256]
+"""
+import sys
+import time
+
+from app.utils.password_hasher import HAS_SCRYPT, calibrate
+
+def main(target_ms: str = "50", algorithm: str = "scrypt" if HAS_SCRYPT else "pbkdf2_sha256"):
+    hasher = calibrate(float(target_ms), algorithm)
+    start = time.perf_counter()
+    hasher.hash("calibration-password")
+    took_ms = (time.perf_counter() - start) * 1000
+    print(f"{hasher.spec()}: {took_ms:.1f} ms per hash (~{1000 / took_ms:.0f} logins/s per core)")
+    print(f"export NOB_PASSWORD_HASHER='{hasher.spec()}'")
+
+if __name__ == "__main__":
+    main(*sys.argv[1:3])
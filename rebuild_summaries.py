@@ -0,0 +1,21 @@
+# rebuild_summaries.py
+"""
+Recomputes the admin dashboard summary tables (daily revenue, orders per
+status, payments per method/status, per-book units, per-user spend) from
+orders, order_items and payments. Use it to repair the tables after manual
+data fixes; normal writes keep them current through triggers.
+
+    python rebuild_summaries.py [db_name]
+"""
+import sys
+
+from app.repositories.analytics_repository import AnalyticsRepository
+
+def rebuild(db_name: str = "bookstore.db"):
+    repo = AnalyticsRepository(db_name)  # opening a repository migrates the schema
+    if not repo.rebuild_summaries():
+        sys.exit(1)
+    print("Dashboard summary tables rebuilt successfully!")
+
+if __name__ == "__main__":
+    rebuild(*sys.argv[1:2])